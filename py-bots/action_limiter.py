@@ -0,0 +1,123 @@
+import asyncio
+from collections import deque
+from typing import TYPE_CHECKING, Awaitable, Callable, Deque, Dict, Optional
+
+from config import Settings
+from metrics import BotMetrics
+
+if TYPE_CHECKING:
+    from bot import AuctionBot
+
+
+class ActionTimeout(asyncio.TimeoutError):
+    pass
+
+
+# Concurrency limits and deadlines for bot actions (top-up, daily, mystery,
+# create, bid), whether run by the scheduler or by AuctionBot.tick. Each action
+# waits for one of its bot's slots, then one of the fleet's, and is cancelled
+# when its deadline (waiting included) passes, so a stalled endpoint holds up
+# only the actions that call it. A limit of 0 leaves that level unbounded.
+# Per-bot slots are a count of the bot's actions in flight, dropped when it
+# reaches zero, so an idle bot holds no limiter state.
+class ActionLimiter:
+    def __init__(self, settings: Settings, metrics: Optional[BotMetrics] = None):
+        self.settings = settings
+        self.metrics = metrics
+        self.in_flight = 0
+        self.waiting = 0
+        self.timeouts: Dict[str, int] = {}
+        self._fleet: Optional[asyncio.Semaphore] = None
+        self._bot_held: Dict[str, int] = {}
+        # Actions waiting for one of their bot's slots, only for bots at their limit
+        self._bot_waiters: Dict[str, Deque[asyncio.Future]] = {}
+        self.reconfigure()
+
+    # New limits apply to actions that start afterwards; running ones keep the slots they hold
+    def reconfigure(self):
+        limit = self.settings.fleet_action_concurrency
+        self._fleet = asyncio.Semaphore(limit) if limit > 0 else None
+
+    def deadline(self, action: str) -> float:
+        return self.settings.action_deadlines_sec.get(action, self.settings.action_deadline_sec)
+
+    async def run(self, bot: "AuctionBot", action: str, call: Callable[[], Awaitable]):
+        deadline = self.deadline(action)
+        if deadline <= 0:
+            return await self._limited(bot, call)
+        try:
+            return await asyncio.wait_for(self._limited(bot, call), deadline)
+        except asyncio.TimeoutError:
+            self.timeouts[action] = self.timeouts.get(action, 0) + 1
+            if self.metrics:
+                self.metrics.action_timeout(action)
+            raise ActionTimeout(f"{action} cancelled after its {deadline:g}s deadline") from None
+
+    async def _limited(self, bot: "AuctionBot", call: Callable[[], Awaitable]):
+        name = bot.username
+        fleet = self._fleet
+        self.waiting += 1
+        try:
+            await self._acquire_bot(name)
+            try:
+                if fleet:
+                    await fleet.acquire()
+            except BaseException:
+                self._release_bot(name)
+                raise
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        try:
+            return await call()
+        finally:
+            self.in_flight -= 1
+            if fleet:
+                fleet.release()
+            self._release_bot(name)
+
+    async def _acquire_bot(self, name: str):
+        held = self._bot_held.get(name, 0)
+        limit = self.settings.bot_action_concurrency
+        if limit <= 0 or (held < limit and name not in self._bot_waiters):
+            self._bot_held[name] = held + 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        waiters = self._bot_waiters.setdefault(name, deque())
+        waiters.append(waiter)
+        try:
+            # Resolved by _release_bot, which hands over its slot without giving it up
+            await waiter
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                self._release_bot(name)
+            elif waiter in waiters:
+                waiters.remove(waiter)
+                if not waiters and self._bot_waiters.get(name) is waiters:
+                    del self._bot_waiters[name]
+            raise
+
+    def _release_bot(self, name: str):
+        waiters = self._bot_waiters.get(name)
+        while waiters:
+            waiter = waiters.popleft()
+            if not waiters:
+                del self._bot_waiters[name]
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        held = self._bot_held.get(name, 0) - 1
+        if held > 0:
+            self._bot_held[name] = held
+        else:
+            self._bot_held.pop(name, None)
+
+    def stats(self) -> Dict:
+        return {
+            "botLimit": self.settings.bot_action_concurrency,
+            "fleetLimit": self.settings.fleet_action_concurrency,
+            "inFlight": self.in_flight,
+            "waiting": self.waiting,
+            "timeouts": sum(self.timeouts.values()),
+            "timeoutsByAction": dict(sorted(self.timeouts.items())),
+        }
@@ -0,0 +1,124 @@
+import asyncio
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+
+# Fixed-capacity ring buffer of bot activity. Records are stored column-wise
+# (timestamps in a double array, bot and event names as interned ids) so even
+# millions of entries stay compact, and every record has a monotonically
+# increasing sequence number that doubles as a pagination/stream cursor.
+# Filtered reads look at no more than `scan_limit` records per call and hand
+# back a cursor to carry on from, so a rare filter never walks the whole ring
+# on the event loop.
+class ActivityLog:
+    def __init__(self, capacity: int, scan_limit: int = 50000):
+        self.capacity = max(1, capacity)
+        self.scan_limit = max(1, scan_limit)
+        self._ts = array("d", bytes(8 * self.capacity))
+        self._bot = array("l", bytes(array("l").itemsize * self.capacity))
+        self._event = array("l", bytes(array("l").itemsize * self.capacity))
+        self._data: List[Optional[Dict]] = [None] * self.capacity
+        self._names: List[str] = []
+        self._name_ids: Dict[str, int] = {}
+        self.next_seq = 0
+        self._waiter: Optional[asyncio.Event] = None
+
+    def _intern(self, name: str) -> int:
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self._name_ids[name] = len(self._names)
+            self._names.append(name)
+        return name_id
+
+    @property
+    def oldest_seq(self) -> int:
+        return max(0, self.next_seq - self.capacity)
+
+    def __len__(self) -> int:
+        return self.next_seq - self.oldest_seq
+
+    def append(self, ts: float, bot: str, event: str, data: Optional[Dict]) -> int:
+        seq = self.next_seq
+        slot = seq % self.capacity
+        self._ts[slot] = ts
+        self._bot[slot] = self._intern(bot)
+        self._event[slot] = self._intern(event)
+        self._data[slot] = data or None
+        self.next_seq = seq + 1
+        if self._waiter:
+            self._waiter.set()
+            self._waiter = None
+        return seq
+
+    def _entry(self, seq: int) -> Dict:
+        slot = seq % self.capacity
+        return {
+            "seq": seq,
+            "ts": self._ts[slot],
+            "bot": self._names[self._bot[slot]],
+            "event": self._names[self._event[slot]],
+            "data": self._data[slot] or {},
+        }
+
+    def _filter_ids(self, bot: Optional[str], event: Optional[str]) -> Tuple[Optional[int], Optional[int], bool]:
+        bot_id = self._name_ids.get(bot) if bot else None
+        event_id = self._name_ids.get(event) if event else None
+        # A filter on a name never seen cannot match anything
+        impossible = (bot is not None and bot_id is None) or (event is not None and event_id is None)
+        return bot_id, event_id, impossible
+
+    def _matches(self, seq: int, bot_id: Optional[int], event_id: Optional[int]) -> bool:
+        slot = seq % self.capacity
+        if bot_id is not None and self._bot[slot] != bot_id:
+            return False
+        return event_id is None or self._event[slot] == event_id
+
+    def query(
+        self,
+        before: Optional[int] = None,
+        limit: int = 100,
+        bot: Optional[str] = None,
+        event: Optional[str] = None,
+    ) -> Tuple[List[Dict], Optional[int]]:
+        # Newest first; pass the returned cursor back as `before` for the next page.
+        # A page cut short by the scan limit can hold fewer than `limit` events
+        # (even none) and still return a cursor.
+        bot_id, event_id, impossible = self._filter_ids(bot, event)
+        if impossible:
+            return [], None
+        seq = self.next_seq if before is None else min(before, self.next_seq)
+        oldest = self.oldest_seq
+        stop = max(oldest, seq - self.scan_limit)
+        events: List[Dict] = []
+        while seq > stop and len(events) < limit:
+            seq -= 1
+            if self._matches(seq, bot_id, event_id):
+                events.append(self._entry(seq))
+        return events, (seq if seq > oldest else None)
+
+    def since(
+        self, after: int, limit: int = 1000, bot: Optional[str] = None, event: Optional[str] = None
+    ) -> Tuple[List[Dict], int]:
+        # Oldest first from the cursor onwards; returns the cursor to resume from
+        bot_id, event_id, impossible = self._filter_ids(bot, event)
+        seq = max(after + 1, self.oldest_seq)
+        if impossible:
+            return [], self.next_seq - 1
+        stop = min(self.next_seq, seq + self.scan_limit)
+        events: List[Dict] = []
+        while seq < stop and len(events) < limit:
+            if self._matches(seq, bot_id, event_id):
+                events.append(self._entry(seq))
+            seq += 1
+        return events, seq - 1
+
+    async def wait(self, after: int, timeout: float) -> bool:
+        if self.next_seq - 1 > after:
+            return True
+        if self._waiter is None:
+            self._waiter = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._waiter.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
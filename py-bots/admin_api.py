@@ -1,11 +1,16 @@
+import asyncio
+import json
 import logging
-from typing import Dict
+from typing import Dict, Optional
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 
 from config import Settings
 from bot_manager import BotManager
+from loadtest import parse_rates
+from metrics import CONTENT_TYPE
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 
@@ -39,15 +44,20 @@ async def health():
     return {"status": "ok", "running": manager.running}
 
 
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(manager.render_metrics(), media_type=CONTENT_TYPE)
+
+
 @app.get("/admin/bots/status")
 async def bot_status():
-    return {"running": manager.running, "bots": manager.status()}
+    return await manager.status_report()
 
 
 @app.post("/admin/bots/start")
 async def bot_start():
     await manager.start()
-    return {"status": "started", "bots": manager.status()}
+    return {"status": "started", "bots": await manager.status()}
 
 
 @app.post("/admin/bots/stop")
@@ -63,13 +73,111 @@ async def get_config():
 
 @app.post("/admin/bots/config")
 async def set_config(payload: Dict):
-    await manager.apply_config(payload)
-    return {"status": "applied", "config": manager.config_snapshot()}
+    try:
+        changes = await manager.apply_config(payload)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return {"status": "applied", "changes": changes, "config": manager.config_snapshot()}
 
 
 @app.get("/admin/bots/activity")
-async def activity():
-    return {"events": manager.get_activity()}
+async def activity(
+    before: Optional[int] = None,
+    limit: int = Query(200, ge=1, le=5000),
+    bot: Optional[str] = None,
+    event: Optional[str] = None,
+):
+    events, cursor = manager.get_activity(before=before, limit=limit, bot=bot, event=event)
+    return {"events": events, "nextCursor": cursor}
+
+
+@app.get("/admin/bots/activity/stream")
+async def activity_stream(
+    request: Request,
+    after: Optional[int] = None,
+    bot: Optional[str] = None,
+    event: Optional[str] = None,
+):
+    log = manager.activity
+    # Resume from Last-Event-ID on reconnect, otherwise only tail new events
+    last_id = request.headers.get("last-event-id")
+    cursor = int(last_id) if last_id and last_id.isdigit() else after
+    if cursor is None:
+        cursor = log.next_seq - 1
+
+    async def events():
+        nonlocal cursor
+        while not await request.is_disconnected():
+            batch, cursor = log.since(cursor, bot=bot, event=event)
+            for entry in batch:
+                yield f"id: {entry['seq']}\nevent: activity\ndata: {json.dumps(entry)}\n\n"
+            if batch:
+                continue
+            if cursor < log.next_seq - 1:
+                # Scan limit reached without a match; let other requests run before the next chunk
+                await asyncio.sleep(0)
+            elif not await log.wait(cursor, timeout=15):
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.get("/admin/loop")
+async def loop_report():
+    return manager.loop_report()
+
+
+@app.post("/admin/profiler/start")
+async def profiler_start(payload: Optional[Dict] = None):
+    payload = payload or {}
+    try:
+        profiler = manager.monitor.start_profiler(payload.get("intervalMs"), payload.get("durationSec"))
+    except ValueError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    return {"status": "started", "profiler": profiler}
+
+
+@app.post("/admin/profiler/stop")
+async def profiler_stop():
+    stacks = manager.monitor.stop_profiler()
+    if stacks is None:
+        raise HTTPException(status_code=404, detail="No profile has been started")
+    return PlainTextResponse(stacks)
+
+
+@app.get("/admin/profiler")
+async def profiler_stacks():
+    # Collapsed stacks so far (or of the last run), one "frame;frame;frame count" line per stack
+    if manager.monitor.profiler is None:
+        raise HTTPException(status_code=404, detail="No profile has been started")
+    return PlainTextResponse(manager.monitor.profiler.collapsed())
+
+
+@app.post("/admin/loadtest/start")
+async def loadtest_start(payload: Dict):
+    try:
+        rates = parse_rates(payload.get("rates", {}))
+        duration_sec = float(payload.get("durationSec", 60))
+        max_in_flight = payload.get("maxInFlight")
+        if max_in_flight is not None:
+            max_in_flight = int(max_in_flight)
+    except (TypeError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    try:
+        report = await manager.start_load_test(rates, duration_sec, max_in_flight)
+    except ValueError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    return {"status": "started", "report": report}
+
+
+@app.post("/admin/loadtest/stop")
+async def loadtest_stop():
+    return {"status": "stopped", "report": await manager.stop_load_test()}
+
+
+@app.get("/admin/loadtest/report")
+async def loadtest_report():
+    return {"report": manager.load_test.report() if manager.load_test else None}
 
 
 if __name__ == "__main__":
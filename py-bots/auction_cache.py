@@ -0,0 +1,203 @@
+import asyncio
+import heapq
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import clock
+from config import Settings
+
+
+# All a bot reads from a snapshot entry; the rest of each auction is dropped on arrival
+SNAPSHOT_FIELDS = ("id", "seller", "condition", "currentHighBid")
+
+
+def parse_timestamp(value: Optional[str]) -> float:
+    # API timestamps carry up to 7 fractional digits, more than fromisoformat accepts
+    if not value:
+        return 0.0
+    value = value.replace("Z", "+00:00")
+    if "." in value:
+        head, _, rest = value.partition(".")
+        digits = len(rest) - len(rest.lstrip("0123456789"))
+        value = f"{head}.{rest[:min(digits, 6)]}{rest[digits:]}"
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return 0.0
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def format_timestamp(ts: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(ts)) + f".{int(ts % 1 * 1e6):06d}Z"
+
+
+def _trim(auction: Dict) -> Dict:
+    kept = {k: auction[k] for k in SNAPSHOT_FIELDS if k in auction}
+    # Sellers and conditions repeat across auctions; share one string for each
+    for k in ("seller", "condition"):
+        if isinstance(kept.get(k), str):
+            kept[k] = sys.intern(kept[k])
+    return kept
+
+
+# Fleet-wide live-auction cache kept in sync by deltas: after one full load each
+# refresh asks only for auctions updated since the newest updatedAt seen, merges
+# them by id and drops finished ones; ended auctions expire locally from a heap
+# on auctionEnd. At most one refresh per TTL no matter how many bots ask, and
+# concurrent callers share the in-flight refresh. A periodic full sync catches
+# deletions, which leave no updatedAt behind. A failed refresh is remembered for
+# a short backoff, so callers get the same error instead of each retrying it.
+class AuctionSnapshotCache:
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self._by_id: Dict[str, Tuple[float, Dict]] = {}
+        self._ends: List[Tuple[float, str]] = []
+        self._auctions: List[Dict] = []
+        self._dirty = False
+        self._high_water: float = 0
+        self._full_synced_at: float = 0
+        self._fetched_at: float = 0
+        # Start of the last successful refresh: anything created before it is in the snapshot if still live
+        self.synced_at: float = 0
+        self._fetch_duration: float = 0
+        self._failure: Optional[Exception] = None
+        self._failed_until: float = 0
+        self._lock: Optional[asyncio.Lock] = None
+        self.hits = 0
+        self.misses = 0
+        self.refresh_failures = 0
+        self.failure_hits = 0
+        self.full_syncs = 0
+        self.delta_syncs = 0
+        self.last_delta_size = 0
+        self.received = 0
+        self.expired = 0
+
+    def _fresh(self) -> bool:
+        return clock.now() - self._fetched_at < self.settings.auction_cache_ttl_sec
+
+    def _raise_recent_failure(self):
+        if self._failure is not None and clock.now() < self._failed_until:
+            self.failure_hits += 1
+            # Fresh traceback each time; re-raising the same object would keep extending it
+            raise self._failure.with_traceback(None)
+
+    async def get(self, fetch: Callable[[Optional[str]], Awaitable[List[Dict]]]) -> List[Dict]:
+        if self._fresh():
+            self.hits += 1
+            return self._live()
+        self._raise_recent_failure()
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._fresh():
+                self.hits += 1
+                return self._live()
+            self._raise_recent_failure()
+            self.misses += 1
+            started = clock.now()
+            full = not self._full_synced_at or started - self._full_synced_at >= self.settings.auction_full_sync_sec
+            # Overlap the cursor slightly so updates committed with the same timestamp are not missed
+            since = None if full else format_timestamp(self._high_water - self.settings.auction_sync_overlap_sec)
+            try:
+                auctions = await fetch(since)
+            except Exception as exc:
+                self.refresh_failures += 1
+                self._failure = exc
+                self._failed_until = clock.now() + self.settings.auction_cache_failure_backoff_sec
+                raise
+            self._failure = None
+            self._merge(auctions, full)
+            self.synced_at = started
+            self._fetched_at = clock.now()
+            self._fetch_duration = self._fetched_at - started
+            if full:
+                self._full_synced_at = started
+            return self._live()
+
+    def _merge(self, auctions: List[Dict], full: bool):
+        now = clock.now()
+        if full:
+            self._by_id = {}
+            self._ends = []
+            self.full_syncs += 1
+        else:
+            self.delta_syncs += 1
+            self.last_delta_size = len(auctions)
+        self.received += len(auctions)
+        for auction in auctions:
+            auction_id = auction.get("id")
+            if not auction_id:
+                continue
+            self._high_water = max(self._high_water, parse_timestamp(auction.get("updatedAt")))
+            end = parse_timestamp(auction.get("auctionEnd"))
+            if auction.get("status", "Live") != "Live" or end <= now:
+                self._by_id.pop(auction_id, None)
+            else:
+                self._by_id[auction_id] = (end, _trim(auction))
+                heapq.heappush(self._ends, (end, auction_id))
+        self._dirty = True
+        # Each update pushes a heap entry; compact once superseded ones dominate
+        if len(self._ends) > 2 * len(self._by_id) + 64:
+            self._ends = [(end, auction_id) for auction_id, (end, _) in self._by_id.items()]
+            heapq.heapify(self._ends)
+
+    def _live(self) -> List[Dict]:
+        now = clock.now()
+        while self._ends and self._ends[0][0] <= now:
+            end, auction_id = heapq.heappop(self._ends)
+            entry = self._by_id.get(auction_id)
+            if entry is not None and entry[0] == end:
+                del self._by_id[auction_id]
+                self.expired += 1
+                self._dirty = True
+        if self._dirty:
+            self._auctions = [auction for _, auction in self._by_id.values()]
+            self._dirty = False
+        return self._auctions
+
+    def is_live(self, auction_id: str) -> bool:
+        entry = self._by_id.get(auction_id)
+        return entry is not None and entry[0] > clock.now()
+
+    def clear(self):
+        self.synced_at = 0
+        self._by_id = {}
+        self._ends = []
+        self._auctions = []
+        self._dirty = False
+        self._high_water = 0
+        self._full_synced_at = 0
+        self._fetched_at = 0
+        self._failure = None
+        self._failed_until = 0
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        now = clock.now()
+        return {
+            "size": len(self._by_id),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": round(self.hits / lookups, 4) if lookups else None,
+            "refreshFailures": self.refresh_failures,
+            "failureHits": self.failure_hits,
+            "fullSyncs": self.full_syncs,
+            "deltaSyncs": self.delta_syncs,
+            "lastDeltaSize": self.last_delta_size,
+            "auctionsReceived": self.received,
+            "expired": self.expired,
+            "highWaterMark": format_timestamp(self._high_water) if self._high_water else None,
+            "ageSec": round(now - self._fetched_at, 3) if self._fetched_at else None,
+            "fullSyncAgeSec": round(now - self._full_synced_at, 3) if self._full_synced_at else None,
+            "ttlSec": self.settings.auction_cache_ttl_sec,
+            # Worst case age of bids and statuses handed to a bot: one TTL plus the fetch that
+            # refreshed it (AuctionService bumps updatedAt on those, so every delta carries them)
+            "stalenessBoundSec": round(self.settings.auction_cache_ttl_sec + self._fetch_duration, 3),
+            # Deletions leave no updatedAt behind and show up only at the next full sync
+            "deletionStalenessBoundSec": round(self.settings.auction_full_sync_sec + self._fetch_duration, 3),
+        }
@@ -0,0 +1,423 @@
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import random
+import socket
+import subprocess
+import time
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from action_limiter import ActionLimiter
+from auction_cache import AuctionSnapshotCache
+from bid_pipeline import BidPipeline
+from bot import AuctionBot, BotContext
+from bot_manager import BotManager
+from circuit_breaker import CircuitBreakers
+from config import Settings
+from histogram import LatencyHistogram
+from http_client import build_client
+from metrics import BotMetrics
+from rate_control import AdaptiveRateController
+from scheduler import ACTIONS, BotScheduler
+from token_manager import TokenManager
+
+FLEET_SIZES = (10, 1000, 10000)
+MEMORY_SIZES = (10000,)
+ADMIN_ENDPOINTS = ("/health", "/admin/bots/status", "/admin/bots/config", "/admin/bots/activity?limit=200", "/metrics")
+
+
+def _serve_stub(port: int, seed: int):
+    import uvicorn
+
+    from sim_gateway import SimGateway, asgi_app
+
+    app = asgi_app(SimGateway(random.Random(seed)))
+    # Keep-alive outlives the client's http_keepalive_expiry so idle connections are never raced
+    uvicorn.run(
+        app,
+        host="127.0.0.1",
+        port=port,
+        log_level="warning",
+        lifespan="off",
+        access_log=False,
+        timeout_keep_alive=60,
+    )
+
+
+def start_stub(seed: int) -> Tuple[multiprocessing.Process, str]:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    process = multiprocessing.get_context("spawn").Process(target=_serve_stub, args=(port, seed), daemon=True)
+    process.start()
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return process, f"http://127.0.0.1:{port}/"
+        except OSError:
+            time.sleep(0.05)
+    process.terminate()
+    raise RuntimeError("Stub gateway did not start")
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+# Measures how late the loop wakes a task that asked to sleep a fixed interval
+class LoopLagSampler:
+    def __init__(self, interval_sec: float = 0.05):
+        self.interval_sec = interval_sec
+        self.histogram = LatencyHistogram()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval_sec
+            await asyncio.sleep(self.interval_sec)
+            self.histogram.record(max(0.0, loop.time() - expected))
+
+    async def stop(self) -> Dict:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        return self.histogram.summary()
+
+
+def _settings(base_url: str, size: int, args) -> Settings:
+    return Settings(
+        api_base=base_url,
+        identity_url=base_url,
+        bot_users=",".join(f"bench{i:05d}" for i in range(size)),
+        bid_rate_per_min=args.bid_rate,
+        create_rate_per_min=args.create_rate,
+        seed=args.seed,
+        token_cache_path="",
+        state_db_path="",
+        # Measure raw capacity: adaptive thinning would hide loop saturation
+        rate_control_enabled=False,
+        http_max_connections=args.max_connections,
+    )
+
+
+async def _tick_phase(settings: Settings, tokens: TokenManager, size: int, rounds: int, concurrency: int) -> Dict:
+    client, transport = build_client(settings)
+    metrics = BotMetrics()
+    shared = {
+        "tokens": tokens,
+        "auctions": AuctionSnapshotCache(settings),
+        "metrics": metrics,
+        "rate": AdaptiveRateController(settings),
+        "bids": BidPipeline(settings),
+        "limiter": ActionLimiter(settings, metrics=metrics),
+        "breakers": CircuitBreakers(settings, metrics=metrics),
+    }
+    gc.collect()
+    rss_before = rss_bytes()
+    started = time.perf_counter()
+    context = BotContext(settings, client, **shared)
+    bots = [AuctionBot(u, context) for u in settings.bot_users.split(",")]
+    construct_sec = time.perf_counter() - started
+    gc.collect()
+    rss_bots = rss_bytes() - rss_before
+
+    # Bounded so the numbers describe the bots: gathering 10k ticks at once mostly
+    # measures httpcore rescanning its queue of waiting requests on every event
+    slots = asyncio.Semaphore(concurrency)
+
+    async def bounded(call):
+        async with slots:
+            return await call()
+
+    started = time.perf_counter()
+    logins = await asyncio.gather(*(bounded(b.ensure_token) for b in bots), return_exceptions=True)
+    login_sec = time.perf_counter() - started
+
+    lag = LoopLagSampler()
+    lag.start()
+    requests_before = transport.requests
+    cpu_before = time.process_time()
+    started = time.perf_counter()
+    for _ in range(rounds):
+        await asyncio.gather(*(bounded(b.tick) for b in bots), return_exceptions=True)
+    wall = time.perf_counter() - started
+    cpu = time.process_time() - cpu_before
+    requests = transport.requests - requests_before
+    await shared["bids"].stop()
+    await client.aclose()
+    ticks = size * rounds
+    return {
+        "constructSec": round(construct_sec, 4),
+        "rssPerThousandBotsMiB": round(rss_bots / size * 1000 / 2**20, 3),
+        "loginSec": round(login_sec, 3),
+        "loginFailures": sum(isinstance(r, Exception) for r in logins),
+        "ticks": ticks,
+        "ticksPerSec": round(ticks / wall, 1),
+        "cpuUsPerTick": round(cpu / ticks * 1e6, 1),
+        "requests": requests,
+        "requestsPerSec": round(requests / wall, 1),
+        "loopLag": await lag.stop(),
+    }
+
+
+async def _admin_latency(manager: BotManager, samples: int) -> Dict:
+    import admin_api
+
+    admin_api.manager = manager
+    transport = httpx.ASGITransport(app=admin_api.app)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://admin") as client:
+        for path in ADMIN_ENDPOINTS:
+            histogram = LatencyHistogram()
+            for _ in range(samples):
+                started = time.perf_counter()
+                resp = await client.get(path)
+                histogram.record(time.perf_counter() - started)
+                resp.raise_for_status()
+            summary = histogram.summary()
+            results[path] = {k: summary[k] for k in ("p50Ms", "p95Ms", "maxMs")}
+    return results
+
+
+async def _scheduled_phase(settings: Settings, tokens: TokenManager, duration_sec: float, admin_samples: int) -> Dict:
+    gc.collect()
+    rss_before = rss_bytes()
+    manager = BotManager(settings)
+    # Reuse the tick phase's logins so this phase measures steady state, not a login storm
+    tokens.metrics = manager.metrics
+    tokens.breakers = manager.breakers
+    manager.tokens = tokens
+    await manager.start()
+    lag = LoopLagSampler()
+    lag.start()
+    cpu_before = time.process_time()
+    started = time.perf_counter()
+    # Let the schedule ramp up before sampling the admin API under load
+    await asyncio.sleep(duration_sec / 2)
+    admin = await _admin_latency(manager, admin_samples)
+    await asyncio.sleep(max(0.0, duration_sec - (time.perf_counter() - started)))
+    wall = time.perf_counter() - started
+    cpu = time.process_time() - cpu_before
+    actions = manager.scheduler.actions_run
+    requests = manager.transport.requests
+    rss_after = rss_bytes()
+    await manager.stop()
+    return {
+        "durationSec": round(wall, 3),
+        "actionsPerSec": round(actions / wall, 1),
+        "requestsPerSec": round(requests / wall, 1),
+        "cpuUtilization": round(cpu / wall, 3),
+        "rssMiB": round(rss_after / 2**20, 1),
+        "rssGrowthMiB": round((rss_after - rss_before) / 2**20, 2),
+        "loopLag": await lag.stop(),
+        "adminLatency": admin,
+    }
+
+
+async def bench_fleet(base_url: str, size: int, args) -> Dict:
+    settings = _settings(base_url, size, args)
+    tokens = TokenManager(settings)
+    return {
+        "bots": size,
+        "tick": await _tick_phase(settings, tokens, size, args.rounds, args.concurrency),
+        "scheduled": await _scheduled_phase(settings, tokens, args.duration, args.admin_samples),
+    }
+
+
+# Resident memory of a fleet: idle (bots plus their scheduler entries), then warmed
+# up. Usernames are built before the baseline, so this is what a bot itself costs.
+async def bench_memory(base_url: str, size: int, args) -> Dict:
+    settings = _settings(base_url, size, args)
+    users = settings.bot_users.split(",")
+    client, _ = build_client(settings)
+    metrics = BotMetrics()
+    bids = BidPipeline(settings)
+    context = BotContext(
+        settings,
+        client,
+        tokens=TokenManager(settings),
+        auctions=AuctionSnapshotCache(settings),
+        metrics=metrics,
+        rate=AdaptiveRateController(settings),
+        bids=bids,
+        limiter=ActionLimiter(settings, metrics=metrics),
+        breakers=CircuitBreakers(settings, metrics=metrics),
+    )
+    scheduler = BotScheduler(settings)
+    gc.collect()
+    rss_before = rss_bytes()
+    started = time.perf_counter()
+    bots = [AuctionBot(u, context) for u in users]
+    construct_sec = time.perf_counter() - started
+    started = time.perf_counter()
+    for bot in bots:
+        scheduler.add(bot)
+    schedule_sec = time.perf_counter() - started
+    gc.collect()
+    rss_idle = rss_bytes() - rss_before
+
+    # Warm the fleet: every bot logs in and runs each action once, leaving behind
+    # what a running bot keeps (token, profile, auctions, limiter and cache entries)
+    slots = asyncio.Semaphore(args.concurrency)
+
+    async def warm(bot: AuctionBot):
+        async with slots:
+            await bot.ensure_token()
+            for action in ACTIONS:
+                await bot.run_action(action)
+
+    started = time.perf_counter()
+    warmed = await asyncio.gather(*(warm(b) for b in bots), return_exceptions=True)
+    warm_sec = time.perf_counter() - started
+    # Bids still in the coalescing window are fleet-wide transients, not per-bot state
+    await bids.stop()
+    gc.collect()
+    rss_warm = rss_bytes() - rss_before
+    await client.aclose()
+    return {
+        "bots": size,
+        "constructSec": round(construct_sec, 3),
+        "scheduleSec": round(schedule_sec, 3),
+        "scheduledActions": scheduler.stats()["scheduled"],
+        "rssMiB": round(rss_idle / 2**20, 1),
+        "rssPerBotBytes": round(rss_idle / size),
+        "warmSec": round(warm_sec, 3),
+        "warmFailures": sum(isinstance(r, Exception) for r in warmed),
+        "warmRssMiB": round(rss_warm / 2**20, 1),
+        "warmRssPerBotBytes": round(rss_warm / size),
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+# Headline numbers compared between runs, as paths into each fleet's results
+COMPARED = (
+    ("tick", "ticksPerSec"),
+    ("tick", "cpuUsPerTick"),
+    ("tick", "rssPerThousandBotsMiB"),
+    ("scheduled", "requestsPerSec"),
+    ("scheduled", "cpuUtilization"),
+    ("scheduled", "loopLag", "p99Ms"),
+    ("scheduled", "adminLatency", "/admin/bots/status", "p95Ms"),
+)
+
+
+def _lookup(results: Dict, path) -> Optional[float]:
+    for key in path:
+        if not isinstance(results, dict) or key not in results:
+            return None
+        results = results[key]
+    return results
+
+
+def _compare(current: Dict, baseline: Dict) -> List[str]:
+    lines = []
+    before_memory = {m["bots"]: m for m in baseline.get("memory", [])}
+    for memory in current.get("memory", []):
+        old = before_memory.get(memory["bots"])
+        for key in ("rssPerBotBytes", "warmRssPerBotBytes"):
+            if old and old.get(key) and memory.get(key):
+                change = f"{(memory[key] / old[key] - 1) * 100:+.1f}%"
+                lines.append(
+                    f"{memory['bots']:>6} bots  {'memory.' + key:<50} {old[key]:>12} -> {memory[key]:<12} {change}"
+                )
+    before = {f["bots"]: f for f in baseline.get("fleets", [])}
+    for fleet in current["fleets"]:
+        old = before.get(fleet["bots"])
+        if not old:
+            continue
+        for path in COMPARED:
+            new_value, old_value = _lookup(fleet, path), _lookup(old, path)
+            if new_value is None or old_value is None:
+                continue
+            change = f"{(new_value / old_value - 1) * 100:+.1f}%" if old_value else "n/a"
+            lines.append(f"{fleet['bots']:>6} bots  {'.'.join(path):<50} {old_value:>12} -> {new_value:<12} {change}")
+    return lines
+
+
+async def run(args) -> Dict:
+    process, base_url = start_stub(args.seed)
+    try:
+        # Measured first, while the process has not yet grown to fit the traffic phases
+        memory = [await bench_memory(base_url, size, args) for size in args.memory_sizes]
+        fleets = [await bench_fleet(base_url, size, args) for size in args.sizes]
+    finally:
+        process.terminate()
+        process.join(5)
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "bidRatePerMin": args.bid_rate,
+            "createRatePerMin": args.create_rate,
+            "tickRounds": args.rounds,
+            "tickConcurrency": args.concurrency,
+            "scheduledDurationSec": args.duration,
+        },
+        "memory": memory,
+        "fleets": fleets,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the bot fleet against a local stub gateway.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(FLEET_SIZES))
+    parser.add_argument("--memory-sizes", type=int, nargs="*", default=list(MEMORY_SIZES), help="fleets to size, idle and warmed up")
+    parser.add_argument("--rounds", type=int, default=5, help="tick() rounds over the whole fleet")
+    parser.add_argument("--concurrency", type=int, default=200, help="ticks and logins in flight at once")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run the scheduled fleet")
+    parser.add_argument("--admin-samples", type=int, default=20, help="requests per admin endpoint")
+    parser.add_argument("--bid-rate", type=float, default=2.0)
+    parser.add_argument("--create-rate", type=float, default=0.5)
+    parser.add_argument("--max-connections", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="results file (default: bench-results/<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    # One log line per request would make the benchmark measure the terminal
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    results = asyncio.run(run(args))
+    output = args.output or os.path.join("bench-results", time.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+        f.write("\n")
+    print(json.dumps(results, indent=2))
+    print(f"Results written to {output}")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            for line in _compare(results, json.load(f)):
+                print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import asyncio
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+
+from config import Settings
+
+if TYPE_CHECKING:
+    from bot import AuctionBot
+
+
+# Fleet-wide bid queue. Bids for the same auction arriving within the coalescing
+# window collapse into the single highest one, which is then submitted under a
+# bounded number of concurrent requests; the rest would only have been outbid.
+class BidPipeline:
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self._pending: Dict[str, List[Tuple["AuctionBot", int]]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.submitted = 0
+        self.coalesced = 0
+        self.sent = 0
+
+    def submit(self, bot: "AuctionBot", auction_id: str, amount: int):
+        self.submitted += 1
+        pending = self._pending.get(auction_id)
+        if pending is not None:
+            pending.append((bot, amount))
+            return
+        self._pending[auction_id] = [(bot, amount)]
+        loop = asyncio.get_running_loop()
+        self._timers[auction_id] = loop.call_later(
+            self.settings.bid_coalesce_window_ms / 1000, self._flush, auction_id
+        )
+
+    def _flush(self, auction_id: str):
+        self._timers.pop(auction_id, None)
+        intents = self._pending.pop(auction_id, None)
+        if not intents:
+            return
+        bot, amount = max(intents, key=lambda intent: intent[1])
+        self.coalesced += len(intents) - 1
+        task = asyncio.create_task(self._send(bot, auction_id, amount))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    # The bid action returned once its intent was queued, so the POST itself goes
+    # through the action limiter here: the bot's and fleet's slots and the bid deadline
+    async def _send(self, bot: "AuctionBot", auction_id: str, amount: int):
+        limiter = bot.context.limiter
+        try:
+            if limiter:
+                await limiter.run(bot, "bid", lambda: self._submit(bot, auction_id, amount))
+            else:
+                await self._submit(bot, auction_id, amount)
+        except Exception as exc:
+            bot.stats.failures += 1
+            bot.stats.last_error = str(exc)
+
+    async def _submit(self, bot: "AuctionBot", auction_id: str, amount: int):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.settings.bid_max_concurrency)
+        async with self._slots:
+            self.sent += 1
+            await bot.submit_bid(auction_id, amount)
+
+    async def stop(self):
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        self._pending.clear()
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> Dict:
+        return {
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "sent": self.sent,
+            "pendingAuctions": len(self._pending),
+            "inFlight": len(self._tasks),
+        }
@@ -1,74 +1,45 @@
 import asyncio
-import random
+import heapq
 import time
 from dataclasses import dataclass
-from typing import Callable, Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote
 
 import httpx
-from tenacity import retry, stop_after_attempt, wait_fixed
+from tenacity import retry, retry_if_not_exception_type, stop_after_attempt, wait_fixed
 
+import clock
+from action_limiter import ActionLimiter
+from auction_cache import AuctionSnapshotCache, parse_timestamp
+from bid_pipeline import BidPipeline
+from circuit_breaker import CircuitBreakers, CircuitOpenError
+from bot_random import BotRandom
+from bot_state import BotStateStore
 from config import Settings
+from http_client import build_client
+from item_catalog import ItemCatalog, load_catalog
+from metrics import BotMetrics
+from profile_cache import ProfileCache
+from rate_control import AdaptiveRateController
+from scheduler import ACTIONS, BotScheduler
+from token_manager import TokenManager
 
-ITEM_CATALOG = [
-    {
-        "title": "Veyla the Shadow Lich",
-        "brand": "Necromancer",
-        "category": "Legendary",
-        "variant": "INT 95 | STR 42 | VIT 68 | AGI 54",
-        "condition": "Hero",
-        "colorway": "Arcane",
-        "releaseYear": 2025,
-        "specs": "Master of shadow flames and soul drain.",
-        "imageUrl": "/pets/craftpix-net-935193-free-chibi-necromancer-of-the-shadow-character-sprites/necromancer_of_the_shadow_1/card/frame_0.png",
-    },
-    {
-        "title": "Elyra Nocturne",
-        "brand": "Oracle",
-        "category": "Epic",
-        "variant": "INT 88 | STR 34 | VIT 60 | AGI 58",
-        "condition": "Hero",
-        "colorway": "Umbral",
-        "releaseYear": 2025,
-        "specs": "Seer of eclipses, whispers prophecies.",
-        "imageUrl": "/pets/craftpix-net-919731-free-chibi-dark-oracle-character-sprites/dark_oracle_1/card/frame_0.png",
-    },
-    {
-        "title": "Morr Wispblade",
-        "brand": "Reaper",
-        "category": "Rare",
-        "variant": "STR 68 | INT 64 | VIT 58 | AGI 72",
-        "condition": "Hero",
-        "colorway": "Wraith",
-        "releaseYear": 2025,
-        "specs": "Edge of dusk; silent executioner.",
-        "imageUrl": "/pets/craftpix-904589-free-reaper-man-chibi-2d-game-sprites/reaper_man_1/card/frame_1.png",
-    },
-    {
-        "title": "Sigrun Dawnbreak",
-        "brand": "Valkyrie",
-        "category": "Legendary",
-        "variant": "STR 90 | VIT 82 | AGI 70 | INT 48",
-        "condition": "Hero",
-        "colorway": "Sunsteel",
-        "releaseYear": 2025,
-        "specs": "Skyrider who guards fallen champions.",
-        "imageUrl": "/pets/craftpix-net-469596-free-chibi-valkyrie-character-sprites/valkyrie_1/card/frame_3.png",
-    },
-    {
-        "title": "Dresh Wildarrow",
-        "brand": "Ranger",
-        "category": "Common",
-        "variant": "STR 58 | AGI 68 | VIT 52 | INT 24",
-        "condition": "Hero",
-        "colorway": "Verdant",
-        "releaseYear": 2025,
-        "specs": "Quickdraw hunter of the wild clans.",
-        "imageUrl": "/pets/craftpix-064112-free-orc-ogre-and-goblin-chibi-2d-game-sprites/orc/card/frame_0.png",
-    },
-]
-
-
-@dataclass
+# create_auction sends pre-serialized bodies, so it sets the content type itself
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Per-bot bid counters are trimmed to live auctions once they grow past this
+BID_COUNTS_PRUNE_AT = 256
+# Random probes for a biddable auction before falling back to a full scan
+BID_SAMPLE_ATTEMPTS = 32
+
+
+def _count_retry(retry_state):
+    bot = retry_state.args[0]
+    if bot.context.metrics:
+        bot.context.metrics.retry(retry_state.fn.__name__)
+
+
+@dataclass(slots=True)
 class BotStats:
     bids_placed: int = 0
     auctions_created: int = 0
@@ -77,115 +48,231 @@ class BotStats:
     last_error: Optional[str] = None
 
 
-class AuctionBot:
+# Everything a fleet's bots share: settings, the HTTP client, credentials and
+# the fleet-wide caches and controllers. Bots hold one reference to it rather
+# than a dozen, and swapping the client or catalog is a single assignment.
+class BotContext:
+    __slots__ = (
+        "settings",
+        "client",
+        "password",
+        "log_fn",
+        "tokens",
+        "auctions",
+        "metrics",
+        "rate",
+        "bids",
+        "catalog",
+        "limiter",
+        "breakers",
+    )
+
     def __init__(
         self,
-        username: str,
-        password: str,
         settings: Settings,
         client: httpx.AsyncClient,
+        password: Optional[str] = None,
         log_fn: Optional[Callable[[str, str, Dict], None]] = None,
+        tokens: Optional[TokenManager] = None,
+        auctions: Optional[AuctionSnapshotCache] = None,
+        metrics: Optional[BotMetrics] = None,
+        rate: Optional[AdaptiveRateController] = None,
+        bids: Optional[BidPipeline] = None,
+        catalog: Optional[ItemCatalog] = None,
+        limiter: Optional[ActionLimiter] = None,
+        breakers: Optional[CircuitBreakers] = None,
     ):
-        self.username = username
-        self.password = password
         self.settings = settings
         self.client = client
+        self.password = settings.bot_password if password is None else password
         self.log_fn = log_fn
+        self.tokens = tokens or TokenManager(settings, cache_path="")
+        self.auctions = auctions
+        self.metrics = metrics
+        self.rate = rate
+        self.bids = bids
+        self.catalog = catalog or load_catalog(settings)
+        self.limiter = limiter
+        self.breakers = breakers
+
+
+# One simulated user. Slotted, with everything fleet-wide behind self.context
+# and per-auction bookkeeping created on first use, so a bot stays under 1 KB.
+class AuctionBot:
+    __slots__ = (
+        "username",
+        "context",
+        "retired",
+        "rng",
+        "token",
+        "stats",
+        "profile",
+        "last_daily",
+        "last_mystery",
+        "active_auctions",
+        "bid_counts",
+        "ticks",
+        "tick_total_sec",
+        "tick_max_sec",
+    )
+
+    def __init__(self, username: str, context: BotContext):
+        self.username = username
+        self.context = context
+        self.retired = False
+        seed = context.settings.seed
+        # Per-bot stream so a seeded run replays the same choices whatever the interleaving
+        self.rng = BotRandom(f"{seed}:{username}" if seed is not None else None)
         self.token: Optional[str] = None
-        self.token_expires_at: float = 0
         self.stats = BotStats()
+        self.profile = ProfileCache(context.settings)
         self.last_daily: float = 0
         self.last_mystery: float = 0
-        self.active_auctions: List[str] = []
+        # Own live auctions as a min-heap of [auctionEnd, id, created at], bounded by max_active_auctions_per_bot
+        self.active_auctions: List[list] = []
+        # Bids placed per auction, created on the first bid
+        self.bid_counts: Optional[Dict[str, int]] = None
+        # Scheduled action ("tick") durations, for spotting bots stuck on slow calls
+        self.ticks = 0
+        self.tick_total_sec = 0.0
+        self.tick_max_sec = 0.0
+
+    # Orders bots with equal due times in the scheduler's heap
+    def __lt__(self, other: "AuctionBot") -> bool:
+        return self.username < other.username
+
+    def record_tick(self, seconds: float):
+        self.ticks += 1
+        self.tick_total_sec += seconds
+        if seconds > self.tick_max_sec:
+            self.tick_max_sec = seconds
 
     async def login(self):
-        token_url = (self.settings.identity_url or self.settings.api_base).rstrip("/") + "/connect/token"
-        data = {
-            "grant_type": "password",
-            "client_id": "pybot",
-            "client_secret": "NotASecret",
-            "username": self.username,
-            "password": self.password,
-            "scope": "openid profile auctionApp",
-        }
-        resp = await self.client.post(token_url, data=data)
-        resp.raise_for_status()
-        payload = resp.json()
-        self.token = payload.get("access_token")
-        expires_in = payload.get("expires_in", 3600)
-        self.token_expires_at = time.time() + expires_in - 60  # refresh 1 minute early
+        context = self.context
+        self.token = await context.tokens.refresh(context.client, self.username, context.password, self.token)
 
     def auth_headers(self) -> Dict[str, str]:
         return {"Authorization": f"Bearer {self.token}"} if self.token else {}
 
     async def ensure_token(self):
-        if not self.token or time.time() > self.token_expires_at:
-            await self.login()
+        context = self.context
+        self.token = await context.tokens.get(context.client, self.username, context.password)
 
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
-    async def fetch_profile(self) -> Optional[Dict]:
+    async def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
         await self.ensure_token()
-        resp = await self.client.get(self.settings.api_base + "progress/me", headers=self.auth_headers())
+        url = self.context.settings.api_base + path
+        endpoint = path.split("?", 1)[0]
+        resp = await self._send(method, url, endpoint, **kwargs)
         if resp.status_code == 401:
             await self.login()
-            resp = await self.client.get(self.settings.api_base + "progress/me", headers=self.auth_headers())
+            resp = await self._send(method, url, endpoint, **kwargs)
+        return resp
+
+    async def _send(self, method: str, url: str, endpoint: str, **kwargs) -> httpx.Response:
+        context = self.context
+        metrics, rate = context.metrics, context.rate
+        headers = self.auth_headers()
+        if "headers" in kwargs:
+            headers.update(kwargs.pop("headers"))
+        breaker = context.breakers.for_endpoint(endpoint) if context.breakers else None
+        if not breaker and not metrics and not rate:
+            return await context.client.request(method, url, headers=headers, **kwargs)
+        probe = breaker.allow() if breaker else False
+        started = time.perf_counter()
+        try:
+            resp = await context.client.request(method, url, headers=headers, **kwargs)
+        except Exception as exc:
+            elapsed = time.perf_counter() - started
+            if breaker:
+                breaker.observe("error", probe, f"{type(exc).__name__}: {exc}")
+            if metrics:
+                metrics.observe(endpoint, "error", elapsed)
+            if rate:
+                rate.observe("error", elapsed)
+            raise
+        except BaseException:
+            if breaker:
+                breaker.observe("cancelled", probe)
+            raise
+        elapsed = time.perf_counter() - started
+        if breaker:
+            breaker.observe(resp.status_code, probe, f"HTTP {resp.status_code}")
+        if metrics:
+            metrics.observe(endpoint, resp.status_code, elapsed)
+        if rate:
+            rate.observe(resp.status_code, elapsed, resp.headers.get("retry-after"))
+        return resp
+
+    # An open circuit already says the next attempts would fail
+    @retry(
+        retry=retry_if_not_exception_type(CircuitOpenError),
+        stop=stop_after_attempt(3),
+        wait=wait_fixed(1),
+        before_sleep=_count_retry,
+    )
+    async def fetch_profile(self) -> Optional[Dict]:
+        resp = await self._request("GET", "progress/me")
         resp.raise_for_status()
-        return resp.json()
+        profile = resp.json()
+        self.profile.refreshes += 1
+        self.profile.update(profile)
+        return profile
 
     async def top_up_if_needed(self):
-        if not self.settings.auto_topup:
+        settings = self.context.settings
+        if not settings.auto_topup:
             return
-        profile = await self.fetch_profile()
-        if not profile:
-            return
-        balance = profile.get("flogBalance", 0)
-        if balance < self.settings.min_balance:
-            delta = self.settings.min_balance - balance
+        cache = self.profile
+        # A locally estimated low balance may just be holds the server has since released
+        if cache.needs_refresh() or (cache.estimated and cache.balance < settings.min_balance):
+            if not await self.fetch_profile():
+                return
+        else:
+            cache.hits += 1
+        balance = cache.balance or 0
+        if balance < settings.min_balance:
+            delta = settings.min_balance - balance
             await self.award("admin-topup", delta)
-            if self.log_fn:
-                self.log_fn(self.username, "topup", {"delta": delta})
+            if self.context.log_fn:
+                self.context.log_fn(self.username, "topup", {"delta": delta})
 
     async def award(self, action: str, amount: Optional[int] = None):
         payload = {"action": action}
         if amount:
             payload["amount"] = amount
-        resp = await self.client.post(
-            self.settings.api_base + "progress/award", json=payload, headers=self.auth_headers()
-        )
-        if resp.status_code == 401:
-            await self.login()
-            resp = await self.client.post(
-                self.settings.api_base + "progress/award", json=payload, headers=self.auth_headers()
-            )
+        resp = await self._request("POST", "progress/award", json=payload)
         if resp.is_success:
-            return resp.json()
+            profile = resp.json()
+            self.profile.update(profile)
+            return profile
         else:
             self.stats.failures += 1
             self.stats.last_error = resp.text
             return None
 
     async def open_mystery(self):
-        now = time.time()
-        if now - self.last_mystery < self.settings.mystery_interval_min * 60:
+        now = clock.now()
+        if now - self.last_mystery < self.context.settings.mystery_interval_min * 60:
             return
-        resp = await self.client.post(
-            self.settings.api_base + "progress/mystery", json={}, headers=self.auth_headers()
-        )
-        if resp.status_code == 401:
-            await self.login()
-            resp = await self.client.post(
-                self.settings.api_base + "progress/mystery", json={}, headers=self.auth_headers()
-            )
+        resp = await self._request("POST", "progress/mystery", json={})
         if resp.is_success:
             self.last_mystery = now
             self.stats.mysteries_opened += 1
-            if self.log_fn:
-                self.log_fn(self.username, "mystery", {})
+            result = resp.json()
+            if isinstance(result, dict):
+                self.profile.update(result.get("profile"))
+            if self.context.log_fn:
+                self.context.log_fn(self.username, "mystery", {})
 
     async def list_live_auctions(self) -> List[Dict]:
-        resp = await self.client.get(
-            self.settings.api_base + "auctions?filter=live&pageSize=10", headers=self.auth_headers()
-        )
+        auctions = self.context.auctions
+        if auctions:
+            return await auctions.get(self._fetch_live_auctions)
+        return await self._fetch_live_auctions()
+
+    async def _fetch_live_auctions(self, since: Optional[str] = None) -> List[Dict]:
+        # GET /api/auctions?date= returns only auctions updated after that instant
+        resp = await self._request("GET", f"auctions?date={quote(since)}" if since else "auctions")
         resp.raise_for_status()
         data = resp.json()
         # API returns list directly or {results: [...]} depending on endpoint
@@ -193,96 +280,173 @@ class AuctionBot:
             return data
         return data.get("results", [])
 
+    # (title, auctionEnd, JSON body) for a new auction
+    def auction_payload(self) -> Tuple[str, float, bytes]:
+        catalog = self.context.catalog
+        index = catalog.sample(self.rng)
+        end = float(int(clock.now() + 3600 * 24))  # 24h from now, whole seconds as sent
+        return catalog.titles[index], end, catalog.payload(index, self.rng.randint(300, 1500), end)
+
+    async def prune_active_auctions(self):
+        heap = self.active_auctions
+        auctions = self.context.auctions
+        now = clock.now()
+        while heap and heap[0][0] <= now:
+            heapq.heappop(heap)
+        if not auctions or len(heap) < self.context.settings.max_active_auctions_per_bot:
+            return
+        # At the cap: reconcile against the fleet snapshot to drop auctions deleted or finished early.
+        # Only auctions created before the snapshot's refresh started can be judged by their absence.
+        await self.list_live_auctions()
+        synced_at = auctions.synced_at
+        kept = [e for e in heap if e[2] >= synced_at or auctions.is_live(e[1])]
+        if len(kept) != len(heap):
+            heapq.heapify(kept)
+            self.active_auctions = kept
+
     async def create_auction(self):
-        if len(self.active_auctions) >= self.settings.max_active_auctions_per_bot:
+        await self.prune_active_auctions()
+        if len(self.active_auctions) >= self.context.settings.max_active_auctions_per_bot:
             return
-        item = random.choice(ITEM_CATALOG)
-        end_date = time.time() + 3600 * 24  # 24h from now
-        payload = {
-            **item,
-            "reservePrice": random.randint(300, 1500),
-            "auctionEnd": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(end_date)),
-        }
-        resp = await self.client.post(
-            self.settings.api_base + "auctions", json=payload, headers=self.auth_headers()
-        )
-        if resp.status_code == 401:
-            await self.login()
-            resp = await self.client.post(
-                self.settings.api_base + "auctions", json=payload, headers=self.auth_headers()
-            )
+        title, end, body = self.auction_payload()
+        resp = await self._request("POST", "auctions", content=body, headers=JSON_HEADERS)
         if resp.is_success:
             auction = resp.json()
             if isinstance(auction, dict) and auction.get("id"):
-                self.active_auctions.append(auction["id"])
+                if auction.get("auctionEnd"):
+                    end = parse_timestamp(auction["auctionEnd"])
+                heapq.heappush(self.active_auctions, [end, auction["id"], clock.now()])
                 self.stats.auctions_created += 1
-                if self.log_fn:
-                    self.log_fn(
+                if self.context.log_fn:
+                    self.context.log_fn(
                         self.username,
                         "create-auction",
-                        {"id": auction["id"], "title": item["title"]},
+                        {"id": auction["id"], "title": title},
                     )
 
+    def can_bid_on(self, auction_id: str) -> bool:
+        counts = self.bid_counts
+        return not counts or counts.get(auction_id, 0) < self.context.settings.max_bids_per_auction
+
     async def place_bid(self, auction: Dict):
         auction_id = auction.get("id")
         current = auction.get("currentHighBid", 0)
-        next_bid = current + random.randint(5, 25)
+        next_bid = current + self.rng.randint(5, 25)
+        bids = self.context.bids
+        if bids:
+            bids.submit(self, auction_id, next_bid)
+        else:
+            await self.submit_bid(auction_id, next_bid)
+
+    async def submit_bid(self, auction_id: str, amount: int):
         # API expects query params: POST /api/bids?auctionId={id}&amount={amount}
-        url = f"{self.settings.api_base}bids?auctionId={auction_id}&amount={next_bid}"
-        resp = await self.client.post(url, headers=self.auth_headers())
-        if resp.status_code == 401:
-            await self.login()
-            resp = await self.client.post(url, headers=self.auth_headers())
+        resp = await self._request("POST", f"bids?auctionId={auction_id}&amount={amount}")
         if resp.is_success:
+            counts = self.bid_counts
+            if counts is None:
+                counts = self.bid_counts = {}
+            counts[auction_id] = counts.get(auction_id, 0) + 1
+            self.profile.bid_placed(auction_id, amount)
             self.stats.bids_placed += 1
-            if self.log_fn:
-                self.log_fn(self.username, "bid", {"auctionId": auction_id, "amount": next_bid})
+            if self.context.log_fn:
+                self.context.log_fn(self.username, "bid", {"auctionId": auction_id, "amount": amount})
         else:
             self.stats.failures += 1
             self.stats.last_error = resp.text
 
+    async def claim_daily(self):
+        if clock.now() - self.last_daily > self.context.settings.daily_interval_hours * 3600:
+            await self.award("daily-login")
+            self.last_daily = clock.now()
+
+    async def bid_once(self):
+        auctions = await self.list_live_auctions()
+        if self.bid_counts and len(self.bid_counts) > BID_COUNTS_PRUNE_AT:
+            live = {a.get("id") for a in auctions}
+            self.bid_counts = {k: v for k, v in self.bid_counts.items() if k in live}
+            self.profile.prune(live)
+        # Place only 1 bid per trigger, on a uniformly random hero auction we may bid on.
+        # Rejection sampling keeps that O(1) on a large snapshot; the scan covers sparse cases.
+        if not auctions:
+            return
+        for _ in range(BID_SAMPLE_ATTEMPTS):
+            a = self.rng.choice(auctions)
+            if self._biddable(a):
+                await self.place_bid(a)
+                return
+        candidates = [a for a in auctions if self._biddable(a)]
+        if candidates:
+            await self.place_bid(self.rng.choice(candidates))
+
+    def _biddable(self, auction: Dict) -> bool:
+        return (
+            auction.get("condition") == "Hero"
+            and auction.get("seller") != self.username
+            and self.can_bid_on(auction.get("id"))
+        )
+
+    async def run_action(self, action: str):
+        call = getattr(self, ACTIONS[action])
+        limiter = self.context.limiter
+        if limiter is None:
+            return await call()
+        return await limiter.run(self, action, call)
+
+    # One round of every action that is due, run side by side so a slow
+    # gamification call does not hold up the bid; raises the first failure
     async def tick(self):
         await self.ensure_token()
 
-        await self.top_up_if_needed()
-
-        if time.time() - self.last_daily > self.settings.daily_interval_hours * 3600:
-            await self.award("daily-login")
-            self.last_daily = time.time()
-
-        await self.open_mystery()
-
-        if random.random() < (self.settings.create_rate_per_min / 60):
-            await self.create_auction()
-
-        if random.random() < (self.settings.bid_rate_per_min / 60):
-            auctions = await self.list_live_auctions()
-            # Filter to only hero items (condition == "Hero")
-            hero_auctions = [a for a in auctions if a.get("condition") == "Hero"]
-            random.shuffle(hero_auctions)
-            # Place only 1 bid per trigger
-            for a in hero_auctions:
-                if a.get("seller") == self.username:
-                    continue
-                await self.place_bid(a)
-                break  # Only bid on one auction per tick
+        settings = self.context.settings
+        actions = ["topup", "daily", "mystery"]
+        if self.rng.random() < (settings.create_rate_per_min / 60):
+            actions.append("create")
+        if self.rng.random() < (settings.bid_rate_per_min / 60):
+            actions.append("bid")
+        results = await asyncio.gather(*(self.run_action(a) for a in actions), return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
 
 
 async def run_bots(settings: Settings):
     users = [u.strip() for u in settings.bot_users.split(",") if u.strip()]
-    async with httpx.AsyncClient(timeout=10) as client:
-        bots = [AuctionBot(u, settings.bot_password, settings, client) for u in users]
-
-        async def loop_bot(bot: AuctionBot):
-            while True:
-                try:
-                    await bot.tick()
-                except Exception as exc:
-                    bot.stats.failures += 1
-                    bot.stats.last_error = str(exc)
-                await asyncio.sleep(1)
-
-        await asyncio.gather(*(loop_bot(bot) for bot in bots))
+    metrics = BotMetrics()
+    rate = AdaptiveRateController(settings)
+    bids = BidPipeline(settings)
+    breakers = CircuitBreakers(settings, metrics=metrics)
+    tokens = TokenManager(settings, metrics=metrics, breakers=breakers)
+    auctions = AuctionSnapshotCache(settings)
+    limiter = ActionLimiter(settings, metrics=metrics)
+    state = BotStateStore(settings)
+    client, _ = build_client(settings)
+    async with client:
+        context = BotContext(
+            settings,
+            client,
+            tokens=tokens,
+            auctions=auctions,
+            metrics=metrics,
+            rate=rate,
+            bids=bids,
+            limiter=limiter,
+            breakers=breakers,
+        )
+        bots = [AuctionBot(u, context) for u in users]
+
+        scheduler = BotScheduler(settings, rate=rate)
+        for bot in bots:
+            state.restore(bot)
+            scheduler.add(bot)
+        checkpoints = asyncio.create_task(state.run(lambda: bots))
+        try:
+            await scheduler.run()
+        finally:
+            checkpoints.cancel()
+            await bids.stop()
+            state.checkpoint(bots)
+            state.close()
+            tokens.save()
 
 
 if __name__ == "__main__":
@@ -1,70 +1,291 @@
 import asyncio
-import time
-from typing import List, Optional
+import heapq
+import logging
+from typing import Callable, List, Optional, Tuple
 
 import httpx
 
+import clock
+from action_limiter import ActionLimiter
+from activity import ActivityLog
 from config import Settings
-from bot import AuctionBot
+from auction_cache import AuctionSnapshotCache
+from bid_pipeline import BidPipeline
+from bot import AuctionBot, BotContext
+from bot_state import BotStateStore
+from circuit_breaker import CircuitBreakers
+from http_client import PooledTransport, build_client
+from item_catalog import load_catalog
+from loadtest import LoadTest
+from loop_monitor import LoopMonitor
+from metrics import BotMetrics
+from rate_control import AdaptiveRateController
+from scheduler import BotScheduler
+from shards import ShardPool, merge_stats
+from token_manager import TokenManager
+
+
+# Settings that need the HTTP client rebuilt, that change scheduled cadence, or
+# that can only be applied by a full restart; everything else is read live.
+CLIENT_KEYS = {
+    "api_base",
+    "identity_url",
+    "http_max_connections",
+    "http_max_keepalive",
+    "http_keepalive_expiry",
+    "http_max_per_host",
+    "http2",
+    "http_connect_timeout",
+    "http_read_timeout",
+    "http_write_timeout",
+    "http_pool_timeout",
+}
+SCHEDULE_KEYS = {
+    "bid_rate_per_min",
+    "create_rate_per_min",
+    "mystery_interval_min",
+    "daily_interval_hours",
+    "topup_interval_sec",
+    "auto_topup",
+}
+RESTART_KEYS = {"shards"}
+CATALOG_KEYS = {"item_catalog_path", "categories", "category_weights"}
+LIMIT_KEYS = {"bot_action_concurrency", "fleet_action_concurrency"}
+# Bots listed by longest tick in GET /admin/loop
+SLOWEST_BOTS = 10
+
+
+def _tick_stats(bot: AuctionBot) -> dict:
+    return {
+        "ticks": bot.ticks,
+        "tickAvgMs": round(bot.tick_total_sec / bot.ticks * 1000, 3) if bot.ticks else None,
+        "tickMaxMs": round(bot.tick_max_sec * 1000, 3),
+    }
 
 
 class BotManager:
     def __init__(self, settings: Optional[Settings] = None):
         self.settings = settings or Settings()
         self.client: Optional[httpx.AsyncClient] = None
+        self.transport: Optional[PooledTransport] = None
         self.bots: List[AuctionBot] = []
+        self.context: Optional[BotContext] = None
         self.tasks: List[asyncio.Task] = []
+        self.scheduler: Optional[BotScheduler] = None
+        self.pool: Optional[ShardPool] = None
+        self.load_test: Optional[LoadTest] = None
         self.running = False
-        self._activity: List[dict] = []
-        self._activity_limit: int = 200
+        self.metrics = BotMetrics()
+        self.rate = AdaptiveRateController(self.settings)
+        self.bids = BidPipeline(self.settings)
+        self.breakers = CircuitBreakers(self.settings, metrics=self.metrics)
+        self.tokens = TokenManager(self.settings, metrics=self.metrics, breakers=self.breakers)
+        self.auctions = AuctionSnapshotCache(self.settings)
+        try:
+            self.catalog = load_catalog(self.settings)
+        except (OSError, ValueError) as exc:
+            # Keep the admin API up so the path can be corrected through POST /admin/bots/config
+            logging.error(
+                "Cannot load item catalog %s (%s); using the built-in items", self.settings.item_catalog_path, exc
+            )
+            self.settings.item_catalog_path = ""
+            self.catalog = load_catalog(self.settings)
+        self.limiter = ActionLimiter(self.settings, metrics=self.metrics)
+        self.state = BotStateStore(self.settings)
+        self.activity = ActivityLog(self.settings.activity_capacity, self.settings.activity_scan_limit)
+        self.monitor = LoopMonitor(self.settings, metrics=self.metrics)
+        self.activity_listeners: List[Callable[[dict], None]] = []
 
     def _log_activity(self, bot: str, event: str, data: dict):
-        entry = {"ts": time.time(), "bot": bot, "event": event, "data": data}
-        self._activity.append(entry)
-        if len(self._activity) > self._activity_limit:
-            self._activity = self._activity[-self._activity_limit :]
+        self._record_activity(clock.now(), bot, event, data)
+
+    def _record_activity(self, ts: float, bot: str, event: str, data: dict):
+        self.activity.append(ts, bot, event, data)
+        if self.activity_listeners:
+            entry = {"ts": ts, "bot": bot, "event": event, "data": data}
+            for listener in self.activity_listeners:
+                listener(entry)
 
-    def get_activity(self) -> List[dict]:
-        return list(reversed(self._activity))
+    def get_activity(
+        self,
+        before: Optional[int] = None,
+        limit: int = 200,
+        bot: Optional[str] = None,
+        event: Optional[str] = None,
+    ) -> Tuple[List[dict], Optional[int]]:
+        return self.activity.query(before=before, limit=limit, bot=bot, event=event)
 
     async def start(self):
         if self.running:
             return
         self.running = True
-        self.client = httpx.AsyncClient(timeout=10)
-        users = [u.strip() for u in self.settings.bot_users.split(",") if u.strip()]
-        self.bots = [
-            AuctionBot(u, self.settings.bot_password, self.settings, self.client, log_fn=self._log_activity)
-            for u in users
+        self.monitor.start()
+        users = self._users()
+        if self.settings.shards > 1:
+            self.pool = ShardPool(self.settings, self._record_activity)
+            await self.pool.start(users)
+            return
+        self.client, self.transport = build_client(self.settings)
+        self.context = BotContext(
+            self.settings,
+            self.client,
+            log_fn=self._log_activity,
+            tokens=self.tokens,
+            auctions=self.auctions,
+            metrics=self.metrics,
+            rate=self.rate,
+            bids=self.bids,
+            catalog=self.catalog,
+            limiter=self.limiter,
+            breakers=self.breakers,
+        )
+        self.bots = [self._make_bot(u) for u in users]
+
+        self.scheduler = BotScheduler(self.settings, rate=self.rate)
+        for bot in self.bots:
+            self.scheduler.add(bot)
+        self.tasks = [
+            asyncio.create_task(self.scheduler.run()),
+            asyncio.create_task(self.state.run(lambda: self.bots)),
+            asyncio.create_task(self.tokens.run(lambda: self.bots)),
         ]
 
-        async def loop_bot(bot: AuctionBot):
-            while self.running:
-                try:
-                    await bot.tick()
-                except Exception as exc:
-                    bot.stats.failures += 1
-                    bot.stats.last_error = str(exc)
-                await asyncio.sleep(1)
+    def _users(self) -> List[str]:
+        return [u.strip() for u in self.settings.bot_users.split(",") if u.strip()]
 
-        self.tasks = [asyncio.create_task(loop_bot(b)) for b in self.bots]
+    def _make_bot(self, username: str) -> AuctionBot:
+        bot = AuctionBot(username, self.context)
+        # Restored cooldowns keep a restarted bot from re-claiming daily rewards or mysteries
+        self.state.restore(bot)
+        return bot
 
     async def stop(self):
         self.running = False
+        if self.load_test:
+            await self.load_test.stop()
+        if self.pool:
+            await self.pool.stop()
+            self.pool = None
+        if self.scheduler:
+            await self.scheduler.stop()
+            self.scheduler = None
+        await self.bids.stop()
+        await self.monitor.stop()
         for t in self.tasks:
             t.cancel()
         self.tasks = []
+        self.state.checkpoint(self.bots)
+        self.state.close()
         self.bots = []
+        self.tokens.save()
+        self.auctions.clear()
         if self.client:
             await self.client.aclose()
             self.client = None
+            self.transport = None
+            self.context = None
+
+    async def start_load_test(self, rates: dict, duration_sec: float, max_in_flight: Optional[int] = None) -> dict:
+        if self.pool:
+            raise ValueError("Load tests run in-process; set shards to 1")
+        if not self.running:
+            raise ValueError("Start the bots before running a load test")
+        if self.load_test and self.load_test.running:
+            raise ValueError("A load test is already running")
+        self.load_test = LoadTest(
+            self.bots, rates, duration_sec, max_in_flight or self.settings.loadtest_max_in_flight
+        )
+        self.load_test.start()
+        return self.load_test.report()
+
+    async def stop_load_test(self) -> Optional[dict]:
+        if not self.load_test:
+            return None
+        await self.load_test.stop()
+        return self.load_test.report()
+
+    async def apply_config(self, updates: dict) -> dict:
+        changed = {
+            key: value
+            for key, value in updates.items()
+            if hasattr(self.settings, key) and getattr(self.settings, key) != value
+        }
+        catalog = None
+        if CATALOG_KEYS & changed.keys():
+            # Loaded before anything changes, so a bad catalog rejects the whole update
+            try:
+                catalog = load_catalog(self.settings.copy(update=changed))
+            except (OSError, ValueError) as exc:
+                raise ValueError(f"Cannot load item catalog: {exc}") from exc
+        old_users = self._users()
+        for key, value in changed.items():
+            setattr(self.settings, key, value)
+        if catalog:
+            self.catalog = catalog
+        if not self.running or not changed:
+            return {"changed": sorted(changed)}
+
+        if self.pool:
+            if RESTART_KEYS & changed.keys():
+                await self.stop()
+                await self.start()
+                return {"changed": sorted(changed), "restarted": True}
+            result = {"changed": sorted(changed), "forwardedToShards": len(self.pool.shards)}
+            if "bot_users" in changed:
+                result["addedBots"], result["removedBots"] = self.pool.rebalance(self._users())
+            await self.pool.apply_config(changed)
+            return result
+        if RESTART_KEYS & changed.keys():
+            await self.stop()
+            await self.start()
+            return {"changed": sorted(changed), "restarted": True}
 
-    async def apply_config(self, updates: dict):
-        await self.stop()
-        for key, value in updates.items():
-            if hasattr(self.settings, key):
-                setattr(self.settings, key, value)
-        await self.start()
+        result: dict = {"changed": sorted(changed)}
+        if CLIENT_KEYS & changed.keys():
+            if {"api_base", "identity_url"} & changed.keys():
+                self.auctions.clear()
+                self.breakers.reset()
+            await self._recycle_client()
+            result["recycledClient"] = True
+        if catalog:
+            self.context.catalog = catalog
+            result["itemCatalog"] = catalog.stats()
+        if LIMIT_KEYS & changed.keys():
+            self.limiter.reconfigure()
+        if "bot_password" in changed:
+            self.context.password = self.settings.bot_password
+        if "bot_users" in changed:
+            added, removed = self._resize_fleet(old_users, self._users())
+            result["addedBots"] = added
+            result["removedBots"] = removed
+        if SCHEDULE_KEYS & changed.keys():
+            self.scheduler.reschedule(self.bots)
+            result["rescheduled"] = True
+        return result
+
+    def _resize_fleet(self, old_users: List[str], new_users: List[str]) -> Tuple[int, int]:
+        wanted = set(new_users)
+        removed = [b for b in self.bots if b.username not in wanted]
+        for bot in removed:
+            bot.retired = True
+        self.state.checkpoint(removed)
+        existing = {b.username for b in self.bots}
+        added = [self._make_bot(u) for u in dict.fromkeys(new_users) if u not in existing]
+        self.bots = [b for b in self.bots if not b.retired] + added
+        for bot in added:
+            self.scheduler.add(bot)
+        return len(added), len(removed)
+
+    async def _recycle_client(self):
+        old_client, old_transport = self.client, self.transport
+        self.client, self.transport = build_client(self.settings)
+        self.context.client = self.client
+        # Let requests already on the old pool finish before closing it
+        deadline = clock.now() + self.settings.client_drain_timeout_sec
+        while old_transport and old_transport.in_flight and clock.now() < deadline:
+            await asyncio.sleep(0.05)
+        if old_client:
+            await old_client.aclose()
 
     def config_snapshot(self):
         return {
@@ -80,9 +301,29 @@ class BotManager:
             "max_active_auctions_per_bot": self.settings.max_active_auctions_per_bot,
             "min_balance": self.settings.min_balance,
             "auto_topup": self.settings.auto_topup,
+            "profile_cache_ttl_sec": self.settings.profile_cache_ttl_sec,
+            "auction_cache_ttl_sec": self.settings.auction_cache_ttl_sec,
+            "auction_full_sync_sec": self.settings.auction_full_sync_sec,
+            "auction_sync_overlap_sec": self.settings.auction_sync_overlap_sec,
+            "auction_cache_failure_backoff_sec": self.settings.auction_cache_failure_backoff_sec,
+            "topup_interval_sec": self.settings.topup_interval_sec,
+            "state_checkpoint_sec": self.settings.state_checkpoint_sec,
+            "shards": self.settings.shards,
+            "http_max_connections": self.settings.http_max_connections,
+            "http_max_keepalive": self.settings.http_max_keepalive,
+            "http_keepalive_expiry": self.settings.http_keepalive_expiry,
+            "http_max_per_host": self.settings.http_max_per_host,
+            "http2": self.settings.http2,
+            "http_connect_timeout": self.settings.http_connect_timeout,
+            "http_read_timeout": self.settings.http_read_timeout,
+            "rate_control_enabled": self.settings.rate_control_enabled,
+            "rate_latency_target_sec": self.settings.rate_latency_target_sec,
+            "rate_error_threshold": self.settings.rate_error_threshold,
         }
 
-    def status(self):
+    async def status(self) -> List[dict]:
+        if self.pool:
+            return await self.pool.bot_status()
         return [
             {
                 "name": b.username,
@@ -92,6 +333,62 @@ class BotManager:
                 "mysteries": b.stats.mysteries_opened,
                 "failures": b.stats.failures,
                 "lastError": b.stats.last_error,
+                **_tick_stats(b),
             }
             for b in self.bots
         ]
+
+    async def status_report(self) -> dict:
+        return {"running": self.running, "bots": await self.status(), **self.summary_report()}
+
+    # Everything in the status report except the per-bot rows
+    def summary_report(self) -> dict:
+        if self.pool:
+            return {"running": self.running, **self.pool.report()}
+        return {
+            "running": self.running,
+            "tokens": self.tokens.stats(),
+            "auctionCache": self.auctions.stats(),
+            "itemCatalog": self.catalog.stats(),
+            "scheduler": self.scheduler.stats() if self.scheduler else None,
+            "httpPool": self.transport.stats() if self.transport else None,
+            "rateControl": self.rate.stats(len(self.bots)),
+            "bidPipeline": self.bids.stats(),
+            "actionLimits": self.limiter.stats(),
+            "circuitBreakers": self.breakers.stats(),
+            "profileCache": merge_stats([b.profile.stats() for b in self.bots]),
+            "state": self.state.stats(),
+            "loop": self.monitor.stats(),
+        }
+
+    def loop_report(self) -> dict:
+        report = self.monitor.report()
+        if self.pool:
+            # The profiler and stall stacks cover this (admin) process; shards report their own lag
+            report["shards"] = [shard.report.get("loop") for shard in self.pool.shards]
+            return report
+        report["actions"] = self.scheduler.action_durations() if self.scheduler else {}
+        slowest = heapq.nlargest(SLOWEST_BOTS, self.bots, key=lambda b: b.tick_max_sec)
+        report["slowestBots"] = [{"name": b.username, **_tick_stats(b)} for b in slowest if b.ticks]
+        return report
+
+    def render_metrics(self) -> str:
+        metrics = self.metrics
+        if self.pool:
+            metrics = BotMetrics()
+            for shard in self.pool.shards:
+                metrics.merge(shard.report.get("metrics", {}))
+        return metrics.render(self.fleet_totals())
+
+    def fleet_totals(self) -> dict:
+        if self.pool:
+            return self.pool.fleet_totals()
+        return {
+            "bots": len(self.bots),
+            "bids_placed": sum(b.stats.bids_placed for b in self.bots),
+            "auctions_created": sum(b.stats.auctions_created for b in self.bots),
+            "mysteries_opened": sum(b.stats.mysteries_opened for b in self.bots),
+            "failures": sum(b.stats.failures for b in self.bots),
+            # Bid intents dropped because a higher bid for the same auction went in their place
+            "bids_coalesced": self.bids.coalesced,
+        }
@@ -0,0 +1,45 @@
+import hashlib
+import math
+import random
+from typing import Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+
+_MASK = (1 << 64) - 1
+
+
+# Per-bot random stream: splitmix64 over one 64-bit integer, so a bot's RNG is
+# a few dozen bytes instead of random.Random's 2.5 KB Mersenne Twister state.
+# Covers the calls bots make (random, uniform, randint, choice, expovariate);
+# a seeded stream is a pure function of the seed string.
+class BotRandom:
+    __slots__ = ("_state",)
+
+    def __init__(self, seed: Optional[str] = None):
+        if seed is None:
+            self._state = random.getrandbits(64)
+        else:
+            self._state = int.from_bytes(hashlib.blake2b(seed.encode(), digest_size=8).digest(), "little")
+
+    def _next(self) -> int:
+        self._state = z = (self._state + 0x9E3779B97F4A7C15) & _MASK
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK
+        return z ^ (z >> 31)
+
+    def random(self) -> float:
+        return (self._next() >> 11) * (1.0 / 9007199254740992.0)
+
+    def uniform(self, a: float, b: float) -> float:
+        return a + (b - a) * self.random()
+
+    def randint(self, a: int, b: int) -> int:
+        return a + self._next() % (b - a + 1)
+
+    def choice(self, seq: Sequence[T]) -> T:
+        if not seq:
+            raise IndexError("Cannot choose from an empty sequence")
+        return seq[self._next() % len(seq)]
+
+    def expovariate(self, lambd: float) -> float:
+        return -math.log(1.0 - self.random()) / lambd
@@ -0,0 +1,157 @@
+import asyncio
+import heapq
+import json
+import logging
+import sqlite3
+import time
+from dataclasses import asdict, fields
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+import clock
+from config import Settings
+
+if TYPE_CHECKING:
+    from bot import AuctionBot
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bot_state (
+    key TEXT PRIMARY KEY,
+    last_daily REAL NOT NULL,
+    last_mystery REAL NOT NULL,
+    active_auctions TEXT NOT NULL,
+    stats TEXT NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+# (last_daily, last_mystery, active_auctions json, stats json)
+Row = Tuple[float, float, str, str]
+
+
+# Fleet state checkpoints in SQLite: cooldown timestamps, created auctions and
+# counters per bot, keyed by gateway and username. A checkpoint writes only the
+# rows that changed since the last one, in a single transaction, so it stays
+# cheap however large the fleet; start-up restores every bot from one read.
+# Tokens are persisted separately by TokenManager.
+class BotStateStore:
+    def __init__(self, settings: Settings, path: Optional[str] = None):
+        self.settings = settings
+        self.path = settings.state_db_path if path is None else path
+        self._db: Optional[sqlite3.Connection] = None
+        self._rows: Optional[Dict[str, Row]] = None
+        self._written: Dict[str, Row] = {}
+        self.checkpoints = 0
+        self.rows_written = 0
+        self.restored = 0
+        self.last_checkpoint_ms: float = 0
+        self.last_load_ms: float = 0
+
+    def _key(self, username: str) -> str:
+        return f"{str(self.settings.api_base).rstrip('/')}|{username}"
+
+    def _open(self) -> Optional[sqlite3.Connection]:
+        if self._db is None and self.path:
+            try:
+                # Shards share the file; WAL lets them write their own rows without blocking readers
+                self._db = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("PRAGMA synchronous=NORMAL")
+                self._db.execute(_SCHEMA)
+            except sqlite3.Error as exc:
+                logging.warning("Bot state checkpoints disabled, cannot open %s: %s", self.path, exc)
+                self._db = None
+                self.path = ""
+        return self._db
+
+    def load(self):
+        self._rows = {}
+        db = self._open()
+        if db is None:
+            return
+        started = time.perf_counter()
+        try:
+            cursor = db.execute("SELECT key, last_daily, last_mystery, active_auctions, stats FROM bot_state")
+            self._rows = {key: tuple(row) for key, *row in cursor}
+        except sqlite3.Error as exc:
+            logging.warning("Ignoring unreadable bot state %s: %s", self.path, exc)
+        self.last_load_ms = (time.perf_counter() - started) * 1000
+
+    def restore(self, bot: "AuctionBot") -> bool:
+        if self._rows is None:
+            self.load()
+        key = self._key(bot.username)
+        row = self._rows.get(key)
+        if row is None:
+            return False
+        last_daily, last_mystery, active_auctions, stats = row
+        bot.last_daily = last_daily
+        bot.last_mystery = last_mystery
+        # Entries without an end time cannot be expired, so they are not carried over
+        bot.active_auctions = [e for e in json.loads(active_auctions) if isinstance(e, list)]
+        heapq.heapify(bot.active_auctions)
+        known = {f.name for f in fields(bot.stats)}
+        for name, value in json.loads(stats).items():
+            if name in known:
+                setattr(bot.stats, name, value)
+        self._written[key] = row
+        self.restored += 1
+        return True
+
+    def _row(self, bot: "AuctionBot") -> Row:
+        return (
+            bot.last_daily,
+            bot.last_mystery,
+            json.dumps(bot.active_auctions),
+            json.dumps(asdict(bot.stats)),
+        )
+
+    def checkpoint(self, bots: List["AuctionBot"]) -> int:
+        db = self._open()
+        if db is None:
+            return 0
+        started = time.perf_counter()
+        now = clock.now()
+        changed = []
+        for bot in bots:
+            key = self._key(bot.username)
+            row = self._row(bot)
+            if self._written.get(key) != row:
+                changed.append((key, row))
+        if changed:
+            try:
+                with db:
+                    db.execute("BEGIN")
+                    db.executemany(
+                        "INSERT OR REPLACE INTO bot_state VALUES (?, ?, ?, ?, ?, ?)",
+                        [(key, *row, now) for key, row in changed],
+                    )
+            except sqlite3.Error as exc:
+                logging.warning("Could not checkpoint bot state to %s: %s", self.path, exc)
+                return 0
+            for key, row in changed:
+                self._written[key] = row
+            self.rows_written += len(changed)
+        self.checkpoints += 1
+        self.last_checkpoint_ms = (time.perf_counter() - started) * 1000
+        return len(changed)
+
+    async def run(self, bots: Callable[[], List["AuctionBot"]]):
+        while True:
+            await asyncio.sleep(self.settings.state_checkpoint_sec)
+            self.checkpoint(bots())
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+        self._rows = None
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": bool(self.path),
+            "restored": self.restored,
+            "checkpoints": self.checkpoints,
+            "rowsWritten": self.rows_written,
+            "lastCheckpointMs": round(self.last_checkpoint_ms, 3),
+            "loadMs": round(self.last_load_ms, 3),
+        }
@@ -0,0 +1,124 @@
+from typing import Dict, Optional
+
+import clock
+from config import Settings
+from metrics import BotMetrics
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+# Endpoint group a request is judged under: identity logins, or the first path
+# segment of a gateway call (auctions, bids, progress)
+def endpoint_group(endpoint: str) -> str:
+    if endpoint == "connect/token":
+        return "identity"
+    return endpoint.split("/", 1)[0]
+
+
+# Closed/open/half-open breaker for one endpoint group, shared by every bot.
+# breaker_failure_threshold consecutive 5xx or transport failures open it; while
+# open, calls fail at once with CircuitOpenError instead of waiting out the
+# client timeout. After the open period up to breaker_half_open_probes calls go
+# through as probes: a good response closes the breaker, a failure reopens it
+# for twice as long (capped at breaker_max_open_sec). 429s and cancelled calls
+# count neither way, since they say nothing about the service being up.
+class CircuitBreaker:
+    def __init__(self, group: str, settings: Settings, metrics: Optional[BotMetrics] = None):
+        self.group = group
+        self.settings = settings
+        self.metrics = metrics
+        self.state = CLOSED
+        self.failures = 0
+        self.open_sec = settings.breaker_open_sec
+        self.retry_at: float = 0
+        self.probing = 0
+        self.opens = 0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+
+    # True when the call is a half-open probe, whose outcome decides the state
+    def allow(self) -> bool:
+        if self.state == OPEN:
+            if clock.now() < self.retry_at:
+                self._reject()
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN:
+            if self.probing >= self.settings.breaker_half_open_probes:
+                self._reject()
+            self.probing += 1
+            return True
+        return False
+
+    def _reject(self):
+        self.rejected += 1
+        if self.metrics:
+            self.metrics.circuit_rejected(self.group)
+        wait = max(0.0, self.retry_at - clock.now())
+        raise CircuitOpenError(f"{self.group} circuit {self.state}, next probe in {wait:.1f}s")
+
+    def observe(self, status, probe: bool, detail: Optional[str] = None):
+        if probe:
+            self.probing -= 1
+        if status == "cancelled" or status == 429:
+            return
+        if status == "error" or status >= 500:
+            self.last_error = detail or str(status)
+            self.failures += 1
+            if probe:
+                self._open(min(self.open_sec * 2, self.settings.breaker_max_open_sec))
+            elif self.state == CLOSED and self.failures >= self.settings.breaker_failure_threshold:
+                self._open(self.settings.breaker_open_sec)
+            return
+        self.failures = 0
+        # Calls sent before the breaker opened say nothing about the service now
+        if probe:
+            self.state = CLOSED
+            self.open_sec = self.settings.breaker_open_sec
+
+    def _open(self, open_sec: float):
+        self.state = OPEN
+        self.open_sec = open_sec
+        self.retry_at = clock.now() + open_sec
+        self.opens += 1
+        if self.metrics:
+            self.metrics.circuit_opened(self.group)
+
+    def stats(self) -> Dict:
+        return {
+            "state": self.state,
+            "consecutiveFailures": self.failures,
+            "opens": self.opens,
+            "rejected": self.rejected,
+            "probing": self.probing,
+            "retryInSec": round(max(0.0, self.retry_at - clock.now()), 3) if self.state == OPEN else None,
+            "lastError": self.last_error,
+        }
+
+
+class CircuitBreakers:
+    def __init__(self, settings: Settings, metrics: Optional[BotMetrics] = None):
+        self.settings = settings
+        self.metrics = metrics
+        self.groups: Dict[str, CircuitBreaker] = {}
+
+    def for_endpoint(self, endpoint: str) -> Optional[CircuitBreaker]:
+        if not self.settings.breaker_enabled:
+            return None
+        group = endpoint_group(endpoint)
+        breaker = self.groups.get(group)
+        if breaker is None:
+            breaker = self.groups[group] = CircuitBreaker(group, self.settings, self.metrics)
+        return breaker
+
+    # Back to closed, e.g. after api_base or identity_url points somewhere else
+    def reset(self):
+        self.groups = {}
+
+    def stats(self) -> Dict:
+        return {group: breaker.stats() for group, breaker in sorted(self.groups.items())}
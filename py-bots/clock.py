@@ -0,0 +1,20 @@
+import time
+from typing import Callable
+
+# Wall clock read by bot logic (schedules, cooldowns, TTLs, token expiry). The
+# simulator installs a virtual clock driven by its event loop; everything else
+# keeps the system clock.
+_now: Callable[[], float] = time.time
+
+
+def now() -> float:
+    return _now()
+
+
+def install(source: Callable[[], float]):
+    global _now
+    _now = source
+
+
+def reset():
+    install(time.time)
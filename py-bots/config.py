@@ -1,5 +1,5 @@
 from pydantic import BaseSettings, AnyHttpUrl
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 
 class Settings(BaseSettings):
@@ -10,17 +10,124 @@ class Settings(BaseSettings):
     bot_users: str = "alice,bob"
     bot_password: str = "Pass123$"
 
-    bid_rate_per_min: int = 2
+    bid_rate_per_min: float = 2
     create_rate_per_min: float = 0.5
     mystery_interval_min: int = 60
     daily_interval_hours: int = 24
 
+    # Balance check cadence when auto_topup is on, and jitter added to fixed-interval actions
+    topup_interval_sec: int = 60
+    schedule_spread_sec: float = 10.0
+
+    # Worker processes to spread bot_users across; 1 keeps every bot in-process
+    shards: int = 1
+    shard_report_sec: float = 1.0
+
+    # Shared HTTP client pool. Requests beyond http_max_per_host wait on the transport's
+    # semaphore, not in httpcore's pool queue, which rescans every waiter on each event;
+    # 0 (the default) and anything larger mean http_max_connections
+    http_max_connections: int = 100
+    http_max_keepalive: int = 20
+    http_keepalive_expiry: float = 5.0
+    http_max_per_host: int = 0
+    http2: bool = False
+    http_connect_timeout: float = 5.0
+    http_read_timeout: float = 10.0
+    http_write_timeout: float = 10.0
+    http_pool_timeout: float = 10.0
+    # How long a replaced client may finish in-flight requests after a config change
+    client_drain_timeout_sec: float = 10.0
+
+    # Adaptive (AIMD) rate control driven by gateway responses
+    rate_control_enabled: bool = True
+    rate_window_sec: float = 5.0
+    rate_min_samples: int = 20
+    rate_error_threshold: float = 0.05
+    rate_latency_target_sec: float = 1.0
+    rate_slow_threshold: float = 0.1
+    rate_decrease_factor: float = 0.5
+    rate_increase_step: float = 0.05
+    rate_min_factor: float = 0.02
+    rate_max_retry_after_sec: float = 300.0
+
+    # Coroutines that run due scheduled actions, which is also the cap on them in flight; read at start-up
+    scheduler_workers: int = 1000
+
+    # Bot actions (top-up, daily, mystery, create, bid) in flight per bot and across the fleet, 0 = unbounded;
+    # the per-bot default gives each action its own slot so one stalled endpoint cannot hold up the others.
+    # An action still waiting or running after its deadline is cancelled (per-action overrides, 0 = none)
+    bot_action_concurrency: int = 5
+    fleet_action_concurrency: int = 1000
+    action_deadline_sec: float = 15.0
+    action_deadlines_sec: Dict[str, float] = {"bid": 10.0, "create": 10.0}
+
+    # Circuit breakers per endpoint group (identity, auctions, bids, progress): consecutive 5xx or
+    # transport failures that open one, how long it then fails fast (doubling up to the max while
+    # probes keep failing), and how many probe calls a half-open breaker lets through at once
+    breaker_enabled: bool = True
+    breaker_failure_threshold: int = 5
+    breaker_open_sec: float = 10.0
+    breaker_max_open_sec: float = 120.0
+    breaker_half_open_probes: int = 1
+
+    # Cap on outstanding load-test requests; arrivals beyond it are shed and counted
+    loadtest_max_in_flight: int = 1000
+
+    # Activity ring buffer size (entries); read once at start-up
+    activity_capacity: int = 10000
+    # Most entries one filtered activity read looks at before returning a cursor
+    activity_scan_limit: int = 50000
+
     max_bids_per_auction: int = 3
+    # Fleet bid pipeline: same-auction bids within the window collapse to the highest
+    bid_coalesce_window_ms: int = 50
+    bid_max_concurrency: int = 32
     max_active_auctions_per_bot: int = 2
     min_balance: int = 500
     auto_topup: bool = False
+    # Cached balance is re-read from progress/me at most this often unless a top-up looks due
+    profile_cache_ttl_sec: float = 300.0
+
+    # Shared token cache; empty path keeps tokens in memory only
+    token_cache_path: str = ".bot_tokens.json"
+    token_cache_flush_sec: float = 5.0
+    token_refresh_margin_sec: int = 60
+    token_refresh_jitter_sec: int = 120
+    # Background sweep that refreshes tokens coming due before the next sweep, 0 = only when a bot asks
+    token_refresh_check_sec: float = 15.0
+    token_refresh_concurrency: int = 20
+
+    # Per-bot state checkpoints (cooldowns, created auctions, counters); empty path disables them
+    state_db_path: str = ".bot_state.db"
+    state_checkpoint_sec: float = 5.0
+
+    # Shared live-auction snapshot, refreshed at most once per TTL for the whole fleet.
+    # Refreshes fetch only auctions updated since the last one; a full sync runs periodically
+    auction_cache_ttl_sec: float = 2.0
+    auction_full_sync_sec: float = 300.0
+    auction_sync_overlap_sec: float = 1.0
+    # After a failed refresh, callers get that error without fetching again for this long
+    auction_cache_failure_backoff_sec: float = 1.0
+
+    # Event-loop monitoring: lag sampling period, how long the loop may go unserviced
+    # before the watchdog captures its stack, and how many captured stalls are kept
+    loop_monitor_enabled: bool = True
+    loop_sample_sec: float = 0.1
+    loop_stall_threshold_sec: float = 0.25
+    loop_stall_capacity: int = 20
+    # On-demand sampling profiler (POST /admin/profiler/start); runs stop on their own after profiler_max_sec
+    profiler_interval_ms: float = 5.0
+    profiler_max_sec: float = 300.0
+
+    # Seeds every bot's RNG and the token refresh jitter for reproducible runs; unset uses fresh entropy
+    seed: Optional[int] = None
 
     categories: List[str] = ["Common", "Rare", "Epic", "Legendary"]
+    # Auction items: a .jsonl (one object per line) or .json array file, or the built-in heroes when empty.
+    # create_auction picks a category by these weights (same order as categories, like the bidding
+    # service's rarity rolls), then an item within it by its optional "weight" field
+    item_catalog_path: str = ""
+    category_weights: List[float] = [65.0, 22.0, 10.0, 3.0]
 
     class Config:
         env_file = ".env"
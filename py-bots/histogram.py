@@ -0,0 +1,74 @@
+from typing import Dict, List, Optional
+
+# Log-linear (HDR style) buckets: 7 bits of mantissa gives ~1.6% worst-case error
+# from 1us up to hours, with a fixed-size counts array and no per-sample allocation.
+_SUB_BUCKET_BITS = 7
+_SUB_BUCKET_COUNT = 1 << _SUB_BUCKET_BITS
+_MAX_EXPONENT = 40
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.counts: List[int] = [0] * (_SUB_BUCKET_COUNT * (_MAX_EXPONENT + 1))
+        self.total = 0
+        self.sum_us = 0
+        self.min_us: Optional[int] = None
+        self.max_us = 0
+
+    @staticmethod
+    def _index(value_us: int) -> int:
+        exponent = max(0, value_us.bit_length() - _SUB_BUCKET_BITS)
+        return min(exponent, _MAX_EXPONENT) * _SUB_BUCKET_COUNT + (value_us >> exponent)
+
+    @staticmethod
+    def _upper_bound(index: int) -> int:
+        exponent, mantissa = divmod(index, _SUB_BUCKET_COUNT)
+        return ((mantissa + 1) << exponent) - 1
+
+    def record(self, seconds: float):
+        value_us = max(1, int(seconds * 1_000_000))
+        self.counts[self._index(value_us)] += 1
+        self.total += 1
+        self.sum_us += value_us
+        if self.min_us is None or value_us < self.min_us:
+            self.min_us = value_us
+        if value_us > self.max_us:
+            self.max_us = value_us
+
+    def merge(self, other: "LatencyHistogram"):
+        for i, count in enumerate(other.counts):
+            if count:
+                self.counts[i] += count
+        self.total += other.total
+        self.sum_us += other.sum_us
+        if other.min_us is not None and (self.min_us is None or other.min_us < self.min_us):
+            self.min_us = other.min_us
+        self.max_us = max(self.max_us, other.max_us)
+
+    def percentile(self, q: float) -> float:
+        if not self.total:
+            return 0.0
+        rank = max(1, int(q * self.total + 0.5))
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count:
+                seen += count
+                if seen >= rank:
+                    return min(self._upper_bound(i), self.max_us) / 1_000_000
+        return self.max_us / 1_000_000
+
+    def summary(self) -> Dict:
+        return {
+            "count": self.total,
+            "minMs": _ms((self.min_us or 0) / 1_000_000),
+            "meanMs": _ms(self.sum_us / self.total / 1_000_000) if self.total else 0.0,
+            "p50Ms": _ms(self.percentile(0.50)),
+            "p95Ms": _ms(self.percentile(0.95)),
+            "p99Ms": _ms(self.percentile(0.99)),
+            "p999Ms": _ms(self.percentile(0.999)),
+            "maxMs": _ms(self.max_us / 1_000_000),
+        }
@@ -0,0 +1,132 @@
+import asyncio
+from typing import Callable, Dict, Optional, Tuple
+
+import httpx
+
+from config import Settings
+
+_HEADERS_SENT = ("http11.send_request_headers.started", "http2.send_request_headers.started")
+
+
+class _TrackedStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, on_close: Callable[[], None]):
+        self._stream = stream
+        self._on_close = on_close
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            self._on_close()
+
+
+# Wraps the pooled httpx transport with a per-host concurrency cap and counters
+# for sizing the pool: in-use/queued requests and connection reuse. The cap never
+# exceeds the pool, so requests queue here rather than inside httpcore.
+class PooledTransport(httpx.AsyncBaseTransport):
+    def __init__(self, settings: Settings, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.settings = settings
+        limits = httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive,
+            keepalive_expiry=settings.http_keepalive_expiry,
+        )
+        # The simulator passes an in-process transport in place of the network pool
+        self._transport = transport or httpx.AsyncHTTPTransport(limits=limits, http2=settings.http2)
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self.in_flight = 0
+        self.waiting_for_host = 0
+        self.waiting_for_pool = 0
+        self.requests = 0
+        self.connections_opened = 0
+
+    def per_host_limit(self) -> int:
+        pool = self.settings.http_max_connections
+        per_host = self.settings.http_max_per_host
+        return min(per_host, pool) if per_host > 0 else pool
+
+    def _slot(self, host: str) -> asyncio.Semaphore:
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = self._host_slots[host] = asyncio.Semaphore(self.per_host_limit())
+        return slot
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        slot = self._slot(request.url.host)
+        self.waiting_for_host += 1
+        try:
+            await slot.acquire()
+        finally:
+            self.waiting_for_host -= 1
+
+        self.in_flight += 1
+        self.requests += 1
+        self.waiting_for_pool += 1
+        state = {"waiting": True, "open": True}
+        outer_trace = request.extensions.get("trace")
+
+        async def trace(event_name: str, info: Dict):
+            if event_name == "connection.connect_tcp.complete":
+                self.connections_opened += 1
+            elif state["waiting"] and event_name in _HEADERS_SENT:
+                state["waiting"] = False
+                self.waiting_for_pool -= 1
+            if outer_trace:
+                await outer_trace(event_name, info)
+
+        def release():
+            if state["waiting"]:
+                state["waiting"] = False
+                self.waiting_for_pool -= 1
+            if state["open"]:
+                state["open"] = False
+                self.in_flight -= 1
+                slot.release()
+
+        request.extensions["trace"] = trace
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            release()
+            raise
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_TrackedStream(response.stream, release),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+    def stats(self) -> Dict:
+        return {
+            "inUse": self.in_flight,
+            "queued": self.waiting_for_host + self.waiting_for_pool,
+            "waitingForHostSlot": self.waiting_for_host,
+            "waitingForConnection": self.waiting_for_pool,
+            "requests": self.requests,
+            "connectionsOpened": self.connections_opened,
+            "reuseRatio": round(1 - self.connections_opened / self.requests, 4) if self.requests else None,
+            "maxConnections": self.settings.http_max_connections,
+            "maxPerHost": self.per_host_limit(),
+            "maxKeepalive": self.settings.http_max_keepalive,
+            "http2": self.settings.http2,
+        }
+
+
+def build_client(
+    settings: Settings, inner: Optional[httpx.AsyncBaseTransport] = None
+) -> Tuple[httpx.AsyncClient, PooledTransport]:
+    transport = PooledTransport(settings, inner)
+    timeout = httpx.Timeout(
+        connect=settings.http_connect_timeout,
+        read=settings.http_read_timeout,
+        write=settings.http_write_timeout,
+        pool=settings.http_pool_timeout,
+    )
+    return httpx.AsyncClient(transport=transport, timeout=timeout), transport
@@ -0,0 +1,200 @@
+import json
+import logging
+import math
+import os
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bot_random import BotRandom
+from config import Settings
+
+# Used when item_catalog_path is empty
+BUILTIN_ITEMS: List[Dict] = [
+    {
+        "title": "Veyla the Shadow Lich",
+        "brand": "Necromancer",
+        "category": "Legendary",
+        "variant": "INT 95 | STR 42 | VIT 68 | AGI 54",
+        "condition": "Hero",
+        "colorway": "Arcane",
+        "releaseYear": 2025,
+        "specs": "Master of shadow flames and soul drain.",
+        "imageUrl": "/pets/craftpix-net-935193-free-chibi-necromancer-of-the-shadow-character-sprites/necromancer_of_the_shadow_1/card/frame_0.png",
+    },
+    {
+        "title": "Elyra Nocturne",
+        "brand": "Oracle",
+        "category": "Epic",
+        "variant": "INT 88 | STR 34 | VIT 60 | AGI 58",
+        "condition": "Hero",
+        "colorway": "Umbral",
+        "releaseYear": 2025,
+        "specs": "Seer of eclipses, whispers prophecies.",
+        "imageUrl": "/pets/craftpix-net-919731-free-chibi-dark-oracle-character-sprites/dark_oracle_1/card/frame_0.png",
+    },
+    {
+        "title": "Morr Wispblade",
+        "brand": "Reaper",
+        "category": "Rare",
+        "variant": "STR 68 | INT 64 | VIT 58 | AGI 72",
+        "condition": "Hero",
+        "colorway": "Wraith",
+        "releaseYear": 2025,
+        "specs": "Edge of dusk; silent executioner.",
+        "imageUrl": "/pets/craftpix-904589-free-reaper-man-chibi-2d-game-sprites/reaper_man_1/card/frame_1.png",
+    },
+    {
+        "title": "Sigrun Dawnbreak",
+        "brand": "Valkyrie",
+        "category": "Legendary",
+        "variant": "STR 90 | VIT 82 | AGI 70 | INT 48",
+        "condition": "Hero",
+        "colorway": "Sunsteel",
+        "releaseYear": 2025,
+        "specs": "Skyrider who guards fallen champions.",
+        "imageUrl": "/pets/craftpix-net-469596-free-chibi-valkyrie-character-sprites/valkyrie_1/card/frame_3.png",
+    },
+    {
+        "title": "Dresh Wildarrow",
+        "brand": "Ranger",
+        "category": "Common",
+        "variant": "STR 58 | AGI 68 | VIT 52 | INT 24",
+        "condition": "Hero",
+        "colorway": "Verdant",
+        "releaseYear": 2025,
+        "specs": "Quickdraw hunter of the wild clans.",
+        "imageUrl": "/pets/craftpix-064112-free-orc-ogre-and-goblin-chibi-2d-game-sprites/orc/card/frame_0.png",
+    },
+]
+
+# Filled in per auction, so never taken from catalog entries
+_PER_AUCTION_FIELDS = ("reservePrice", "auctionEnd")
+
+_catalogs: Dict[tuple, "ItemCatalog"] = {}
+
+
+# Vose's alias method: O(n) to build, then one random number per O(1) draw
+def alias_table(weights: List[float]) -> Tuple[array, array]:
+    n = len(weights)
+    total = sum(weights)
+    scaled = [w * n / total for w in weights]
+    prob = array("d", bytes(8 * n))
+    alias = array("I", range(n))
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        prob[s] = scaled[s]
+        alias[s] = l
+        scaled[l] += scaled[s] - 1.0
+        (small if scaled[l] < 1.0 else large).append(l)
+    # Leftovers are exactly 1 up to rounding
+    for i in large + small:
+        prob[i] = 1.0
+    return prob, alias
+
+
+def _read_items(path: str) -> Iterable[Dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from json.load(f)
+
+
+# Auction items for create_auction, shared by every bot in the process. Each
+# item is kept only as its pre-serialized JSON body up to "reservePrice":, so a
+# payload is three byte strings joined; no dict copy or JSON encoding per create.
+# Items are drawn with probability category weight x item weight / category's
+# total item weight, from a single alias table over all items.
+class ItemCatalog:
+    def __init__(self, items: Iterable[Dict], categories: List[str], category_weights: List[float]):
+        index_of = {c: i for i, c in enumerate(categories)}
+        weight_of = [category_weights[i] if i < len(category_weights) else 0.0 for i in range(len(categories))]
+        heads: List[bytes] = []
+        self.titles: List[str] = []
+        self.category_of = array("I")
+        item_weights: List[float] = []
+        category_totals = [0.0] * len(categories)
+        self.skipped = 0
+        for item in items:
+            category = item.get("category") if isinstance(item, dict) else None
+            weight = item.get("weight", 1.0) if category is not None else 0
+            index = index_of.get(category)
+            numeric = isinstance(weight, (int, float)) and not isinstance(weight, bool)
+            if index is None or not item.get("title") or not numeric or not 0 < weight < math.inf:
+                self.skipped += 1
+                continue
+            body = {k: v for k, v in item.items() if k != "weight" and k not in _PER_AUCTION_FIELDS}
+            heads.append(json.dumps(body, separators=(",", ":"))[:-1].encode() + b',"reservePrice":')
+            self.titles.append(body["title"])
+            self.category_of.append(index)
+            item_weights.append(float(weight))
+            category_totals[index] += weight
+        self.categories = categories
+        self.counts = [0] * len(categories)
+        for index in self.category_of:
+            self.counts[index] += 1
+        weights = [
+            weight_of[c] * w / category_totals[c] for c, w in zip(self.category_of, item_weights)
+        ]
+        if not sum(weights):
+            raise ValueError("Item catalog has no items in a category with a positive weight")
+        self._heads = heads
+        self._prob, self._alias = alias_table(weights)
+        self._size = len(heads)
+        # auctionEnd tail for the current second, shared by every create within it
+        self._end_sec: Optional[int] = None
+        self._end_tail = b""
+
+    def __len__(self) -> int:
+        return self._size
+
+    def sample(self, rng: BotRandom) -> int:
+        u = rng.random() * self._size
+        i = int(u)
+        return i if u - i < self._prob[i] else self._alias[i]
+
+    def payload(self, index: int, reserve_price: int, end: float) -> bytes:
+        second = int(end)
+        if second != self._end_sec:
+            stamp = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(second))
+            self._end_tail = f',"auctionEnd":"{stamp}"}}'.encode()
+            self._end_sec = second
+        return self._heads[index] + b"%d" % reserve_price + self._end_tail
+
+    def stats(self) -> Dict:
+        return {
+            "items": self._size,
+            "skipped": self.skipped,
+            "byCategory": dict(zip(self.categories, self.counts)),
+        }
+
+
+# Loaded once per path, modification time and weighting, however many bots ask
+def load_catalog(settings: Settings) -> ItemCatalog:
+    path = settings.item_catalog_path
+    stamp = os.stat(path).st_mtime_ns if path else None
+    key = (path, stamp, tuple(settings.categories), tuple(settings.category_weights))
+    catalog = _catalogs.get(key)
+    if catalog is None:
+        started = time.perf_counter()
+        items = _read_items(path) if path else BUILTIN_ITEMS
+        catalog = ItemCatalog(items, list(settings.categories), list(settings.category_weights))
+        if catalog.skipped:
+            logging.warning(
+                "Skipped %d catalog items without a title, a weighted category or a positive numeric weight",
+                catalog.skipped,
+            )
+        logging.info(
+            "Loaded %d catalog items from %s in %.1f ms",
+            len(catalog),
+            path or "the built-in list",
+            (time.perf_counter() - started) * 1000,
+        )
+        _catalogs.clear()
+        _catalogs[key] = catalog
+    return catalog
@@ -0,0 +1,161 @@
+import asyncio
+import itertools
+import math
+import random
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from bot import JSON_HEADERS, AuctionBot
+from histogram import LatencyHistogram
+
+# Load-test action -> endpoint label used in the report
+LOAD_ACTIONS: Dict[str, str] = {
+    "bid": "bids",
+    "create": "auctions",
+    "award": "progress/award",
+    "mystery": "progress/mystery",
+}
+
+
+def parse_rates(rates) -> Dict[str, float]:
+    # Requests/sec per load-test action; ValueError for anything but a map of known actions to numbers
+    if not isinstance(rates, dict):
+        raise ValueError("rates must be an object of action -> requests/sec")
+    unknown = set(rates) - set(LOAD_ACTIONS)
+    if unknown:
+        raise ValueError(f"Unknown load-test actions: {', '.join(sorted(unknown))}")
+    parsed = {}
+    for action, rate in rates.items():
+        if rate is None:
+            continue
+        if isinstance(rate, bool) or not isinstance(rate, (int, float)) or not math.isfinite(rate):
+            raise ValueError(f"Rate for {action} must be a number, got {rate!r}")
+        if rate > 0:
+            parsed[action] = float(rate)
+    return parsed
+
+
+# Open-loop load generator: arrivals follow a Poisson process at the target rate
+# regardless of how long responses take, and latency is measured from the
+# intended send time so a slow gateway shows up as latency, not as lower load.
+class LoadTest:
+    def __init__(self, bots: List[AuctionBot], rates: Dict[str, float], duration_sec: float, max_in_flight: int):
+        self.rates = parse_rates(rates)
+        if not bots:
+            raise ValueError("Load test needs at least one running bot")
+        self.duration_sec = duration_sec
+        self.max_in_flight = max_in_flight
+        self._bots = itertools.cycle(bots)
+        self._tasks: List[asyncio.Task] = []
+        self._inflight: set = set()
+        self.histograms: Dict[str, LatencyHistogram] = {a: LatencyHistogram() for a in self.rates}
+        self.status_codes: Dict[str, Dict[str, int]] = {a: {} for a in self.rates}
+        self.sent: Dict[str, int] = {a: 0 for a in self.rates}
+        self.errors: Dict[str, int] = {a: 0 for a in self.rates}
+        self.shed: Dict[str, int] = {a: 0 for a in self.rates}
+        self.skipped: Dict[str, int] = {a: 0 for a in self.rates}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self.started_at is not None and self.finished_at is None
+
+    def start(self):
+        self.started_at = time.time()
+        self._tasks = [asyncio.create_task(self._arrivals(a, r)) for a, r in self.rates.items()]
+        self._tasks.append(asyncio.create_task(self._finish()))
+
+    async def _finish(self):
+        try:
+            await asyncio.gather(*self._tasks[:-1])
+            if self._inflight:
+                await asyncio.gather(*self._inflight, return_exceptions=True)
+        finally:
+            self.finished_at = time.time()
+
+    async def stop(self):
+        for task in self._tasks + list(self._inflight):
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._inflight, return_exceptions=True)
+        if self.finished_at is None:
+            self.finished_at = time.time()
+
+    async def _arrivals(self, action: str, rate_per_sec: float):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        end = start + self.duration_sec
+        intended = start
+        while True:
+            intended += random.expovariate(rate_per_sec)
+            if intended >= end:
+                return
+            delay = intended - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if len(self._inflight) >= self.max_in_flight:
+                self.shed[action] += 1
+                continue
+            task = asyncio.create_task(self._fire(action, intended))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _fire(self, action: str, intended: float):
+        loop = asyncio.get_running_loop()
+        bot = next(self._bots)
+        try:
+            resp = await self._call(bot, action)
+        except Exception:
+            self.errors[action] += 1
+            self.histograms[action].record(loop.time() - intended)
+            return
+        if resp is None:
+            self.skipped[action] += 1
+            return
+        self.sent[action] += 1
+        self.histograms[action].record(loop.time() - intended)
+        codes = self.status_codes[action]
+        code = str(resp.status_code)
+        codes[code] = codes.get(code, 0) + 1
+
+    async def _call(self, bot: AuctionBot, action: str) -> Optional[httpx.Response]:
+        if action == "bid":
+            auctions = [a for a in await bot.list_live_auctions() if a.get("seller") != bot.username]
+            if not auctions:
+                return None
+            auction = random.choice(auctions)
+            amount = auction.get("currentHighBid", 0) + random.randint(5, 25)
+            return await bot._request("POST", f"bids?auctionId={auction.get('id')}&amount={amount}")
+        if action == "create":
+            _, _, body = bot.auction_payload()
+            return await bot._request("POST", "auctions", content=body, headers=JSON_HEADERS)
+        if action == "award":
+            return await bot._request("POST", "progress/award", json={"action": "daily-login"})
+        return await bot._request("POST", "progress/mystery", json={})
+
+    def report(self) -> Dict:
+        end = self.finished_at or time.time()
+        elapsed = end - self.started_at if self.started_at else 0
+        return {
+            "running": self.running,
+            "startedAt": self.started_at,
+            "elapsedSec": round(elapsed, 3),
+            "durationSec": self.duration_sec,
+            "inFlight": len(self._inflight),
+            "actions": {
+                action: {
+                    "endpoint": LOAD_ACTIONS[action],
+                    "targetRps": rate,
+                    "achievedRps": round(self.sent[action] / elapsed, 3) if elapsed else 0.0,
+                    "completed": self.sent[action],
+                    "errors": self.errors[action],
+                    "shed": self.shed[action],
+                    "skipped": self.skipped[action],
+                    "statusCodes": self.status_codes[action],
+                    "latency": self.histograms[action].summary(),
+                }
+                for action, rate in self.rates.items()
+            },
+        }
@@ -0,0 +1,206 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+import clock
+from config import Settings
+from histogram import LatencyHistogram
+from metrics import BotMetrics
+
+# Innermost frames kept per captured stall stack
+STACK_LIMIT = 40
+
+
+def _frame_name(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+# Samples one thread's Python stack from a helper thread and aggregates the
+# samples as collapsed stacks ("outer;inner count" per line), the input format
+# of flamegraph.pl, speedscope and similar viewers. The sampled thread is never
+# interrupted; each sample is one sys._current_frames() call and a frame walk.
+class SamplingProfiler:
+    def __init__(self, thread_id: int, interval_sec: float, max_sec: float):
+        self.thread_id = thread_id
+        self.interval_sec = interval_sec
+        self.max_sec = max_sec
+        # Tuple of code objects, innermost first -> samples
+        self.stacks: Dict[tuple, int] = {}
+        self.samples = 0
+        self.started_at: float = 0
+        self.stopped_at: Optional[float] = None
+        self._halt = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self.started_at = clock.now()
+        self._thread = threading.Thread(target=self._run, name="loop-profiler", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        deadline = time.monotonic() + self.max_sec
+        while not self._halt.wait(self.interval_sec) and time.monotonic() < deadline:
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                break
+            codes = []
+            while frame is not None:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            key = tuple(codes)
+            self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+        self.stopped_at = clock.now()
+
+    def stop(self):
+        self._halt.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+
+    def collapsed(self) -> str:
+        lines: Dict[str, int] = {}
+        for codes, count in list(self.stacks.items()):
+            name = ";".join(_frame_name(code) for code in reversed(codes))
+            lines[name] = lines.get(name, 0) + count
+        return "".join(f"{name} {count}\n" for name, count in sorted(lines.items()))
+
+    def stats(self) -> Dict:
+        end = self.stopped_at if self.stopped_at is not None else clock.now()
+        return {
+            "running": self.running,
+            "intervalMs": round(self.interval_sec * 1000, 3),
+            "samples": self.samples,
+            "distinctStacks": len(self.stacks),
+            "elapsedSec": round(end - self.started_at, 3),
+        }
+
+
+# Event-loop health for the bot process. A task that sleeps loop_sample_sec
+# records how late it wakes (loop lag); a watchdog thread checks the task's
+# heartbeat and, when the loop has not come round for loop_stall_threshold_sec,
+# captures the loop thread's stack while it is still blocked. Both cost a few
+# wakeups per second, so they stay on; the sampling profiler runs on demand.
+class LoopMonitor:
+    def __init__(self, settings: Settings, metrics: Optional[BotMetrics] = None):
+        self.settings = settings
+        self.metrics = metrics
+        self.lag = LatencyHistogram()
+        self.last_lag_sec = 0.0
+        self.stalls: Deque[Dict] = deque(maxlen=settings.loop_stall_capacity)
+        self.stall_count = 0
+        self.profiler: Optional[SamplingProfiler] = None
+        self._thread_id: Optional[int] = None
+        self._beat = 0.0
+        # Stall the watchdog is still watching; the sampler fills in its final duration
+        self._open_stall: Optional[Dict] = None
+        self._stalled_beat = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._halt = threading.Event()
+
+    def start(self):
+        if self._task is not None or not self.settings.loop_monitor_enabled:
+            return
+        self._thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._halt.clear()
+        self._task = asyncio.create_task(self._sample())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def _sample(self):
+        loop = asyncio.get_running_loop()
+        interval = self.settings.loop_sample_sec
+        while True:
+            expected = loop.time() + interval
+            await asyncio.sleep(interval)
+            lag = max(0.0, loop.time() - expected)
+            self.last_lag_sec = lag
+            self.lag.record(lag)
+            if self.metrics:
+                self.metrics.loop_lag(lag)
+            stall = self._open_stall
+            if stall is not None:
+                stall["blockedMs"] = round(lag * 1000, 3)
+                self._open_stall = None
+            self._beat = time.monotonic()
+
+    def _watch(self):
+        interval = self.settings.loop_sample_sec
+        threshold = self.settings.loop_stall_threshold_sec
+        while not self._halt.wait(threshold / 2):
+            beat = self._beat
+            blocked = time.monotonic() - beat - interval
+            if blocked < threshold or beat == self._stalled_beat:
+                continue
+            # First sighting of this stall: the loop thread is still inside the blocking call
+            self._stalled_beat = beat
+            stall = {"ts": clock.now(), "blockedMs": round(blocked * 1000, 3), "stack": self._stack()}
+            self.stalls.append(stall)
+            self.stall_count += 1
+            self._open_stall = stall
+            if self.metrics:
+                self.metrics.loop_stall()
+
+    def _stack(self) -> List[str]:
+        frame = sys._current_frames().get(self._thread_id)
+        if frame is None:
+            return []
+        summary = traceback.StackSummary.extract(traceback.walk_stack(frame), limit=STACK_LIMIT, lookup_lines=False)
+        return [f"{os.path.basename(f.filename)}:{f.lineno} {f.name}" for f in reversed(summary)]
+
+    async def stop(self):
+        self.stop_profiler()
+        self._halt.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+    def start_profiler(self, interval_ms: Optional[float] = None, duration_sec: Optional[float] = None) -> Dict:
+        if self.profiler and self.profiler.running:
+            raise ValueError("A profile is already running")
+        interval = (interval_ms or self.settings.profiler_interval_ms) / 1000
+        duration = min(duration_sec or self.settings.profiler_max_sec, self.settings.profiler_max_sec)
+        # Called from a request handler, so this is the event loop's thread
+        self.profiler = SamplingProfiler(threading.get_ident(), interval, duration)
+        self.profiler.start()
+        return self.profiler.stats()
+
+    def stop_profiler(self) -> Optional[str]:
+        if self.profiler is None:
+            return None
+        self.profiler.stop()
+        return self.profiler.collapsed()
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self._task is not None,
+            "lastLagMs": round(self.last_lag_sec * 1000, 3),
+            "lagP50Ms": round(self.lag.percentile(0.5) * 1000, 3),
+            "lagP99Ms": round(self.lag.percentile(0.99) * 1000, 3),
+            "lagMaxMs": round(self.lag.max_us / 1000, 3),
+            "stalls": self.stall_count,
+            "stallThresholdMs": round(self.settings.loop_stall_threshold_sec * 1000, 3),
+            "profiling": bool(self.profiler and self.profiler.running),
+        }
+
+    def report(self) -> Dict:
+        return {
+            **self.stats(),
+            "lag": self.lag.summary(),
+            "recentStalls": list(self.stalls),
+            "profiler": self.profiler.stats() if self.profiler else None,
+        }
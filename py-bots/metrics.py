@@ -0,0 +1,175 @@
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+LATENCY_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Request instrumentation for the bot fleet, rendered in the Prometheus text
+# exposition format. Recording is a dict lookup, a bisect and a few integer adds.
+class BotMetrics:
+    def __init__(self):
+        # endpoint -> per-bucket counts (non-cumulative, last slot is +Inf), sum of seconds
+        self.latency: Dict[str, List[int]] = {}
+        self.latency_sum: Dict[str, float] = {}
+        self.responses: Dict[Tuple[str, str], int] = {}
+        self.retries: Dict[str, int] = {}
+        self.token_refreshes: Dict[str, int] = {}
+        # Event-loop lag per-bucket counts (same layout as latency) and blocked-loop stalls
+        self.loop_lag_counts: List[int] = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.loop_lag_sum = 0.0
+        self.loop_stalls = 0
+        self.action_timeouts: Dict[str, int] = {}
+        self.circuit_opens: Dict[str, int] = {}
+        self.circuit_rejections: Dict[str, int] = {}
+
+    def observe(self, endpoint: str, status, seconds: float):
+        counts = self.latency.get(endpoint)
+        if counts is None:
+            counts = self.latency[endpoint] = [0] * (len(LATENCY_BUCKETS) + 1)
+            self.latency_sum[endpoint] = 0.0
+        counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.latency_sum[endpoint] += seconds
+        key = (endpoint, str(status))
+        self.responses[key] = self.responses.get(key, 0) + 1
+
+    def retry(self, operation: str):
+        self.retries[operation] = self.retries.get(operation, 0) + 1
+
+    def token_refresh(self, result: str):
+        self.token_refreshes[result] = self.token_refreshes.get(result, 0) + 1
+
+    def loop_lag(self, seconds: float):
+        self.loop_lag_counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.loop_lag_sum += seconds
+
+    def loop_stall(self):
+        self.loop_stalls += 1
+
+    def action_timeout(self, action: str):
+        self.action_timeouts[action] = self.action_timeouts.get(action, 0) + 1
+
+    def circuit_opened(self, group: str):
+        self.circuit_opens[group] = self.circuit_opens.get(group, 0) + 1
+
+    def circuit_rejected(self, group: str):
+        self.circuit_rejections[group] = self.circuit_rejections.get(group, 0) + 1
+
+    def snapshot(self) -> Dict:
+        return {
+            "latency": self.latency,
+            "latencySum": self.latency_sum,
+            "responses": [[e, s, c] for (e, s), c in self.responses.items()],
+            "retries": self.retries,
+            "tokenRefreshes": self.token_refreshes,
+            "loopLag": self.loop_lag_counts,
+            "loopLagSum": self.loop_lag_sum,
+            "loopStalls": self.loop_stalls,
+            "actionTimeouts": self.action_timeouts,
+            "circuitOpens": self.circuit_opens,
+            "circuitRejections": self.circuit_rejections,
+        }
+
+    def merge(self, snapshot: Dict):
+        for endpoint, counts in snapshot.get("latency", {}).items():
+            mine = self.latency.setdefault(endpoint, [0] * len(counts))
+            for i, count in enumerate(counts):
+                mine[i] += count
+            self.latency_sum[endpoint] = self.latency_sum.get(endpoint, 0.0) + snapshot["latencySum"][endpoint]
+        for endpoint, status, count in snapshot.get("responses", []):
+            self.responses[(endpoint, status)] = self.responses.get((endpoint, status), 0) + count
+        for operation, count in snapshot.get("retries", {}).items():
+            self.retries[operation] = self.retries.get(operation, 0) + count
+        for result, count in snapshot.get("tokenRefreshes", {}).items():
+            self.token_refreshes[result] = self.token_refreshes.get(result, 0) + count
+        for i, count in enumerate(snapshot.get("loopLag", [])):
+            self.loop_lag_counts[i] += count
+        self.loop_lag_sum += snapshot.get("loopLagSum", 0.0)
+        self.loop_stalls += snapshot.get("loopStalls", 0)
+        for action, count in snapshot.get("actionTimeouts", {}).items():
+            self.action_timeouts[action] = self.action_timeouts.get(action, 0) + count
+        for group, count in snapshot.get("circuitOpens", {}).items():
+            self.circuit_opens[group] = self.circuit_opens.get(group, 0) + count
+        for group, count in snapshot.get("circuitRejections", {}).items():
+            self.circuit_rejections[group] = self.circuit_rejections.get(group, 0) + count
+
+    def render(self, fleet: Dict[str, int]) -> str:
+        lines = [
+            "# HELP pybots_http_request_duration_seconds Bot HTTP request latency by endpoint.",
+            "# TYPE pybots_http_request_duration_seconds histogram",
+        ]
+        for endpoint in sorted(self.latency):
+            name = _label(endpoint)
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), self.latency[endpoint]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'pybots_http_request_duration_seconds_bucket{{endpoint="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'pybots_http_request_duration_seconds_sum{{endpoint="{name}"}} {self.latency_sum[endpoint]}')
+            lines.append(f'pybots_http_request_duration_seconds_count{{endpoint="{name}"}} {cumulative}')
+
+        lines += [
+            "# HELP pybots_http_responses_total Bot HTTP responses by endpoint and status code.",
+            "# TYPE pybots_http_responses_total counter",
+        ]
+        for (endpoint, status), count in sorted(self.responses.items()):
+            lines.append(f'pybots_http_responses_total{{endpoint="{_label(endpoint)}",status="{_label(status)}"}} {count}')
+
+        lines += [
+            "# HELP pybots_retries_total Retries performed by retrying bot operations.",
+            "# TYPE pybots_retries_total counter",
+        ]
+        for operation, count in sorted(self.retries.items()):
+            lines.append(f'pybots_retries_total{{operation="{_label(operation)}"}} {count}')
+
+        lines += [
+            "# HELP pybots_token_refreshes_total Logins against identity by result.",
+            "# TYPE pybots_token_refreshes_total counter",
+        ]
+        for result, count in sorted(self.token_refreshes.items()):
+            lines.append(f'pybots_token_refreshes_total{{result="{_label(result)}"}} {count}')
+
+        lines += [
+            "# HELP pybots_event_loop_lag_seconds How late the event loop woke a task sleeping loop_sample_sec.",
+            "# TYPE pybots_event_loop_lag_seconds histogram",
+        ]
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), self.loop_lag_counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'pybots_event_loop_lag_seconds_bucket{{le="{le}"}} {cumulative}')
+        lines.append(f"pybots_event_loop_lag_seconds_sum {self.loop_lag_sum}")
+        lines.append(f"pybots_event_loop_lag_seconds_count {cumulative}")
+        lines += [
+            "# HELP pybots_event_loop_stalls_total Times the event loop went unserviced past loop_stall_threshold_sec.",
+            "# TYPE pybots_event_loop_stalls_total counter",
+            f"pybots_event_loop_stalls_total {self.loop_stalls}",
+            "# HELP pybots_action_timeouts_total Bot actions cancelled at their deadline.",
+            "# TYPE pybots_action_timeouts_total counter",
+        ]
+        for action, count in sorted(self.action_timeouts.items()):
+            lines.append(f'pybots_action_timeouts_total{{action="{_label(action)}"}} {count}')
+        lines += [
+            "# HELP pybots_circuit_opens_total Times an endpoint group's circuit breaker opened.",
+            "# TYPE pybots_circuit_opens_total counter",
+        ]
+        for group, count in sorted(self.circuit_opens.items()):
+            lines.append(f'pybots_circuit_opens_total{{group="{_label(group)}"}} {count}')
+        lines += [
+            "# HELP pybots_circuit_rejections_total Calls failed fast by an open circuit breaker.",
+            "# TYPE pybots_circuit_rejections_total counter",
+        ]
+        for group, count in sorted(self.circuit_rejections.items()):
+            lines.append(f'pybots_circuit_rejections_total{{group="{_label(group)}"}} {count}')
+
+        for name, value in sorted(fleet.items()):
+            kind = "gauge" if name == "bots" else "counter"
+            metric = f"pybots_{name}" if kind == "gauge" else f"pybots_{name}_total"
+            lines.append(f"# TYPE {metric} {kind}")
+            lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,76 @@
+from typing import Dict, Iterable, Optional
+
+import clock
+from config import Settings
+
+
+# Per-bot view of the caller's progress profile. Server responses that carry a
+# profile (progress/me, progress/award, progress/mystery) are authoritative;
+# placed bids are applied locally the way the bidding service holds funds
+# (only the raise over this bot's previous bid on the auction is deducted).
+# Settled auctions release holds server-side without telling us, so a local
+# estimate is re-validated before it is trusted to trigger a top-up.
+class ProfileCache:
+    __slots__ = (
+        "settings",
+        "balance",
+        "validated_at",
+        "estimated",
+        "_held",
+        "hits",
+        "refreshes",
+        "local_updates",
+        "divergences",
+    )
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.balance: Optional[int] = None
+        self.validated_at: float = 0
+        # True once local bid deductions have been applied since the last server value
+        self.estimated = False
+        # Created on the first bid; most bots in a large fleet have none outstanding
+        self._held: Optional[Dict[str, int]] = None
+        self.hits = 0
+        self.refreshes = 0
+        self.local_updates = 0
+        self.divergences = 0
+
+    def needs_refresh(self) -> bool:
+        return self.balance is None or clock.now() - self.validated_at >= self.settings.profile_cache_ttl_sec
+
+    def update(self, profile: Optional[Dict]):
+        if not isinstance(profile, dict) or "flogBalance" not in profile:
+            return
+        balance = profile["flogBalance"]
+        if self.estimated and balance != self.balance:
+            self.divergences += 1
+        self.balance = balance
+        self.validated_at = clock.now()
+        self.estimated = False
+
+    def bid_placed(self, auction_id: str, amount: int):
+        held = self._held
+        if held is None:
+            held = self._held = {}
+        previous = held.get(auction_id, 0)
+        delta = max(0, amount - previous)
+        held[auction_id] = max(amount, previous)
+        if self.balance is not None and delta:
+            self.balance = max(0, self.balance - delta)
+            self.estimated = True
+            self.local_updates += 1
+
+    def prune(self, live_ids: Iterable[str]):
+        if not self._held:
+            return
+        live = set(live_ids)
+        self._held = {k: v for k, v in self._held.items() if k in live}
+
+    def stats(self) -> Dict:
+        return {
+            "hits": self.hits,
+            "refreshes": self.refreshes,
+            "localUpdates": self.local_updates,
+            "divergences": self.divergences,
+        }
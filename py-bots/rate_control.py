@@ -0,0 +1,89 @@
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+import clock
+from config import Settings
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - clock.now())
+    except (TypeError, ValueError):
+        return None
+
+
+# AIMD controller for the whole fleet. Every response feeds a short window; when
+# 429/5xx/transport errors or slow responses exceed their thresholds the allowed
+# fraction of scheduled work is cut multiplicatively, otherwise it recovers
+# additively. Retry-After pauses all scheduled actions until it expires.
+class AdaptiveRateController:
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.factor = 1.0
+        self.blocked_until: float = 0
+        self.decreases = 0
+        self.increases = 0
+        self.throttled = 0
+        self.deferred = 0
+        self._window_started = clock.now()
+        self._requests = 0
+        self._errors = 0
+        self._slow = 0
+        self.last_window: Dict = {}
+
+    def observe(self, status, seconds: float, retry_after: Optional[str] = None):
+        self._requests += 1
+        if status == "error" or status == 429 or (isinstance(status, int) and status >= 500):
+            self._errors += 1
+        if seconds > self.settings.rate_latency_target_sec:
+            self._slow += 1
+        pause = parse_retry_after(retry_after)
+        if pause:
+            now = clock.now()
+            self.blocked_until = max(self.blocked_until, now + min(pause, self.settings.rate_max_retry_after_sec))
+        if clock.now() - self._window_started >= self.settings.rate_window_sec:
+            self._adjust()
+
+    def _adjust(self):
+        s = self.settings
+        if self._requests:
+            error_rate = self._errors / self._requests
+            slow_rate = self._slow / self._requests
+            overloaded = error_rate > s.rate_error_threshold or slow_rate > s.rate_slow_threshold
+            # Cut only on a meaningful sample, but let a throttled fleet recover on few requests
+            if overloaded and self._requests >= s.rate_min_samples:
+                self.factor = max(s.rate_min_factor, self.factor * s.rate_decrease_factor)
+                self.decreases += 1
+            elif not overloaded and self.factor < 1.0:
+                self.factor = min(1.0, self.factor + s.rate_increase_step)
+                self.increases += 1
+            self.last_window = {
+                "requests": self._requests,
+                "errorRate": round(error_rate, 4),
+                "slowRate": round(slow_rate, 4),
+            }
+        self._window_started = clock.now()
+        self._requests = self._errors = self._slow = 0
+
+    def blocked_for(self) -> float:
+        return max(0.0, self.blocked_until - clock.now())
+
+    def stats(self, bots: int) -> Dict:
+        s = self.settings
+        return {
+            "enabled": s.rate_control_enabled,
+            "factor": round(self.factor, 4),
+            "effectiveBidRatePerMin": round(s.bid_rate_per_min * self.factor * bots, 3),
+            "effectiveCreateRatePerMin": round(s.create_rate_per_min * self.factor * bots, 3),
+            "blockedForSec": round(self.blocked_for(), 3),
+            "decreases": self.decreases,
+            "increases": self.increases,
+            "throttled": self.throttled,
+            "deferred": self.deferred,
+            "lastWindow": self.last_window,
+        }
@@ -0,0 +1,202 @@
+import asyncio
+import heapq
+import logging
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import clock
+from config import Settings
+from histogram import LatencyHistogram
+from rate_control import AdaptiveRateController
+
+if TYPE_CHECKING:
+    from bot import AuctionBot
+
+# Scheduled action -> AuctionBot coroutine method
+ACTIONS: Dict[str, str] = {
+    "topup": "top_up_if_needed",
+    "daily": "claim_daily",
+    "mystery": "open_mystery",
+    "create": "create_auction",
+    "bid": "bid_once",
+}
+
+# Actions thinned by the adaptive rate controller; daily and mystery are cooldowns, not rates
+THROTTLED_ACTIONS = {"bid", "create", "topup"}
+
+# How long stop() waits for workers to finish their cancelled actions
+STOP_TIMEOUT_SEC = 5.0
+
+
+# Single timer heap for the whole fleet. Each bot action sits in the heap at its
+# next due time, so idle bots cost nothing and one task wakes only when work is due.
+# Due actions are handed to a fixed pool of scheduler_workers coroutines rather
+# than a task each, so neither fleet size nor a burst of due work adds tasks.
+class BotScheduler:
+    def __init__(self, settings: Settings, rate: Optional[AdaptiveRateController] = None):
+        self.settings = settings
+        self.rate = rate
+        # (due, action, bot): the smallest entry that orders deterministically, bots breaking ties by name
+        self._heap: List[Tuple[float, str, "AuctionBot"]] = []
+        # Bumped by reschedule(), which rebuilds the heap; in-flight actions from older generations are dropped
+        self._generation = 0
+        self._wake: Optional[asyncio.Event] = None
+        self._ready: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self.busy = 0
+        self.running = False
+        self.wakeups = 0
+        self.actions_run = 0
+        # Wall time of each action, gateway round-trips included
+        self.durations: Dict[str, LatencyHistogram] = {}
+
+    def next_delay(self, bot: "AuctionBot", action: str) -> Optional[float]:
+        s = self.settings
+        if action == "bid":
+            rate = s.bid_rate_per_min / 60
+            return bot.rng.expovariate(rate) if rate > 0 else None
+        if action == "create":
+            rate = s.create_rate_per_min / 60
+            return bot.rng.expovariate(rate) if rate > 0 else None
+        if action == "mystery":
+            return s.mystery_interval_min * 60 + bot.rng.uniform(0, s.schedule_spread_sec)
+        if action == "daily":
+            return s.daily_interval_hours * 3600 + bot.rng.uniform(0, s.schedule_spread_sec)
+        if action == "topup":
+            return s.topup_interval_sec + bot.rng.uniform(0, s.schedule_spread_sec) if s.auto_topup else None
+        return None
+
+    def initial_delay(self, bot: "AuctionBot", action: str) -> Optional[float]:
+        now = clock.now()
+        spread = bot.rng.uniform(0, self.settings.schedule_spread_sec)
+        if action == "daily":
+            return max(0, bot.last_daily + self.settings.daily_interval_hours * 3600 - now) + spread
+        if action == "mystery":
+            return max(0, bot.last_mystery + self.settings.mystery_interval_min * 60 - now) + spread
+        if action == "topup":
+            return spread if self.settings.auto_topup else None
+        return self.next_delay(bot, action)
+
+    def add(self, bot: "AuctionBot"):
+        for action in ACTIONS:
+            delay = self.initial_delay(bot, action)
+            if delay is not None:
+                self._push(clock.now() + delay, bot, action)
+
+    def reschedule(self, bots: List["AuctionBot"]):
+        self._generation += 1
+        self._heap = []
+        for bot in bots:
+            self.add(bot)
+        if self._wake:
+            self._wake.set()
+
+    def _push(self, due: float, bot: "AuctionBot", action: str):
+        was_first = not self._heap or due < self._heap[0][0]
+        heapq.heappush(self._heap, (due, action, bot))
+        if was_first and self._wake:
+            self._wake.set()
+
+    async def run(self):
+        self.running = True
+        self._wake = asyncio.Event()
+        self._ready = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._work()) for _ in range(max(1, self.settings.scheduler_workers))]
+        while self.running:
+            now = clock.now()
+            while self._heap and self._heap[0][0] <= now:
+                _, action, bot = heapq.heappop(self._heap)
+                if bot.retired:
+                    continue
+                if self.rate and self.settings.rate_control_enabled and self._hold(bot, action, now):
+                    continue
+                self._ready.put_nowait((bot, action, self._generation))
+            timeout = self._heap[0][0] - now if self._heap else None
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeups += 1
+
+    def _hold(self, bot: "AuctionBot", action: str, now: float) -> bool:
+        blocked_for = self.rate.blocked_for()
+        if blocked_for > 0:
+            # Honour Retry-After, spreading the resumed work over the jitter window
+            self.rate.deferred += 1
+            self._push(now + blocked_for + bot.rng.uniform(0, self.settings.schedule_spread_sec), bot, action)
+            return True
+        # Thinning a Poisson stream by the controller factor scales its rate by that factor
+        if action in THROTTLED_ACTIONS and bot.rng.random() > self.rate.factor:
+            self.rate.throttled += 1
+            delay = self.next_delay(bot, action)
+            if delay is not None:
+                self._push(now + delay, bot, action)
+            return True
+        return False
+
+    async def _work(self):
+        ready = self._ready
+        # A cancelled action can swallow the cancellation, so the loop also ends on
+        # stop()'s flag or sentinel rather than relying on cancel() alone
+        while self.running:
+            item = await ready.get()
+            if item is None:
+                return
+            bot, action, generation = item
+            if generation != self._generation:
+                continue
+            self.busy += 1
+            try:
+                await self._run_action(bot, action, generation)
+            finally:
+                self.busy -= 1
+
+    async def _run_action(self, bot: "AuctionBot", action: str, generation: int):
+        started = time.perf_counter()
+        try:
+            await bot.run_action(action)
+        except Exception as exc:
+            bot.stats.failures += 1
+            bot.stats.last_error = str(exc)
+        finally:
+            elapsed = time.perf_counter() - started
+            bot.record_tick(elapsed)
+            durations = self.durations.get(action)
+            if durations is None:
+                durations = self.durations[action] = LatencyHistogram()
+            durations.record(elapsed)
+            self.actions_run += 1
+            if self.running and not bot.retired and generation == self._generation:
+                delay = self.next_delay(bot, action)
+                if delay is not None:
+                    self._push(clock.now() + delay, bot, action)
+
+    async def stop(self):
+        self.running = False
+        if self._wake:
+            self._wake.set()
+        workers, self._workers = self._workers, []
+        for _ in workers:
+            self._ready.put_nowait(None)
+        for task in workers:
+            task.cancel()
+        if workers:
+            _, pending = await asyncio.wait(workers, timeout=STOP_TIMEOUT_SEC)
+            if pending:
+                logging.warning("%d scheduler workers still busy %.0fs after stop; abandoning them", len(pending), STOP_TIMEOUT_SEC)
+        self._heap = []
+
+    def action_durations(self) -> Dict[str, Dict]:
+        return {action: histogram.summary() for action, histogram in sorted(self.durations.items())}
+
+    def stats(self) -> Dict:
+        return {
+            "scheduled": len(self._heap),
+            "inFlight": self.busy,
+            "queued": self._ready.qsize() if self._ready else 0,
+            "workers": len(self._workers),
+            "nextDueInSec": round(self._heap[0][0] - clock.now(), 3) if self._heap else None,
+            "actionsRun": self.actions_run,
+            "wakeups": self.wakeups,
+        }
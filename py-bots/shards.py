@@ -0,0 +1,300 @@
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Connection
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import Settings
+
+# Keys in per-shard stats that are not counters and must not be summed
+_MAX_KEYS = {
+    "ageSec",
+    "fullSyncAgeSec",
+    "stalenessBoundSec",
+    "deletionStalenessBoundSec",
+    "ttlSec",
+    "blockedForSec",
+    "lastCheckpointMs",
+    "loadMs",
+    "lastLagMs",
+    "lagP50Ms",
+    "lagP99Ms",
+    "lagMaxMs",
+    "stallThresholdMs",
+    "botLimit",
+    "retryInSec",
+}
+_MIN_KEYS = {"nextDueInSec", "factor"}
+
+# How often each end checks its pipe, so on-demand requests are answered promptly
+_POLL_SEC = 0.05
+# How long a per-bot status request waits for the shards' replies
+_BOTS_REPLY_TIMEOUT_SEC = 5.0
+
+
+def merge_stats(parts: List[Optional[Dict]]) -> Optional[Dict]:
+    parts = [p for p in parts if p]
+    if not parts:
+        return None
+    merged: Dict = {}
+    for part in parts:
+        for key, value in part.items():
+            if value is None or isinstance(value, bool) or not isinstance(value, (int, float)):
+                merged.setdefault(key, value)
+                continue
+            current = merged.get(key)
+            if current is None:
+                merged[key] = value
+            elif key in _MAX_KEYS:
+                merged[key] = max(current, value)
+            elif key in _MIN_KEYS:
+                merged[key] = min(current, value)
+            else:
+                merged[key] = current + value
+    if "hits" in merged and "misses" in merged:
+        lookups = merged["hits"] + merged["misses"]
+        merged["hitRatio"] = round(merged["hits"] / lookups, 4) if lookups else None
+    if "requests" in merged and "connectionsOpened" in merged:
+        requests = merged["requests"]
+        merged["reuseRatio"] = round(1 - merged["connectionsOpened"] / requests, 4) if requests else None
+    return merged
+
+
+class Shard:
+    def __init__(self, index: int, users: List[str], process: multiprocessing.Process, conn: Connection):
+        self.index = index
+        self.users = users
+        self.process = process
+        self.conn = conn
+        self.report: Dict = {}
+        self.reported_at: float = 0
+        self.alive = True
+
+    def summary(self) -> Dict:
+        return {
+            "index": self.index,
+            "pid": self.process.pid,
+            "alive": self.alive and self.process.is_alive(),
+            "bots": len(self.users),
+            "lastReportAgeSec": round(time.time() - self.reported_at, 3) if self.reported_at else None,
+        }
+
+
+# Runs bot_users across worker processes, each with its own event loop, HTTP
+# client and BotManager. Reports and commands travel as small dicts over pipes:
+# periodic reports carry fleet totals, section stats and new activity only, and
+# per-bot rows are fetched from the shards when /admin/bots/status asks.
+class ShardPool:
+    def __init__(self, settings: Settings, record_activity: Callable[[float, str, str, dict], None]):
+        self.settings = settings
+        self.record_activity = record_activity
+        self.shards: List[Shard] = []
+        self._reader: Optional[asyncio.Task] = None
+        self._request_ids = itertools.count(1)
+        self._replies: Dict[Tuple[int, int], asyncio.Future] = {}
+
+    async def start(self, users: List[str]):
+        ctx = multiprocessing.get_context("spawn")
+        count = max(1, min(self.settings.shards, len(users)))
+        for index in range(count):
+            shard_users = users[index::count]
+            values = self.settings.dict()
+            values["bot_users"] = ",".join(shard_users)
+            values["shards"] = 1
+            if values.get("token_cache_path"):
+                values["token_cache_path"] = f"{values['token_cache_path']}.shard{index}"
+            parent_conn, child_conn = ctx.Pipe()
+            process = ctx.Process(
+                target=shard_main, args=(values, child_conn), name=f"bot-shard-{index}", daemon=True
+            )
+            process.start()
+            child_conn.close()
+            self.shards.append(Shard(index, shard_users, process, parent_conn))
+        self._reader = asyncio.create_task(self._read_loop())
+
+    async def _read_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            for shard in self.shards:
+                if not shard.alive:
+                    continue
+                try:
+                    while shard.conn.poll():
+                        # Unpickled off the loop; a per-bot reply can be large
+                        self._handle(shard, await loop.run_in_executor(None, shard.conn.recv))
+                except (EOFError, OSError):
+                    shard.alive = False
+                    logging.warning("Bot shard %s exited", shard.index)
+            await asyncio.sleep(_POLL_SEC)
+
+    def _handle(self, shard: Shard, message: Dict):
+        kind = message.get("type")
+        if kind == "bots":
+            reply = self._replies.pop((shard.index, message["id"]), None)
+            if reply and not reply.done():
+                reply.set_result(message["bots"])
+            return
+        if kind != "report":
+            return
+        for entry in message.pop("activity", []):
+            self.record_activity(entry["ts"], entry["bot"], entry["event"], entry["data"])
+        shard.report = message
+        shard.reported_at = time.time()
+
+    def _send(self, shard: Shard, message: Dict) -> bool:
+        if not shard.alive:
+            return False
+        try:
+            shard.conn.send(message)
+        except (BrokenPipeError, OSError):
+            shard.alive = False
+            return False
+        return True
+
+    def send(self, message: Dict):
+        for shard in self.shards:
+            self._send(shard, message)
+
+    # Moves users between shard lists without restarting anything: removed users
+    # leave their shard, added ones join the live shard running the fewest bots
+    def rebalance(self, users: List[str]) -> Tuple[int, int]:
+        wanted = dict.fromkeys(users)
+        removed = 0
+        for shard in self.shards:
+            kept = [u for u in shard.users if u in wanted]
+            removed += len(shard.users) - len(kept)
+            shard.users = kept
+        assigned = {u for shard in self.shards for u in shard.users}
+        added = [u for u in wanted if u not in assigned]
+        targets = [s for s in self.shards if s.alive] or self.shards
+        for user in added:
+            min(targets, key=lambda s: len(s.users)).users.append(user)
+        return len(added), removed
+
+    async def apply_config(self, updates: Dict):
+        for shard in self.shards:
+            shard_updates = dict(updates)
+            if "bot_users" in updates:
+                shard_updates["bot_users"] = ",".join(shard.users)
+            self._send(shard, {"type": "config", "updates": shard_updates})
+
+    async def stop(self):
+        self.send({"type": "stop"})
+        if self._reader:
+            self._reader.cancel()
+            self._reader = None
+        loop = asyncio.get_running_loop()
+        for shard in self.shards:
+            await loop.run_in_executor(None, shard.process.join, 10)
+            if shard.process.is_alive():
+                shard.process.terminate()
+            shard.conn.close()
+        self.shards = []
+        for reply in self._replies.values():
+            reply.cancel()
+        self._replies = {}
+
+    # Per-bot rows from every live shard; a shard that does not answer in time is left out
+    async def bot_status(self) -> List[Dict]:
+        loop = asyncio.get_running_loop()
+        request_id = next(self._request_ids)
+        waits = []
+        for shard in self.shards:
+            key = (shard.index, request_id)
+            reply = self._replies[key] = loop.create_future()
+            if self._send(shard, {"type": "bots", "id": request_id}):
+                waits.append(reply)
+            else:
+                del self._replies[key]
+        if waits:
+            await asyncio.wait(waits, timeout=_BOTS_REPLY_TIMEOUT_SEC)
+        for shard in self.shards:
+            self._replies.pop((shard.index, request_id), None)
+        return [bot for reply in waits if reply.done() and not reply.cancelled() for bot in reply.result()]
+
+    def fleet_totals(self) -> Dict:
+        return merge_stats([s.report.get("fleet") for s in self.shards]) or {}
+
+    # Per endpoint group; each shard has its own breakers, so states can differ between shards
+    def _breakers(self) -> Dict:
+        reports = [s.report.get("circuitBreakers") or {} for s in self.shards]
+        groups = sorted({group for report in reports for group in report})
+        return {
+            group: {
+                **merge_stats([report.get(group) for report in reports]),
+                "shardStates": [report.get(group, {}).get("state") for report in reports],
+            }
+            for group in groups
+        }
+
+    def report(self) -> Dict:
+        return {
+            "tokens": merge_stats([s.report.get("tokens") for s in self.shards]),
+            "auctionCache": merge_stats([s.report.get("auctionCache") for s in self.shards]),
+            "scheduler": merge_stats([s.report.get("scheduler") for s in self.shards]),
+            "httpPool": merge_stats([s.report.get("httpPool") for s in self.shards]),
+            "rateControl": merge_stats([s.report.get("rateControl") for s in self.shards]),
+            "bidPipeline": merge_stats([s.report.get("bidPipeline") for s in self.shards]),
+            "actionLimits": merge_stats([s.report.get("actionLimits") for s in self.shards]),
+            "circuitBreakers": self._breakers(),
+            "profileCache": merge_stats([s.report.get("profileCache") for s in self.shards]),
+            "state": merge_stats([s.report.get("state") for s in self.shards]),
+            "loop": merge_stats([s.report.get("loop") for s in self.shards]),
+            "shards": [s.summary() for s in self.shards],
+        }
+
+
+def shard_main(values: Dict, conn: Connection):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    try:
+        asyncio.run(_shard_loop(Settings(**values), conn))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        conn.close()
+
+
+async def _shard_loop(settings: Settings, conn: Connection):
+    from bot_manager import BotManager
+
+    manager = BotManager(settings)
+    outbox: List[dict] = []
+    manager.activity_listeners.append(outbox.append)
+    await manager.start()
+    loop = asyncio.get_running_loop()
+    # One sender thread: pickling and pipe writes stay off the loop and in order
+    sender = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shard-send")
+    next_report = 0.0
+    try:
+        while True:
+            while conn.poll():
+                message = conn.recv()
+                kind = message.get("type")
+                if kind == "stop":
+                    return
+                if kind == "config":
+                    try:
+                        await manager.apply_config(message["updates"])
+                    except ValueError as exc:
+                        logging.error("Rejected config update: %s", exc)
+                elif kind == "bots":
+                    reply = {"type": "bots", "id": message["id"], "bots": await manager.status()}
+                    await loop.run_in_executor(sender, conn.send, reply)
+            if loop.time() >= next_report:
+                next_report = loop.time() + settings.shard_report_sec
+                report = manager.summary_report()
+                report["type"] = "report"
+                report["fleet"] = manager.fleet_totals()
+                report["metrics"] = manager.metrics.snapshot()
+                report["activity"] = outbox[:]
+                outbox.clear()
+                await loop.run_in_executor(sender, conn.send, report)
+            await asyncio.sleep(_POLL_SEC)
+    except (EOFError, BrokenPipeError):
+        pass
+    finally:
+        sender.shutdown(wait=False)
+        await manager.stop()
@@ -0,0 +1,231 @@
+import asyncio
+import bisect
+import heapq
+import itertools
+import json
+import random
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+import httpx
+
+import clock
+from auction_cache import format_timestamp, parse_timestamp
+
+# Gold from progress/mystery, weighted the way the bidding service rolls rarity
+MYSTERY_GOLD: Tuple[int, ...] = (10, 10, 10, 10, 10, 25, 25, 25, 60, 150)
+
+DAILY_LOGIN_GOLD = 25
+STARTING_BALANCE = 500
+TOKEN_LIFETIME_SEC = 3600
+# How long finished auctions stay visible to ?date= deltas
+FINISHED_RETENTION_SEC = 3600
+
+
+# In-process stand-in for the gateway and identity endpoints the bots call
+# (connect/token, auctions, bids, progress/*), for simulation runs. Auctions
+# finish at auctionEnd and bid holds are settled like the bidding service
+# does: the winner's hold is kept, everyone else is refunded. Like
+# AuctionService, a new high bid or a finish bumps updatedAt. Changes are kept
+# in an updatedAt-ordered log so ?date= deltas are a bisect, not a scan.
+class SimGateway:
+    def __init__(self, rng: random.Random, latency_sec: float = 0.0):
+        self.rng = rng
+        self.latency_sec = latency_sec
+        self.live: Dict[str, Dict] = {}
+        self.finished = 0
+        self._ends: List[Tuple[float, str]] = []
+        self._log_times: List[float] = []
+        self._log: List[Dict] = []
+        self._compact_at = 1024
+        self._ids = itertools.count(1)
+        self.balances: Dict[str, int] = {}
+        self._holds: Dict[str, Dict[str, int]] = {}
+        self.requests: Dict[str, int] = {}
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        if self.latency_sec:
+            await asyncio.sleep(self.latency_sec)
+        now = clock.now()
+        self._settle(now)
+        key = f"{request.method} {request.url.path.strip('/')}"
+        self.requests[key] = self.requests.get(key, 0) + 1
+        if key == "POST connect/token":
+            return self._token(request)
+        user = self._user(request)
+        if user is None:
+            return httpx.Response(401)
+        if key == "GET auctions":
+            return self._list(request.url.params.get("date"))
+        if key == "POST auctions":
+            return self._create(user, json.loads(request.content), now)
+        if key == "POST bids":
+            params = request.url.params
+            return self._bid(user, params.get("auctionId"), int(params.get("amount", 0)), now)
+        if key == "GET progress/me":
+            return self._progress(user)
+        if key == "POST progress/award":
+            body = json.loads(request.content)
+            gold = DAILY_LOGIN_GOLD if body.get("action") == "daily-login" else int(body.get("amount") or 0)
+            self.balances[user] = self._balance(user) + gold
+            return self._progress(user)
+        if key == "POST progress/mystery":
+            gold = self.rng.choice(MYSTERY_GOLD)
+            self.balances[user] = self._balance(user) + gold
+            return httpx.Response(200, json={"profile": self._profile(user), "goldAwarded": gold})
+        return httpx.Response(404)
+
+    def _token(self, request: httpx.Request) -> httpx.Response:
+        form = parse_qs(request.content.decode())
+        username = form.get("username", [""])[0]
+        if not username:
+            return httpx.Response(400, json={"error": "invalid_grant"})
+        return httpx.Response(200, json={"access_token": f"sim.{username}", "expires_in": TOKEN_LIFETIME_SEC})
+
+    def _user(self, request: httpx.Request) -> Optional[str]:
+        auth = request.headers.get("authorization", "")
+        return auth[len("Bearer sim."):] if auth.startswith("Bearer sim.") else None
+
+    def _balance(self, user: str) -> int:
+        return self.balances.get(user, STARTING_BALANCE)
+
+    def _profile(self, user: str) -> Dict:
+        return {"username": user, "flogBalance": self._balance(user)}
+
+    def _progress(self, user: str) -> httpx.Response:
+        return httpx.Response(200, json=self._profile(user))
+
+    def _touch(self, auction: Dict, now: float):
+        auction["updatedAt"] = format_timestamp(now)
+        self._log_times.append(now)
+        self._log.append(auction)
+
+    def _list(self, date: Optional[str]) -> httpx.Response:
+        if not date:
+            return httpx.Response(200, json=list(self.live.values()))
+        start = bisect.bisect_right(self._log_times, parse_timestamp(date))
+        # Later entries supersede earlier ones for the same auction
+        changed = {id(a): a for a in self._log[start:]}
+        return httpx.Response(200, json=list(changed.values()))
+
+    def _create(self, user: str, body: Dict, now: float) -> httpx.Response:
+        end = parse_timestamp(body.get("auctionEnd"))
+        if end <= now:
+            return httpx.Response(400, json={"message": "auctionEnd must be in the future"})
+        auction = dict(
+            body,
+            id=f"sim-{next(self._ids)}",
+            seller=user,
+            winner=None,
+            currentHighBid=0,
+            status="Live",
+            createdAt=format_timestamp(now),
+        )
+        self.live[auction["id"]] = auction
+        heapq.heappush(self._ends, (end, auction["id"]))
+        self._touch(auction, now)
+        return httpx.Response(201, json=auction)
+
+    def _bid(self, user: str, auction_id: Optional[str], amount: int, now: float) -> httpx.Response:
+        auction = self.live.get(auction_id)
+        if auction is None:
+            return httpx.Response(400, text="Cannot accept bids on this auction at this time")
+        if auction["seller"] == user:
+            return httpx.Response(400, text="You cannot bid on your own auction")
+        holds = self._holds.setdefault(auction_id, {})
+        delta = max(0, amount - holds.get(user, 0))
+        self.balances[user] = max(0, self._balance(user) - delta)
+        holds[user] = max(amount, holds.get(user, 0))
+        accepted = amount > auction["currentHighBid"]
+        if accepted:
+            auction["currentHighBid"] = amount
+            auction["winner"] = user
+            self._touch(auction, now)
+        status = "Accepted" if accepted else "TooLow"
+        return httpx.Response(200, json={"auctionId": auction_id, "amount": amount, "bidStatus": status})
+
+    def _settle(self, now: float):
+        ends = self._ends
+        while ends and ends[0][0] <= now:
+            _, auction_id = heapq.heappop(ends)
+            auction = self.live.pop(auction_id)
+            auction["status"] = "Finished"
+            for bidder, amount in self._holds.pop(auction_id, {}).items():
+                if bidder != auction["winner"]:
+                    self.balances[bidder] = self._balance(bidder) + amount
+            self._touch(auction, now)
+            self.finished += 1
+        if len(self._log) > self._compact_at:
+            self._compact(now)
+
+    def _compact(self, now: float):
+        # Keep each auction's latest entry, and finished auctions only while a delta could still need them
+        horizon = now - FINISHED_RETENTION_SEC
+        latest = {id(a): (t, a) for t, a in zip(self._log_times, self._log)}
+        kept = sorted(
+            (entry for entry in latest.values() if entry[1]["status"] == "Live" or entry[0] > horizon),
+            key=lambda entry: entry[0],
+        )
+        self._log_times = [t for t, _ in kept]
+        self._log = [a for _, a in kept]
+        self._compact_at = 2 * len(kept) + 1024
+
+    def stats(self) -> Dict:
+        return {
+            "liveAuctions": len(self.live),
+            "finishedAuctions": self.finished,
+            "changeLog": len(self._log),
+            "requests": dict(sorted(self.requests.items())),
+        }
+
+
+# Serves a SimGateway over real HTTP (e.g. under uvicorn) for benchmarks that
+# should exercise sockets and the connection pool rather than a mock transport.
+def asgi_app(gateway: SimGateway):
+    async def app(scope, receive, send):
+        if scope["type"] != "http":
+            return
+        body = b""
+        more = True
+        while more:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body += message.get("body", b"")
+            more = message.get("more_body", False)
+        query = scope.get("query_string", b"").decode()
+        url = f"http://{scope.get('server', ('sim', 80))[0]}{scope['path']}" + (f"?{query}" if query else "")
+        headers = [(k.decode("latin-1"), v.decode("latin-1")) for k, v in scope["headers"]]
+        response = await gateway.handle(httpx.Request(scope["method"], url, headers=headers, content=body))
+        await send(
+            {
+                "type": "http.response.start",
+                "status": response.status_code,
+                "headers": [(k.encode("latin-1"), v.encode("latin-1")) for k, v in response.headers.items()],
+            }
+        )
+        await send({"type": "http.response.body", "body": response.content})
+
+    return app
+
+
+# Stands in for httpx.AsyncClient in simulation runs: requests go straight to the
+# gateway's handler, skipping the client's transport, pool and stream layers,
+# which otherwise hold a simulation to about 1.2k requests per wall second.
+class DirectClient:
+    def __init__(self, gateway: SimGateway):
+        self.gateway = gateway
+        self.requests = 0
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        request = httpx.Request(method, url, **kwargs)
+        self.requests += 1
+        response = await self.gateway.handle(request)
+        response.request = request
+        return response
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self):
+        pass
@@ -0,0 +1,198 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import selectors
+import time
+from typing import Callable, Dict, Optional
+
+import httpx
+
+import clock
+from action_limiter import ActionLimiter
+from auction_cache import AuctionSnapshotCache
+from bid_pipeline import BidPipeline
+from bot import AuctionBot, BotContext
+from circuit_breaker import CircuitBreakers
+from config import Settings
+from http_client import build_client
+from metrics import BotMetrics
+from rate_control import AdaptiveRateController
+from scheduler import BotScheduler
+from sim_gateway import DirectClient, SimGateway
+from token_manager import TokenManager
+
+# Virtual start of every simulated run, so seeded runs produce identical timestamps
+SIM_EPOCH = 1_700_000_000.0
+
+
+class _InstantSelector(selectors.DefaultSelector):
+    def __init__(self):
+        super().__init__()
+        self.advance: Callable[[float], None] = lambda seconds: None
+
+    def select(self, timeout: Optional[float] = None):
+        events = super().select(0)
+        if events or timeout == 0:
+            return events
+        if timeout is None:
+            raise RuntimeError("Simulation stalled: nothing is scheduled and no I/O is pending")
+        # Nothing to do until the next timer: jump straight to it instead of sleeping
+        self.advance(timeout)
+        return events
+
+
+# Event loop on virtual time. Whenever every task is waiting on a timer the loop
+# skips ahead to it, so sleeps, wait_for timeouts and call_later cost nothing.
+class VirtualTimeLoop(asyncio.SelectorEventLoop):
+    def __init__(self):
+        self._virtual_now = 0.0
+        selector = _InstantSelector()
+        super().__init__(selector)
+        selector.advance = self._advance
+
+    def _advance(self, seconds: float):
+        self._virtual_now += seconds
+
+    def time(self) -> float:
+        return self._virtual_now
+
+
+def sim_settings(**overrides) -> Settings:
+    values = {
+        "api_base": "http://gateway.sim/",
+        "identity_url": "http://identity.sim/",
+        "seed": 1,
+        "token_cache_path": "",
+        "state_db_path": "",
+        # Thinning reacts to real response times, which would make seeded runs diverge
+        "rate_control_enabled": False,
+        **overrides,
+    }
+    return Settings(**values)
+
+
+def _digest(gateway: SimGateway, bots) -> str:
+    outcome = {
+        "auctions": sorted((a["id"], a["currentHighBid"], a.get("winner")) for a in gateway.live.values()),
+        "finished": gateway.finished,
+        "balances": sorted(gateway.balances.items()),
+        "bots": [(b.username, b.stats.bids_placed, b.stats.auctions_created, b.stats.mysteries_opened) for b in bots],
+    }
+    return hashlib.sha256(json.dumps(outcome).encode()).hexdigest()[:16]
+
+
+async def _simulate(
+    settings: Settings, bot_count: int, duration_sec: float, latency_sec: float, http_client: bool
+) -> Dict:
+    gateway = SimGateway(random.Random(settings.seed), latency_sec)
+    metrics = BotMetrics()
+    rate = AdaptiveRateController(settings)
+    bids = BidPipeline(settings)
+    breakers = CircuitBreakers(settings, metrics=metrics)
+    tokens = TokenManager(settings, metrics=metrics, breakers=breakers)
+    auctions = AuctionSnapshotCache(settings)
+    limiter = ActionLimiter(settings, metrics=metrics)
+    if http_client:
+        client, counter = build_client(settings, httpx.MockTransport(gateway.handle))
+    else:
+        client = counter = DirectClient(gateway)
+    context = BotContext(
+        settings,
+        client,
+        tokens=tokens,
+        auctions=auctions,
+        metrics=metrics,
+        rate=rate,
+        bids=bids,
+        limiter=limiter,
+        breakers=breakers,
+    )
+    bots = [AuctionBot(f"sim{i:05d}", context) for i in range(bot_count)]
+    scheduler = BotScheduler(settings, rate=rate)
+    for bot in bots:
+        scheduler.add(bot)
+    tasks = [asyncio.create_task(scheduler.run()), asyncio.create_task(tokens.run(lambda: bots))]
+    await asyncio.sleep(duration_sec)
+    await scheduler.stop()
+    await bids.stop()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await client.aclose()
+
+    return {
+        "digest": _digest(gateway, bots),
+        "bidsPlaced": sum(b.stats.bids_placed for b in bots),
+        "auctionsCreated": sum(b.stats.auctions_created for b in bots),
+        "mysteriesOpened": sum(b.stats.mysteries_opened for b in bots),
+        "failures": sum(b.stats.failures for b in bots),
+        "requests": counter.requests,
+        "scheduler": scheduler.stats(),
+        "auctionCache": auctions.stats(),
+        "tokens": tokens.stats(),
+        "bidPipeline": bids.stats(),
+        "actionLimits": limiter.stats(),
+        "circuitBreakers": breakers.stats(),
+        "gateway": gateway.stats(),
+    }
+
+
+def run_simulation(
+    settings: Settings, bot_count: int, duration_sec: float, latency_sec: float = 0.0, http_client: bool = False
+) -> Dict:
+    loop = VirtualTimeLoop()
+    clock.install(lambda: SIM_EPOCH + loop.time())
+    started = time.perf_counter()
+    try:
+        report = loop.run_until_complete(_simulate(settings, bot_count, duration_sec, latency_sec, http_client))
+    finally:
+        clock.reset()
+        loop.close()
+    wall = time.perf_counter() - started
+    return {
+        "bots": bot_count,
+        "seed": settings.seed,
+        "simulatedSec": duration_sec,
+        "httpClient": http_client,
+        "wallSec": round(wall, 3),
+        "speedup": round(duration_sec / wall, 1) if wall else None,
+        "actionsPerWallSec": round(report["scheduler"]["actionsRun"] / wall, 1) if wall else None,
+        "requestsPerWallSec": round(report["requests"] / wall, 1) if wall else None,
+        **report,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the bot fleet against an in-process gateway on virtual time.")
+    # Sized to finish in about a minute at ~4k requests per wall second; a 10k-bot day is hours of wall time
+    parser.add_argument("--bots", type=int, default=1000)
+    parser.add_argument("--hours", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="virtual response time of the fake gateway")
+    parser.add_argument("--bid-rate", type=float, help="bids per bot per minute (default: BID_RATE_PER_MIN)")
+    parser.add_argument("--create-rate", type=float, help="auctions per bot per minute (default: CREATE_RATE_PER_MIN)")
+    parser.add_argument(
+        "--http-client", action="store_true", help="send requests through the real httpx client stack (much slower)"
+    )
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    overrides = {"seed": args.seed}
+    if args.bid_rate is not None:
+        overrides["bid_rate_per_min"] = args.bid_rate
+    if args.create_rate is not None:
+        overrides["create_rate_per_min"] = args.create_rate
+    report = run_simulation(
+        sim_settings(**overrides), args.bots, args.hours * 3600, args.latency_ms / 1000, args.http_client
+    )
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+
+# The bot modules import each other as top-level modules, as when run from py-bots/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import clock  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self, start: float = 1_700_000_000.0):
+        self.value = start
+
+    def __call__(self) -> float:
+        return self.value
+
+    def advance(self, seconds: float):
+        self.value += seconds
+
+
+@pytest.fixture
+def fake_clock():
+    fake = FakeClock()
+    clock.install(fake)
+    yield fake
+    clock.reset()
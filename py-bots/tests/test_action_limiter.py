@@ -0,0 +1,51 @@
+import asyncio
+from types import SimpleNamespace
+
+from action_limiter import ActionLimiter
+from config import Settings
+
+
+def _limiter(**overrides) -> ActionLimiter:
+    return ActionLimiter(Settings(_env_file=None, action_deadline_sec=0, action_deadlines_sec={}, **overrides))
+
+
+def test_per_bot_limit_holds_and_leaves_no_state():
+    async def main():
+        limiter = _limiter(bot_action_concurrency=2, fleet_action_concurrency=0)
+        bot = SimpleNamespace(username="alice")
+        running = peak = 0
+
+        async def call():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        await asyncio.gather(*(limiter.run(bot, "bid", call) for _ in range(10)))
+        return limiter, peak
+
+    limiter, peak = asyncio.run(main())
+    assert peak == 2
+    assert limiter._bot_held == {}
+    assert limiter._bot_waiters == {}
+
+
+def test_cancelled_waiter_gives_up_its_place():
+    async def main():
+        limiter = _limiter(bot_action_concurrency=1, fleet_action_concurrency=0)
+        bot = SimpleNamespace(username="alice")
+        release = asyncio.Event()
+        holder = asyncio.create_task(limiter.run(bot, "bid", release.wait))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(limiter.run(bot, "create", release.wait))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        release.set()
+        await holder
+        return limiter
+
+    limiter = asyncio.run(main())
+    assert limiter._bot_held == {}
+    assert limiter._bot_waiters == {}
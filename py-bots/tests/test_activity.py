@@ -0,0 +1,53 @@
+from activity import ActivityLog
+
+
+def _log(capacity: int = 100, scan_limit: int = 50000) -> ActivityLog:
+    log = ActivityLog(capacity, scan_limit)
+    for i in range(250):
+        log.append(float(i), f"bot{i % 5}", "bid" if i % 10 else "create", {"i": i})
+    return log
+
+
+def test_query_pages_newest_first_over_the_retained_window():
+    log = _log()
+    seen, cursor = [], None
+    while True:
+        events, cursor = log.query(before=cursor, limit=30)
+        seen += [e["seq"] for e in events]
+        if cursor is None:
+            break
+    assert seen == list(range(249, 149, -1))
+
+
+def test_since_resumes_from_its_cursor():
+    log = _log()
+    events, cursor = log.since(200, limit=20)
+    assert [e["seq"] for e in events] == list(range(201, 221))
+    events, cursor = log.since(cursor)
+    assert [e["seq"] for e in events] == list(range(221, 250))
+    assert log.since(cursor) == ([], 249)
+    # A cursor older than the ring starts at the oldest retained entry
+    assert log.since(-1, limit=1)[0][0]["seq"] == 150
+
+
+def test_filtered_reads_stop_at_the_scan_limit_with_a_cursor():
+    log = _log(scan_limit=25)
+    seen, cursor, pages = [], None, 0
+    while True:
+        events, cursor = log.query(before=cursor, limit=100, bot="bot0", event="create")
+        seen += [e["seq"] for e in events]
+        pages += 1
+        if cursor is None:
+            break
+    assert seen == [240, 230, 220, 210, 200, 190, 180, 170, 160, 150]
+    assert pages == 4
+
+    events, cursor = log.since(149, event="create")
+    assert [e["seq"] for e in events] == [150, 160, 170]
+    assert cursor == 174
+
+
+def test_unknown_filter_matches_nothing():
+    log = _log()
+    assert log.query(bot="nobody") == ([], None)
+    assert log.since(0, event="nothing") == ([], 249)
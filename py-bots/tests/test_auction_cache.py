@@ -0,0 +1,62 @@
+import asyncio
+import random
+
+import pytest
+
+from auction_cache import AuctionSnapshotCache, format_timestamp
+from config import Settings
+from sim_gateway import DirectClient, SimGateway
+
+
+def test_failed_refresh_is_shared_until_the_backoff_ends(fake_clock):
+    cache = AuctionSnapshotCache(Settings(_env_file=None, auction_cache_failure_backoff_sec=1.0))
+    calls = []
+
+    async def failing(since):
+        calls.append(since)
+        await asyncio.sleep(0)
+        raise RuntimeError("gateway down")
+
+    async def working(since):
+        calls.append(since)
+        return []
+
+    async def main():
+        results = await asyncio.gather(*(cache.get(failing) for _ in range(10)), return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+        with pytest.raises(RuntimeError):
+            await cache.get(working)
+        fake_clock.advance(1.0)
+        return await cache.get(working)
+
+    assert asyncio.run(main()) == []
+    assert len(calls) == 2
+    assert cache.stats()["refreshFailures"] == 1
+    assert cache.stats()["failureHits"] == 10
+
+
+def test_bid_after_the_full_sync_reaches_the_cache_by_delta(fake_clock):
+    gateway = SimGateway(random.Random(1))
+    client = DirectClient(gateway)
+    cache = AuctionSnapshotCache(Settings(_env_file=None, auction_cache_ttl_sec=2.0, auction_full_sync_sec=300.0))
+    auth = {"authorization": "Bearer sim.alice"}
+
+    async def fetch(since):
+        resp = await client.request("GET", "http://sim/auctions", params={"date": since} if since else None, headers=auth)
+        return resp.json()
+
+    async def main():
+        for minutes in (1, 60):
+            end = format_timestamp(fake_clock() + minutes * 60)
+            await client.request("POST", "http://sim/auctions", json={"auctionEnd": end}, headers=auth)
+        await cache.get(fetch)
+        assert cache.stats()["fullSyncs"] == 1
+        fake_clock.advance(5)
+        bob = {"authorization": "Bearer sim.bob"}
+        await client.request("POST", "http://sim/bids", params={"auctionId": "sim-2", "amount": 700}, headers=bob)
+        fake_clock.advance(60)
+        return {a["id"]: a["currentHighBid"] for a in await cache.get(fetch)}
+
+    assert asyncio.run(main()) == {"sim-2": 700}
+    assert cache.stats()["fullSyncs"] == 1
+    assert cache.stats()["deltaSyncs"] == 1
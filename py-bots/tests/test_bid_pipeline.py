@@ -0,0 +1,56 @@
+import asyncio
+from types import SimpleNamespace
+
+from action_limiter import ActionLimiter
+from bid_pipeline import BidPipeline
+from bot import BotStats
+from config import Settings
+
+
+class StubBot:
+    def __init__(self, username: str, limiter: ActionLimiter, hang: bool = False):
+        self.username = username
+        self.context = SimpleNamespace(limiter=limiter)
+        self.stats = BotStats()
+        self.hang = hang
+        self.sent = []
+
+    async def submit_bid(self, auction_id: str, amount: int):
+        if self.hang:
+            await asyncio.sleep(3600)
+        self.sent.append((auction_id, amount))
+
+
+def _settings() -> Settings:
+    return Settings(_env_file=None, bid_coalesce_window_ms=10, action_deadlines_sec={"bid": 0.05})
+
+
+def test_coalesced_bids_send_only_the_highest():
+    async def main():
+        settings = _settings()
+        limiter = ActionLimiter(settings)
+        pipeline = BidPipeline(settings)
+        bots = [StubBot(f"bot{i}", limiter) for i in range(3)]
+        for amount, bot in zip((110, 130, 120), bots):
+            pipeline.submit(bot, "a1", amount)
+        await asyncio.sleep(0.05)
+        return pipeline, bots
+
+    pipeline, bots = asyncio.run(main())
+    assert [bot.sent for bot in bots] == [[], [("a1", 130)], []]
+    assert pipeline.stats()["coalesced"] == 2
+
+
+def test_queued_bid_is_cancelled_at_its_deadline():
+    async def main():
+        settings = _settings()
+        limiter = ActionLimiter(settings)
+        pipeline = BidPipeline(settings)
+        bot = StubBot("bot", limiter, hang=True)
+        pipeline.submit(bot, "a1", 100)
+        await asyncio.sleep(0.2)
+        return limiter, bot
+
+    limiter, bot = asyncio.run(main())
+    assert limiter.stats()["timeoutsByAction"] == {"bid": 1}
+    assert bot.stats.failures == 1
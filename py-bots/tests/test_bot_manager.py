@@ -0,0 +1,126 @@
+import asyncio
+
+import httpx
+import pytest
+
+import bot_manager
+from bot_manager import BotManager
+from config import Settings
+
+
+def _handle(request: httpx.Request) -> httpx.Response:
+    if request.url.path.endswith("connect/token"):
+        return httpx.Response(200, json={"access_token": "t", "expires_in": 3600})
+    if request.url.path.endswith("auctions") and request.method == "GET":
+        return httpx.Response(200, json=[])
+    return httpx.Response(200, json={"flogBalance": 500})
+
+
+@pytest.fixture
+def clients(monkeypatch):
+    built = []
+    real_build_client = bot_manager.build_client
+
+    def build_client(settings):
+        client, transport = real_build_client(settings, httpx.MockTransport(_handle))
+        built.append(client)
+        return client, transport
+
+    monkeypatch.setattr(bot_manager, "build_client", build_client)
+    return built
+
+
+def _manager(**overrides) -> BotManager:
+    values = dict(
+        bot_users="alice,bob,carol",
+        state_db_path="",
+        token_cache_path="",
+        item_catalog_path="",
+        bid_rate_per_min=0.1,
+        create_rate_per_min=0.1,
+        auto_topup=False,
+        scheduler_workers=4,
+        client_drain_timeout_sec=0.1,
+    )
+    values.update(overrides)
+    return BotManager(Settings(_env_file=None, **values))
+
+
+def _run(manager: BotManager, *updates: dict):
+    async def main():
+        await manager.start()
+        try:
+            return [await manager.apply_config(update) for update in updates]
+        finally:
+            await manager.stop()
+
+    return asyncio.run(main())
+
+
+def test_schedule_keys_reschedule_without_touching_the_client(clients, monkeypatch):
+    manager = _manager()
+    rescheduled = []
+    monkeypatch.setattr(bot_manager.BotScheduler, "reschedule", lambda self, bots: rescheduled.append(len(bots)))
+    (result,) = _run(manager, {"bid_rate_per_min": 5.0})
+    assert result == {"changed": ["bid_rate_per_min"], "rescheduled": True}
+    assert rescheduled == [3]
+    assert len(clients) == 1
+
+
+def test_client_keys_swap_the_client_and_close_the_old_one(clients):
+    manager = _manager()
+    contexts = []
+
+    async def main():
+        await manager.start()
+        result = await manager.apply_config({"http_max_connections": 7})
+        contexts.append(manager.context.client)
+        await manager.stop()
+        return result
+
+    result = asyncio.run(main())
+    assert result == {"changed": ["http_max_connections"], "recycledClient": True}
+    assert len(clients) == 2
+    assert clients[0].is_closed
+    assert contexts == [clients[1]]
+
+
+def test_bot_users_diff_adds_and_retires_only_the_changed_bots(clients):
+    manager = _manager()
+    names = []
+
+    async def main():
+        await manager.start()
+        before = {bot.username: bot for bot in manager.bots}
+        result = await manager.apply_config({"bot_users": "bob,carol,dave"})
+        names.extend(bot.username for bot in manager.bots)
+        kept = all(manager.bots[i] is before[name] for i, name in enumerate(("bob", "carol")))
+        await manager.stop()
+        return result, kept, before["alice"].retired
+
+    result, kept, alice_retired = asyncio.run(main())
+    assert result == {"changed": ["bot_users"], "addedBots": 1, "removedBots": 1}
+    assert names == ["bob", "carol", "dave"]
+    assert kept and alice_retired
+    assert len(clients) == 1
+
+
+def test_bad_catalog_path_rejects_the_whole_update(clients, tmp_path):
+    manager = _manager()
+    with pytest.raises(ValueError, match="Cannot load item catalog"):
+        _run(manager, {"item_catalog_path": str(tmp_path / "missing.jsonl"), "bid_rate_per_min": 9.0})
+    assert manager.settings.item_catalog_path == ""
+    assert manager.settings.bid_rate_per_min == 0.1
+
+
+def test_admin_api_answers_a_bad_catalog_path_with_400(monkeypatch, tmp_path):
+    from fastapi.testclient import TestClient
+
+    import admin_api
+
+    monkeypatch.setattr(admin_api, "manager", _manager())
+    response = TestClient(admin_api.app).post(
+        "/admin/bots/config", json={"item_catalog_path": str(tmp_path / "missing.jsonl")}
+    )
+    assert response.status_code == 400
+    assert "Cannot load item catalog" in response.json()["detail"]
@@ -0,0 +1,68 @@
+from bot import AuctionBot, BotContext
+from bot_manager import BotManager
+from bot_state import BotStateStore
+from config import Settings
+
+
+def _settings(path, **overrides) -> Settings:
+    return Settings(_env_file=None, state_db_path=str(path), token_cache_path="", **overrides)
+
+
+def _bot(settings: Settings, username: str) -> AuctionBot:
+    return AuctionBot(username, BotContext(settings, client=None))
+
+
+def test_checkpoint_round_trips_cooldowns_auctions_and_counters(tmp_path):
+    settings = _settings(tmp_path / "state.db")
+    alice = _bot(settings, "alice")
+    alice.last_daily = 1_700_000_000.0
+    alice.last_mystery = 1_700_000_100.0
+    alice.active_auctions = [[1_700_080_000.0, "a1", 1_700_000_000.0], [1_700_090_000.0, "a2", 1_700_000_050.0]]
+    alice.stats.bids_placed = 7
+    alice.stats.failures = 2
+    alice.stats.last_error = "HTTP 503"
+    store = BotStateStore(settings)
+    assert store.checkpoint([alice, _bot(settings, "bob")]) == 2
+    # Unchanged bots are not written again
+    assert store.checkpoint([alice]) == 0
+    store.close()
+
+    store = BotStateStore(settings)
+    restored = _bot(settings, "alice")
+    assert store.restore(restored)
+    assert not store.restore(_bot(settings, "carol"))
+    assert (restored.last_daily, restored.last_mystery) == (1_700_000_000.0, 1_700_000_100.0)
+    assert restored.active_auctions == alice.active_auctions
+    assert (restored.stats.bids_placed, restored.stats.failures, restored.stats.last_error) == (7, 2, "HTTP 503")
+    assert store.checkpoint([restored]) == 0
+    assert store.stats()["restored"] == 1
+
+
+def test_rows_are_kept_per_gateway(tmp_path):
+    path = tmp_path / "state.db"
+    settings = _settings(path, api_base="http://one/")
+    bot = _bot(settings, "alice")
+    bot.stats.bids_placed = 3
+    store = BotStateStore(settings)
+    store.checkpoint([bot])
+    store.close()
+    other = _settings(path, api_base="http://two/")
+    assert not BotStateStore(other).restore(_bot(other, "alice"))
+
+
+def test_manager_restores_bots_it_creates(tmp_path):
+    settings = _settings(tmp_path / "state.db")
+    bot = _bot(settings, "alice")
+    bot.last_daily = 1_700_000_000.0
+    bot.stats.auctions_created = 4
+    store = BotStateStore(settings)
+    store.checkpoint([bot])
+    store.close()
+
+    manager = BotManager(settings)
+    manager.context = BotContext(settings, client=None)
+    made = manager._make_bot("alice")
+    assert made.last_daily == 1_700_000_000.0
+    assert made.stats.auctions_created == 4
+    assert manager.state.stats()["restored"] == 1
+    manager.state.close()
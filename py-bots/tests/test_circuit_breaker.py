@@ -0,0 +1,90 @@
+import pytest
+
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitBreakers, CircuitOpenError
+from config import Settings
+
+
+def _breaker(**overrides) -> CircuitBreaker:
+    values = dict(breaker_failure_threshold=3, breaker_open_sec=10.0, breaker_max_open_sec=25.0, breaker_half_open_probes=1)
+    values.update(overrides)
+    return CircuitBreaker("auctions", Settings(_env_file=None, **values))
+
+
+def _fail(breaker: CircuitBreaker, status=503):
+    breaker.observe(status, breaker.allow())
+
+
+def test_opens_after_consecutive_failures_and_rejects(fake_clock):
+    breaker = _breaker()
+    _fail(breaker)
+    _fail(breaker)
+    breaker.observe(200, breaker.allow())
+    _fail(breaker)
+    _fail(breaker)
+    assert breaker.state == CLOSED
+    _fail(breaker, "error")
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    fake_clock.advance(9.9)
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    assert breaker.stats()["rejected"] == 2
+    assert breaker.stats()["opens"] == 1
+
+
+def test_half_open_lets_through_a_limited_number_of_probes(fake_clock):
+    breaker = _breaker(breaker_half_open_probes=2)
+    for _ in range(3):
+        _fail(breaker)
+    fake_clock.advance(10)
+    assert breaker.allow() is True
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow() is True
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    breaker.observe(200, True)
+    assert breaker.state == CLOSED
+    assert breaker.allow() is False
+
+
+def test_failed_probe_reopens_for_twice_as_long_up_to_the_cap(fake_clock):
+    breaker = _breaker()
+    for _ in range(3):
+        _fail(breaker)
+    for open_sec in (20.0, 25.0, 25.0):
+        fake_clock.advance(breaker.open_sec)
+        _fail(breaker)
+        assert breaker.state == OPEN
+        assert breaker.open_sec == open_sec
+        assert breaker.stats()["retryInSec"] == open_sec
+    fake_clock.advance(25)
+    breaker.observe(200, breaker.allow())
+    assert breaker.state == CLOSED
+    assert breaker.open_sec == 10.0
+
+
+def test_rate_limits_and_cancellations_count_neither_way(fake_clock):
+    breaker = _breaker()
+    for _ in range(3):
+        _fail(breaker)
+    fake_clock.advance(10)
+    breaker.observe(429, breaker.allow())
+    assert breaker.state == HALF_OPEN
+    breaker.observe("cancelled", breaker.allow())
+    assert breaker.state == HALF_OPEN
+    assert breaker.probing == 0
+
+    closed = _breaker()
+    for _ in range(5):
+        closed.observe(429, closed.allow())
+        closed.observe("cancelled", closed.allow())
+    assert closed.state == CLOSED
+    assert closed.failures == 0
+
+
+def test_breakers_are_shared_per_endpoint_group():
+    breakers = CircuitBreakers(Settings(_env_file=None))
+    assert breakers.for_endpoint("auctions/abc") is breakers.for_endpoint("auctions")
+    assert breakers.for_endpoint("connect/token").group == "identity"
+    assert CircuitBreakers(Settings(_env_file=None, breaker_enabled=False)).for_endpoint("bids") is None
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from bot_random import BotRandom
+from item_catalog import ItemCatalog, alias_table
+
+
+def _alias_probabilities(prob, alias):
+    n = len(prob)
+    p = [prob[i] / n for i in range(n)]
+    for i in range(n):
+        p[alias[i]] += (1.0 - prob[i]) / n
+    return p
+
+
+@pytest.mark.parametrize("weights", [[1.0], [65, 22, 10, 3], [0.5, 0.0, 7.0, 1e-6, 3.0], [1.0] * 1000])
+def test_alias_table_reproduces_the_weights(weights):
+    total = sum(weights)
+    for got, want in zip(_alias_probabilities(*alias_table(weights)), weights):
+        assert got == pytest.approx(want / total, abs=1e-12)
+
+
+def test_sampling_follows_category_weights():
+    items = [{"title": f"{c}-{i}", "category": c} for c in ("Common", "Rare") for i in range(10)]
+    catalog = ItemCatalog(items, ["Common", "Rare"], [3.0, 1.0])
+    rng = BotRandom("catalog")
+    draws = 40000
+    rare = sum(catalog.category_of[catalog.sample(rng)] for _ in range(draws))
+    assert rare / draws == pytest.approx(0.25, abs=0.01)
+
+
+def test_item_weights_split_their_category():
+    items = [
+        {"title": "heavy", "category": "Rare", "weight": 3},
+        {"title": "light", "category": "Rare", "weight": 1},
+    ]
+    catalog = ItemCatalog(items, ["Rare"], [1.0])
+    assert _alias_probabilities(catalog._prob, catalog._alias) == pytest.approx([0.75, 0.25])
+
+
+def test_invalid_items_are_skipped():
+    items = [
+        {"title": "ok", "category": "Rare"},
+        {"title": "words", "category": "Rare", "weight": "heavy"},
+        {"title": "flag", "category": "Rare", "weight": True},
+        {"title": "negative", "category": "Rare", "weight": -1},
+        {"title": "unknown", "category": "Mythic"},
+        {"category": "Rare"},
+        "not an item",
+    ]
+    catalog = ItemCatalog(items, ["Rare"], [1.0])
+    assert len(catalog) == 1
+    assert catalog.skipped == 6
+
+
+def test_more_than_256_categories():
+    categories = [f"c{i}" for i in range(300)]
+    catalog = ItemCatalog([{"title": c, "category": c} for c in categories], categories, [1.0] * 300)
+    assert catalog.category_of[-1] == 299
+
+
+def test_payload_is_the_item_with_price_and_end():
+    catalog = ItemCatalog([{"title": "Sword", "category": "Rare", "weight": 2}], ["Rare"], [1.0])
+    body = json.loads(catalog.payload(0, 450, 1_700_000_000.0))
+    assert body == {"title": "Sword", "category": "Rare", "reservePrice": 450, "auctionEnd": "2023-11-14T22:13:20Z"}
+
+
+def test_catalog_without_weighted_items_is_rejected():
+    with pytest.raises(ValueError):
+        ItemCatalog([{"title": "x", "category": "Rare"}], ["Rare"], [0.0])
@@ -0,0 +1,21 @@
+import pytest
+
+from loadtest import LoadTest, parse_rates
+
+
+def test_rates_keep_positive_numbers_only():
+    assert parse_rates({"bid": 50, "create": 0, "award": None, "mystery": 2.5}) == {"bid": 50.0, "mystery": 2.5}
+
+
+@pytest.mark.parametrize(
+    "rates",
+    [{"bid": "fast"}, {"bid": True}, {"bid": [1]}, {"bid": float("nan")}, {"teleport": 1}, ["bid"]],
+)
+def test_bad_rates_are_value_errors(rates):
+    with pytest.raises(ValueError):
+        parse_rates(rates)
+
+
+def test_load_test_rejects_bad_rates_before_anything_else():
+    with pytest.raises(ValueError, match="must be a number"):
+        LoadTest([], {"bid": "fast"}, 60, 10)
@@ -0,0 +1,100 @@
+import asyncio
+
+import httpx
+
+from bot import AuctionBot, BotContext
+from config import Settings
+from profile_cache import ProfileCache
+
+
+def _cache() -> ProfileCache:
+    return ProfileCache(Settings(_env_file=None, profile_cache_ttl_sec=300.0))
+
+
+def test_empty_cache_needs_a_fetch_until_the_ttl_runs_out(fake_clock):
+    cache = _cache()
+    assert cache.needs_refresh()
+    cache.update({"flogBalance": 500})
+    fake_clock.advance(299)
+    assert not cache.needs_refresh()
+    fake_clock.advance(1)
+    assert cache.needs_refresh()
+
+
+def test_responses_without_a_balance_are_ignored(fake_clock):
+    cache = _cache()
+    cache.update(None)
+    cache.update({"username": "alice"})
+    assert cache.balance is None
+    assert cache.needs_refresh()
+
+
+def test_bids_deduct_only_the_raise_and_mark_the_balance_estimated(fake_clock):
+    cache = _cache()
+    cache.update({"flogBalance": 500})
+    cache.bid_placed("a1", 100)
+    cache.bid_placed("a1", 150)
+    cache.bid_placed("a1", 120)
+    cache.bid_placed("a2", 600)
+    assert cache.balance == 0
+    assert cache.estimated
+    assert cache.local_updates == 3
+
+
+def test_server_value_replaces_the_estimate_and_counts_divergence(fake_clock):
+    cache = _cache()
+    cache.update({"flogBalance": 500})
+    cache.bid_placed("a1", 100)
+    cache.update({"flogBalance": 450})
+    assert (cache.balance, cache.estimated, cache.divergences) == (450, False, 1)
+    cache.bid_placed("a2", 50)
+    cache.update({"flogBalance": 400})
+    assert cache.divergences == 1
+
+
+def test_pruned_holds_are_deducted_again_on_a_new_bid(fake_clock):
+    cache = _cache()
+    cache.update({"flogBalance": 500})
+    cache.bid_placed("a1", 100)
+    cache.bid_placed("a2", 100)
+    cache.prune(["a2"])
+    cache.bid_placed("a1", 100)
+    cache.bid_placed("a2", 100)
+    assert cache.balance == 200
+
+
+def test_top_up_uses_the_cache_and_rereads_an_estimated_low_balance(fake_clock):
+    calls = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        path = request.url.path.strip("/")
+        calls.append(path)
+        if path == "connect/token":
+            return httpx.Response(200, json={"access_token": "t", "expires_in": 3600})
+        return httpx.Response(200, json={"flogBalance": 500})
+
+    async def main():
+        settings = Settings(
+            _env_file=None,
+            api_base="http://gw/",
+            token_cache_path="",
+            auto_topup=True,
+            min_balance=100,
+            profile_cache_ttl_sec=300.0,
+            rate_control_enabled=False,
+            breaker_enabled=False,
+        )
+        async with httpx.AsyncClient(base_url="http://gw/", transport=httpx.MockTransport(handle)) as client:
+            bot = AuctionBot("alice", BotContext(settings, client))
+            await bot.top_up_if_needed()
+            await bot.top_up_if_needed()
+            bot.profile.bid_placed("a1", 450)
+            await bot.top_up_if_needed()
+            fake_clock.advance(300)
+            await bot.top_up_if_needed()
+            return bot.profile
+
+    profile = asyncio.run(main())
+    assert calls.count("progress/me") == 3
+    assert "progress/award" not in calls
+    assert (profile.hits, profile.refreshes, profile.divergences) == (1, 3, 1)
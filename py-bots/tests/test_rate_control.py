@@ -0,0 +1,72 @@
+import pytest
+
+from config import Settings
+from rate_control import AdaptiveRateController, parse_retry_after
+
+
+def _controller(**overrides) -> AdaptiveRateController:
+    values = dict(
+        rate_window_sec=5.0,
+        rate_min_samples=10,
+        rate_error_threshold=0.05,
+        rate_latency_target_sec=1.0,
+        rate_slow_threshold=0.1,
+        rate_decrease_factor=0.5,
+        rate_increase_step=0.25,
+        rate_min_factor=0.2,
+    )
+    values.update(overrides)
+    return AdaptiveRateController(Settings(_env_file=None, **values))
+
+
+def _window(controller, fake_clock, requests=20, status=200, seconds=0.1, bad=0):
+    # One window of traffic; the last response lands after the window closes and triggers the adjustment
+    for i in range(requests):
+        if i == requests - 1:
+            fake_clock.advance(5)
+        controller.observe(status if i < bad else 200, seconds if i < bad else 0.1)
+
+
+@pytest.mark.parametrize("status, seconds", [(503, 0.1), (429, 0.1), ("error", 0.1), (200, 2.0)])
+def test_overloaded_window_cuts_the_factor(fake_clock, status, seconds):
+    controller = _controller()
+    _window(controller, fake_clock, bad=5, status=status, seconds=seconds)
+    assert controller.factor == 0.5
+    assert controller.decreases == 1
+    assert controller.last_window["requests"] == 20
+
+
+def test_healthy_windows_step_back_up_to_one(fake_clock):
+    controller = _controller()
+    _window(controller, fake_clock, bad=20, status=500)
+    assert controller.factor == 0.5
+    for expected in (0.75, 1.0, 1.0):
+        _window(controller, fake_clock)
+        assert controller.factor == expected
+    assert controller.increases == 2
+
+
+def test_factor_stops_at_the_floor(fake_clock):
+    controller = _controller()
+    for _ in range(5):
+        _window(controller, fake_clock, bad=20, status=500)
+    assert controller.factor == 0.2
+    assert controller.decreases == 5
+
+
+def test_small_overloaded_sample_does_not_cut_but_a_small_healthy_one_recovers(fake_clock):
+    controller = _controller()
+    _window(controller, fake_clock, requests=5, bad=5, status=500)
+    assert controller.factor == 1.0
+    _window(controller, fake_clock, bad=20, status=500)
+    _window(controller, fake_clock, requests=2)
+    assert controller.factor == 0.75
+
+
+def test_retry_after_blocks_up_to_the_cap(fake_clock):
+    controller = _controller(rate_max_retry_after_sec=30.0)
+    controller.observe(429, 0.1, retry_after="10")
+    assert controller.blocked_for() == 10
+    controller.observe(429, 0.1, retry_after="600")
+    assert controller.blocked_for() == 30
+    assert parse_retry_after("soon") is None
@@ -0,0 +1,83 @@
+import asyncio
+import time
+
+import scheduler
+from bot import BotStats
+from bot_random import BotRandom
+from config import Settings
+from scheduler import BotScheduler
+
+
+class StubBot:
+    def __init__(self, username: str, swallow_cancel: bool = False):
+        self.username = username
+        self.retired = False
+        self.rng = BotRandom(username)
+        self.last_daily = 0.0
+        self.last_mystery = 0.0
+        self.stats = BotStats()
+        self.swallow_cancel = swallow_cancel
+        self.started = 0
+
+    def __lt__(self, other: "StubBot") -> bool:
+        return self.username < other.username
+
+    def record_tick(self, seconds: float):
+        pass
+
+    async def run_action(self, action: str):
+        self.started += 1
+        try:
+            await asyncio.sleep(3600)
+        except asyncio.CancelledError:
+            if not self.swallow_cancel:
+                raise
+
+
+def _settings(**overrides) -> Settings:
+    values = dict(
+        bid_rate_per_min=600,
+        create_rate_per_min=600,
+        auto_topup=False,
+        schedule_spread_sec=0.0,
+        rate_control_enabled=False,
+        scheduler_workers=50,
+    )
+    values.update(overrides)
+    return Settings(_env_file=None, **values)
+
+
+async def _stop_under_load(bots):
+    sched = BotScheduler(_settings())
+    for bot in bots:
+        sched.add(bot)
+    runner = asyncio.create_task(sched.run())
+    # Let every worker pick up an action and park in it, with more queued behind
+    for _ in range(100):
+        await asyncio.sleep(0.01)
+        if sched.busy == sched.settings.scheduler_workers:
+            break
+    assert sched.busy == sched.settings.scheduler_workers
+    assert sched.stats()["queued"] > 0
+    started = time.perf_counter()
+    await sched.stop()
+    elapsed = time.perf_counter() - started
+    await asyncio.wait_for(runner, 1)
+    return sched, elapsed
+
+
+def test_stop_returns_with_every_worker_busy():
+    bots = [StubBot(f"bot{i:03d}") for i in range(200)]
+    sched, elapsed = asyncio.run(_stop_under_load(bots))
+    assert elapsed < 1
+    assert sched.stats()["workers"] == 0
+    assert sched.stats()["scheduled"] == 0
+
+
+def test_stop_returns_when_actions_swallow_cancellation(monkeypatch):
+    monkeypatch.setattr(scheduler, "STOP_TIMEOUT_SEC", 2.0)
+    bots = [StubBot(f"bot{i:03d}", swallow_cancel=True) for i in range(200)]
+    sched, elapsed = asyncio.run(_stop_under_load(bots))
+    # Workers see the stop flag instead of going back to the queue
+    assert elapsed < 1
+    assert sum(bot.started for bot in bots) == sched.settings.scheduler_workers
@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+
+from config import Settings
+from shards import Shard, ShardPool, merge_stats
+
+
+def test_merge_stats_sums_counters_and_takes_max_and_min_keys():
+    merged = merge_stats(
+        [
+            {"requests": 10, "ageSec": 1.5, "nextDueInSec": 3.0, "factor": 0.5, "state": "closed"},
+            None,
+            {"requests": 5, "ageSec": 4.0, "nextDueInSec": 1.0, "factor": 1.0, "state": "open"},
+        ]
+    )
+    assert merged == {"requests": 15, "ageSec": 4.0, "nextDueInSec": 1.0, "factor": 0.5, "state": "closed"}
+    assert merge_stats([None, {}]) is None
+
+
+def test_merge_stats_keeps_the_first_non_number_and_skips_missing_values():
+    merged = merge_stats([{"enabled": True, "size": 2}, {"enabled": False, "size": None}])
+    assert merged == {"enabled": True, "size": 2}
+
+
+def test_merge_stats_recomputes_ratios_from_the_totals():
+    merged = merge_stats(
+        [
+            {"hits": 9, "misses": 1, "hitRatio": 0.9, "requests": 100, "connectionsOpened": 10, "reuseRatio": 0.9},
+            {"hits": 0, "misses": 10, "hitRatio": 0.0, "requests": 0, "connectionsOpened": 0, "reuseRatio": None},
+        ]
+    )
+    assert merged["hitRatio"] == 0.45
+    assert merged["reuseRatio"] == 0.9
+    assert merge_stats([{"hits": 0, "misses": 0}])["hitRatio"] is None
+
+
+def _pool(*shard_users, alive=None) -> ShardPool:
+    pool = ShardPool(Settings(_env_file=None), lambda *args: None)
+    for index, users in enumerate(shard_users):
+        shard = Shard(index, list(users), SimpleNamespace(pid=None), None)
+        shard.alive = alive[index] if alive else True
+        pool.shards.append(shard)
+    return pool
+
+
+def test_rebalance_counts_changes_and_fills_the_least_loaded_shard():
+    pool = _pool(["a", "b", "c"], ["d"], ["e", "f"])
+    added, removed = pool.rebalance(["a", "b", "c", "e", "f", "g", "h", "i"])
+    assert (added, removed) == (3, 1)
+    assert [shard.users for shard in pool.shards] == [["a", "b", "c"], ["g", "h", "i"], ["e", "f"]]
+
+
+def test_rebalance_leaves_unchanged_users_in_place():
+    pool = _pool(["a", "c"], ["b", "d"])
+    assert pool.rebalance(["d", "c", "b", "a"]) == (0, 0)
+    assert [shard.users for shard in pool.shards] == [["a", "c"], ["b", "d"]]
+
+
+def test_rebalance_skips_dead_shards():
+    pool = _pool([], ["a"], alive=[False, True])
+    assert pool.rebalance(["a", "b"]) == (1, 0)
+    assert [shard.users for shard in pool.shards] == [[], ["a", "b"]]
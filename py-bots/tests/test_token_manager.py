@@ -0,0 +1,45 @@
+import asyncio
+
+import httpx
+import pytest
+
+from circuit_breaker import CircuitBreakers, CircuitOpenError
+from config import Settings
+from token_manager import TokenManager
+
+
+def _settings(**overrides) -> Settings:
+    return Settings(_env_file=None, token_cache_path="", breaker_failure_threshold=1, **overrides)
+
+
+def test_waiters_share_a_failed_login():
+    calls = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(503)
+
+    async def main():
+        tokens = TokenManager(_settings(breaker_enabled=False))
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handle)) as client:
+            return await asyncio.gather(*(tokens.get(client, "alice", "pw") for _ in range(10)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(isinstance(r, httpx.HTTPStatusError) for r in results)
+
+
+def test_breaker_rejections_count_as_login_failures():
+    async def main():
+        settings = _settings()
+        tokens = TokenManager(settings, breakers=CircuitBreakers(settings))
+        client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(500)))
+        with pytest.raises(httpx.HTTPStatusError):
+            await tokens.get(client, "alice", "pw")
+        with pytest.raises(CircuitOpenError):
+            await tokens.get(client, "bob", "pw")
+        await client.aclose()
+        return tokens
+
+    tokens = asyncio.run(main())
+    assert tokens.stats()["loginFailures"] == 2
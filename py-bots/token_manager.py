@@ -0,0 +1,230 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from typing import TYPE_CHECKING, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import httpx
+
+import clock
+from circuit_breaker import CircuitBreakers, CircuitOpenError
+from config import Settings
+from metrics import BotMetrics
+
+if TYPE_CHECKING:
+    from bot import AuctionBot
+
+
+class CachedToken(NamedTuple):
+    token: str
+    expires_at: float
+    refresh_at: float
+
+
+# Fleet-wide token cache: single-flight login per user, jittered early refresh
+# (in the background, ahead of the bots) and an on-disk copy so restarts reuse
+# still-valid tokens.
+class TokenManager:
+    def __init__(
+        self,
+        settings: Settings,
+        cache_path: Optional[str] = None,
+        metrics: Optional[BotMetrics] = None,
+        breakers: Optional[CircuitBreakers] = None,
+    ):
+        self.settings = settings
+        self.metrics = metrics
+        self.breakers = breakers
+        self.cache_path = settings.token_cache_path if cache_path is None else cache_path
+        # identity URL -> username -> token; the username keys are the bots' own strings
+        self._tokens: Dict[str, Dict[str, CachedToken]] = {}
+        # Login in flight per (identity, user); every caller waiting on it gets its token or its failure
+        self._pending: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._dirty = False
+        self._last_save: float = 0
+        self.rng = random.Random(settings.seed)
+        self.logins = 0
+        self.login_failures = 0
+        self.background_refreshes = 0
+        self.load()
+
+    def _identity(self) -> str:
+        return str(self.settings.identity_url or self.settings.api_base).rstrip("/")
+
+    def _fresh(self, entry: Optional[CachedToken]) -> bool:
+        return entry is not None and clock.now() < entry.refresh_at
+
+    def _cached(self, identity: str, username: str) -> Optional[CachedToken]:
+        users = self._tokens.get(identity)
+        return users.get(username) if users else None
+
+    async def get(self, client: httpx.AsyncClient, username: str, password: str) -> str:
+        entry = self._cached(self._identity(), username)
+        if self._fresh(entry):
+            return entry.token
+        return await self._refresh(client, username, password, stale=None)
+
+    async def refresh(
+        self, client: httpx.AsyncClient, username: str, password: str, stale: Optional[str]
+    ) -> str:
+        # Called after a 401: only log in again if nobody replaced the rejected token meanwhile
+        return await self._refresh(client, username, password, stale=stale or "")
+
+    async def _refresh(
+        self, client: httpx.AsyncClient, username: str, password: str, stale: Optional[str]
+    ) -> str:
+        key = (self._identity(), username)
+        pending = self._pending.get(key)
+        if pending is None:
+            entry = self._cached(*key)
+            if self._fresh(entry) and (stale is None or entry.token != stale):
+                return entry.token
+            pending = self._pending[key] = asyncio.ensure_future(self._login_once(key, client, password))
+            # Retrieved here so a login nobody is left waiting for doesn't log "never retrieved"
+            pending.add_done_callback(lambda f: f.cancelled() or f.exception())
+        # Shielded: one caller giving up must not cancel the login for the others
+        return await asyncio.shield(pending)
+
+    async def _login_once(self, key: Tuple[str, str], client: httpx.AsyncClient, password: str) -> str:
+        identity, username = key
+        try:
+            entry = await self._login(client, username, password)
+        finally:
+            del self._pending[key]
+        self._tokens.setdefault(identity, {})[username] = entry
+        self._dirty = True
+        self.maybe_save()
+        return entry.token
+
+    async def _login(self, client: httpx.AsyncClient, username: str, password: str) -> CachedToken:
+        token_url = str(self.settings.identity_url or self.settings.api_base).rstrip("/") + "/connect/token"
+        data = {
+            "grant_type": "password",
+            "client_id": "pybot",
+            "client_secret": "NotASecret",
+            "username": username,
+            "password": password,
+            "scope": "openid profile auctionApp",
+        }
+        breaker = self.breakers.for_endpoint("connect/token") if self.breakers else None
+        probe = False
+        started = time.perf_counter()
+        try:
+            probe = breaker.allow() if breaker else False
+            try:
+                resp = await client.post(token_url, data=data)
+            except BaseException as exc:
+                if breaker:
+                    failed = isinstance(exc, Exception)
+                    breaker.observe("error" if failed else "cancelled", probe, f"{type(exc).__name__}: {exc}")
+                raise
+            if breaker:
+                breaker.observe(resp.status_code, probe, f"HTTP {resp.status_code}")
+            if self.metrics:
+                self.metrics.observe("connect/token", resp.status_code, time.perf_counter() - started)
+            resp.raise_for_status()
+        except Exception as exc:
+            self.login_failures += 1
+            if self.metrics:
+                if not isinstance(exc, (httpx.HTTPStatusError, CircuitOpenError)):
+                    self.metrics.observe("connect/token", "error", time.perf_counter() - started)
+                self.metrics.token_refresh("error")
+            raise
+        self.logins += 1
+        if self.metrics:
+            self.metrics.token_refresh("ok")
+        payload = resp.json()
+        now = clock.now()
+        expires_in = payload.get("expires_in", 3600)
+        lead = self.settings.token_refresh_margin_sec + self.rng.uniform(0, self.settings.token_refresh_jitter_sec)
+        return CachedToken(
+            payload.get("access_token"),
+            now + expires_in,
+            # Never refresh earlier than half-way through the token lifetime
+            now + max(expires_in / 2, expires_in - lead),
+        )
+
+    # Logs bots in again shortly before their tokens are due for refresh, so bots
+    # find a fresh token instead of waiting on a login mid-action
+    async def run(self, bots: Callable[[], List["AuctionBot"]]):
+        check_sec = self.settings.token_refresh_check_sec
+        if check_sec <= 0:
+            return
+        slots = asyncio.Semaphore(max(1, self.settings.token_refresh_concurrency))
+        tasks = set()
+        while True:
+            await asyncio.sleep(check_sec)
+            horizon = clock.now() + check_sec
+            identity = self._identity()
+            for i, bot in enumerate(bots()):
+                if i % 1000 == 999:
+                    await asyncio.sleep(0)
+                entry = self._cached(identity, bot.username)
+                if entry and entry.refresh_at <= horizon and (identity, bot.username) not in self._pending:
+                    task = asyncio.create_task(self._refresh_ahead(slots, bot, entry.token))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+
+    async def _refresh_ahead(self, slots: asyncio.Semaphore, bot: "AuctionBot", token: str):
+        context = bot.context
+        async with slots:
+            try:
+                await self._refresh(context.client, bot.username, context.password, stale=token)
+            except Exception as exc:
+                logging.debug("Background token refresh for %s failed: %s", bot.username, exc)
+                return
+        self.background_refreshes += 1
+
+    def load(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError) as exc:
+            logging.warning("Ignoring unreadable token cache %s: %s", self.cache_path, exc)
+            return
+        now = clock.now()
+        self._tokens = {}
+        for key, entry in cached.items():
+            identity, _, username = key.rpartition("|")
+            if entry.get("refresh_at", 0) > now:
+                self._tokens.setdefault(identity, {})[username] = CachedToken(
+                    entry.get("token"), entry.get("expires_at", 0), entry["refresh_at"]
+                )
+
+    def maybe_save(self):
+        if clock.now() - self._last_save >= self.settings.token_cache_flush_sec:
+            self.save()
+
+    def save(self):
+        if not self.cache_path or not self._dirty:
+            return
+        tmp_path = self.cache_path + ".tmp"
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        f"{identity}|{username}": entry._asdict()
+                        for identity, users in self._tokens.items()
+                        for username, entry in users.items()
+                    },
+                    f,
+                )
+            os.replace(tmp_path, self.cache_path)
+        except OSError as exc:
+            logging.warning("Could not write token cache %s: %s", self.cache_path, exc)
+            return
+        self._dirty = False
+        self._last_save = clock.now()
+
+    def stats(self) -> Dict:
+        return {
+            "cached": sum(len(users) for users in self._tokens.values()),
+            "logins": self.logins,
+            "loginFailures": self.login_failures,
+            "backgroundRefreshes": self.background_refreshes,
+        }
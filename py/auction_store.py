@@ -0,0 +1,166 @@
+import heapq
+import random
+import time
+from datetime import datetime
+
+
+# Parse an API ISO-8601 timestamp ("...T12:00:00.1234567Z") to epoch seconds
+def parse_timestamp(value):
+    if not value:
+        return 0
+    value = value.replace("Z", "+00:00")
+    if "." in value:
+        head, _, rest = value.partition(".")
+        digits = len(rest) - len(rest.lstrip("0123456789"))
+        value = head + "." + rest[:min(digits, 6)] + rest[digits:]
+    return int(datetime.fromisoformat(value).timestamp())
+
+
+# Fenwick tree of live-auction counts per seller slot, so sampling can skip a seller in O(log n)
+class _SellerCounts:
+    def __init__(self):
+        self.tree = [0]
+
+    def grow(self):
+        self.tree.append(0)
+        i = len(self.tree) - 1
+        # A new slot's node covers the slots below it; rebuild its partial sum
+        low = i - (i & -i)
+        j = i - 1
+        while j > low:
+            self.tree[i] += self.tree[j]
+            j -= j & -j
+
+    def add(self, slot, delta):
+        i = slot + 1
+        while i < len(self.tree):
+            self.tree[i] += delta
+            i += i & -i
+
+    def find(self, rank):
+        # Smallest slot whose prefix count exceeds rank; returns (slot, rank within that slot)
+        pos = 0
+        step = 1 << (len(self.tree) - 1).bit_length()
+        while step:
+            nxt = pos + step
+            if nxt < len(self.tree) and self.tree[nxt] <= rank:
+                pos = nxt
+                rank -= self.tree[nxt]
+            step >>= 1
+        return pos, rank
+
+
+# Live auctions keyed by id. Each auction sits in its seller's id list (swap-remove,
+# so removal is O(1)) and in a min-heap on its end time, so ended auctions are
+# dropped lazily and a random live auction not sold by a given seller is picked
+# without scanning the whole snapshot.
+class AuctionStore:
+    def __init__(self):
+        self.auctions = {}  # id -> [seller slot, end epoch, currentHighBid]
+        self._sellers = []  # slot -> seller name
+        self._seller_slots = {}  # seller name -> slot
+        self._by_seller = []  # slot -> list of auction ids
+        self._position = {}  # id -> index in its seller's list
+        self._counts = _SellerCounts()
+        self._ends = []  # (end epoch, id); stale entries are skipped on pop
+        self.high_water = 0  # newest updatedAt seen, the cursor for delta syncs
+
+    def __len__(self):
+        return len(self.auctions)
+
+    def _slot(self, seller):
+        slot = self._seller_slots.get(seller)
+        if slot is None:
+            slot = self._seller_slots[seller] = len(self._sellers)
+            self._sellers.append(seller)
+            self._by_seller.append([])
+            self._counts.grow()
+        return slot
+
+    def upsert(self, auction, now=None):
+        auction_id = auction["id"]
+        self.high_water = max(self.high_water, parse_timestamp(auction.get("updatedAt")))
+        if auction.get("status", "Live") != "Live":
+            self.remove(auction_id)
+            return
+        end = parse_timestamp(auction.get("auctionEnd"))
+        slot = self._slot(auction.get("seller"))
+        record = self.auctions.get(auction_id)
+        if record is not None and record[0] == slot and record[1] == end:
+            record[2] = auction.get("currentHighBid") or 0
+            return
+        self.remove(auction_id)
+        if end <= (now if now is not None else time.time()):
+            return
+        self.auctions[auction_id] = [slot, end, auction.get("currentHighBid") or 0]
+        ids = self._by_seller[slot]
+        self._position[auction_id] = len(ids)
+        ids.append(auction_id)
+        self._counts.add(slot, 1)
+        heapq.heappush(self._ends, (end, auction_id))
+
+    def remove(self, auction_id):
+        record = self.auctions.pop(auction_id, None)
+        if record is None:
+            return
+        slot = record[0]
+        ids = self._by_seller[slot]
+        index = self._position.pop(auction_id)
+        last = ids.pop()
+        if last != auction_id:
+            ids[index] = last
+            self._position[last] = index
+        self._counts.add(slot, -1)
+
+    def merge(self, auctions):
+        # Apply a delta: auctions updated since the last sync, finished ones included
+        now = time.time()
+        for auction in auctions:
+            self.upsert(auction, now)
+        self._compact()
+
+    def replace(self, auctions):
+        # Apply a full snapshot: update what changed and drop auctions no longer listed
+        now = time.time()
+        seen = set()
+        for auction in auctions:
+            seen.add(auction["id"])
+            self.upsert(auction, now)
+        for auction_id in [a for a in self.auctions if a not in seen]:
+            self.remove(auction_id)
+        self._compact()
+
+    def _compact(self):
+        if len(self._ends) > 2 * len(self.auctions) + 64:
+            self._ends = [(record[1], auction_id) for auction_id, record in self.auctions.items()]
+            heapq.heapify(self._ends)
+
+    def expire(self, now=None):
+        now = now if now is not None else time.time()
+        ends = self._ends
+        while ends and ends[0][0] <= now:
+            end, auction_id = heapq.heappop(ends)
+            record = self.auctions.get(auction_id)
+            if record is not None and record[1] == end:
+                self.remove(auction_id)
+
+    def sample(self, exclude_seller=None, now=None):
+        # Uniformly random live auction as {"id", "seller", "currentHighBid"}, or None
+        self.expire(now)
+        excluded = self._seller_slots.get(exclude_seller)
+        skipped = len(self._by_seller[excluded]) if excluded is not None else 0
+        eligible = len(self.auctions) - skipped
+        if eligible <= 0:
+            return None
+        rank = random.randrange(eligible)
+        if excluded is not None:
+            slot, offset = self._counts.find(rank)
+            if slot >= excluded:
+                rank += skipped
+        slot, offset = self._counts.find(rank)
+        auction_id = self._by_seller[slot][offset]
+        return {
+            "id": auction_id,
+            "seller": self._sellers[slot],
+            "currentHighBid": self.auctions[auction_id][2],
+        }
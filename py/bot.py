@@ -1,15 +1,29 @@
 import os
-import requests
 import time
-import json
+import asyncio
 from datetime import datetime, timedelta
 import random
-import pandas as pd
-import schedule
-import pytz
 from flask import Flask, jsonify
 from flask_cors import CORS
 from threading import Thread
+from werkzeug.serving import make_server
+from auction_store import AuctionStore
+from catalog import load_catalog
+
+# httpx (~0.3 s of imports) is imported by the job thread once the HTTP server is listening
+
+# Where start-up time goes, in ms per phase; printed once and served on /startup.
+# The "imports" phase is the CPU time used so far (interpreter start-up plus the
+# imports above, all CPU-bound); later phases are wall time from here.
+STARTED = time.perf_counter()
+startup_report = {"phasesMs": {"imports": round(time.process_time() * 1000, 1)}}
+_phase_started = STARTED
+
+def startup_phase(name):
+    global _phase_started
+    now = time.perf_counter()
+    startup_report["phasesMs"][name] = round((now - _phase_started) * 1000, 1)
+    _phase_started = now
 
 
 app = Flask("pythonBot")
@@ -21,6 +35,10 @@ logs = []
 def get_logs():
     return jsonify(logs)
 
+@app.route('/startup', methods=['GET'])
+def get_startup():
+    return jsonify(startup_report)
+
 def add_log(message):
     if len(logs) >= 5:
         logs.pop(0)  # Remove the oldest log
@@ -32,7 +50,11 @@ IDENTITY_URL = os.getenv('IDENTITY_URL') or 'http://localhost:5000'
 GATEWAY_API_URL = 'https://api.flogitdemoapp.co.uk'
 IDENTITY_URL = 'https://id.flogitdemoapp.co.uk'
 
-auctions_data = None  # Initial declaration of fetched auctions
+auctions_store = AuctionStore()  # Live auctions indexed by id, seller and end time
+auctions_loaded = False
+last_full_sync = 0
+FULL_SYNC_SECONDS = 3 * 60  # deletions leave no updatedAt behind; as often as the old full refresh
+SYNC_OVERLAP_SECONDS = 1  # re-read a little before the cursor so same-timestamp updates aren't missed
 
 # Initial setup for token request
 token_url = IDENTITY_URL + "/connect/token"
@@ -40,8 +62,16 @@ headers = {
     "Content-Type": "application/x-www-form-urlencoded"
 }
 
-# Separate function to get access token for a specific user
-def get_access_token_for(username):
+tokens = {}  # username -> access token, acquired lazily on first use
+token_retry_at = {}  # username -> earliest time to try identity again after a failure
+TOKEN_RETRY_SECONDS = 60
+
+# Fetch an access token for a specific user; returns None (and backs off) instead of blocking
+async def get_access_token_for(client, username, refresh=False):
+    if not refresh and tokens.get(username):
+        return tokens[username]
+    if time.time() < token_retry_at.get(username, 0):
+        return None
     print('get access token')
     token_data = {
         "grant_type": "password",
@@ -52,16 +82,20 @@ def get_access_token_for(username):
         "scope": "auctionApp openid profile"
     }
 
-    while True:
-        response = requests.post(token_url, headers=headers, data=token_data)
-        if response.status_code == 200:
-            return response.json().get("access_token")
-        print(f"Failed to retrieve the token for {username}. Retrying in 1 minute...")
-        time.sleep(60)
-        
-# Getting both tokens initially
-bob_token = get_access_token_for("bob")
-alice_token = get_access_token_for("alice")
+    import httpx
+
+    try:
+        response = await client.post(token_url, headers=headers, data=token_data)
+    except httpx.HTTPError as exc:
+        response = None
+        print(f"Token request for {username} failed: {exc}")
+    if response is not None and response.status_code == 200:
+        tokens[username] = response.json().get("access_token")
+        return tokens[username]
+    tokens.pop(username, None)
+    token_retry_at[username] = time.time() + TOKEN_RETRY_SECONDS
+    print(f"Failed to retrieve the token for {username}. Retrying in 1 minute...")
+    return None
 
 # Function to generate a random auction end datetime
 def random_auction_end():
@@ -70,53 +104,40 @@ def random_auction_end():
     random_duration = one_hour + timedelta(seconds=random.randint(0, int((one_day - one_hour).total_seconds())))
     return (datetime.utcnow() + random_duration).isoformat() + "Z"
 
-# Read image URLs from the file
-with open('resources/image_urls.txt', 'r') as file:
-    # strip() to remove whitespace and newlines, replace() to remove quotes and commas
-    links = [line.strip().replace('"', '').replace(',', '') for line in file.readlines()]
-
-# Extract key and information from link
-def extract_key_from_link(link):
-    parts = link.split("/")[-1].split("_")[0].split("-")
-    colour = parts[-1]
-    make = parts[0]
-    model = '-'.join(parts[1:-1])
-    return f"{make}-{model}-{colour}", link
-
-# Extract make, model, and colour from the dictionary key
-def extract_info_from_key(key):
-    parts = key.split("-")
-    colour = parts[-1]
-    make = parts[0]
-    model_parts = parts[1:-1]
-    model = ' '.join(model_parts)
-    return make, model, colour
-
-
-link_dict = {extract_key_from_link(link)[0]: extract_key_from_link(link)[1] for link in links}
-
-for key, link in link_dict.items():
-    make, model, colour = extract_info_from_key(key)
-    print(f"Make: {make}, Model: {model}, Colour: {colour}")
-
-
-def fetch_auctions_and_store():
-    global auctions_data  # Reference the global variable
-    response = requests.get(GATEWAY_API_URL + '/auctions')
+# [make, model, colour, image url] per car, parsed from the image list once and cached until it changes
+IMAGE_URLS_PATH = 'resources/image_urls.txt'
+CATALOG_CACHE_PATH = os.getenv('CATALOG_CACHE_PATH') or 'resources/image_catalog.json'
+catalog, catalog_status = load_catalog(IMAGE_URLS_PATH, CATALOG_CACHE_PATH)
+startup_report["catalog"] = {"entries": len(catalog), "status": catalog_status}
+startup_phase("catalog")
+
+
+# Full download on first run and every FULL_SYNC_SECONDS; otherwise only auctions updated since the last sync
+async def fetch_auctions_and_store(client):
+    global auctions_loaded, last_full_sync
+    full = not auctions_loaded or time.time() - last_full_sync >= FULL_SYNC_SECONDS
+    params = None
+    if not full:
+        since = datetime.utcfromtimestamp(auctions_store.high_water - SYNC_OVERLAP_SECONDS)
+        params = {'date': since.isoformat() + 'Z'}
+    response = await client.get(GATEWAY_API_URL + '/auctions', params=params)
     response.raise_for_status()
-    auctions_data = pd.DataFrame(response.json())
-
-# Initially call the fetch_auctions_and_store to populate the auctions_data variable
-fetch_auctions_and_store()
-print(auctions_data.head())
+    if full:
+        auctions_store.replace(response.json())
+        last_full_sync = time.time()
+    else:
+        auctions_store.merge(response.json())
+    auctions_loaded = True
 
-def create_auction():
+async def create_auction(client):
     auction_url = GATEWAY_API_URL + "/auctions"
     dateString = random_auction_end()
-    chosen_key, chosen_link = random.choice(list(link_dict.items()))
-    make, model, colour = extract_info_from_key(chosen_key)
-    make, model, colour = make.lower().capitalize(), model.lower().capitalize(), colour.lower().capitalize()
+    make, model, colour, chosen_link = random.choice(catalog)
     
+    bob_token = await get_access_token_for(client, 'bob')
+    if not bob_token:
+        return
+
     headers_for_create = {
         "Authorization": f"Bearer {bob_token}",
         "Content-Type": "application/json"
@@ -134,50 +155,41 @@ def create_auction():
         "auctionEnd": dateString
         }
 
-    response = requests.post(auction_url, headers=headers_for_create, data=json.dumps(body))
+    response = await client.post(auction_url, headers=headers_for_create, json=body)
     
-    if response.status_code == 200:
+    if response.is_success:
         print('successfuly created new auction')
         add_log(f"py-svc > Successfully created auction with ID: {response.json()['id']}")
 
-    if response.status_code == 403 | 401:  # Forbidden, meaning the token might have expired or is not valid
+    if response.status_code in (401, 403):  # Token might have expired or is not valid
         print("Access denied. Re-obtaining token...")
-        token = get_access_token_for('bob')
-        headers["Authorization"] = f"Bearer {token}"
+        await get_access_token_for(client, 'bob', refresh=True)
 
     print(response.status_code)
     print(response.text)
 
-def place_bid():
+async def place_bid(client):
     print('in place bid')
-    global auctions_data  # Reference the global variable
-    
-    # It's possible that the function is called before the auctions_data is populated. So, check for its existence.
-    if auctions_data is None:
-        print("No auctions data available yet.")
-        return
+    # Auctions are fetched lazily: the first bid triggers the initial load if the refresh job hasn't yet
+    if not auctions_loaded:
+        await fetch_auctions_and_store(client)
     
-    # Convert current UTC time to a timezone-aware datetime object
-    current_utc_time = datetime.utcnow().replace(tzinfo=pytz.utc)
-
-    # Convert 'auctionEnd' column to datetime format
-    auction_end_dates = pd.to_datetime(auctions_data['auctionEnd'], format='ISO8601')
-    
-    # Filter the auctions based on the provided conditions
-    valid_auctions = auctions_data[(auctions_data['seller'] != 'alice') & (auction_end_dates > current_utc_time)]
+    # Random live auction not sold by alice; ended auctions are expired from the store first
+    auction = auctions_store.sample(exclude_seller='alice')
     
     # If no valid auctions, print a message and return
-    if valid_auctions.empty:
+    if auction is None:
         print("No valid auctions to bid on!")
         return
 
-    # Randomly choose an auction from the filtered auctions
-    auction = valid_auctions.sample(n=1).iloc[0]
-    
     # Calculate the bid amount
     current_high_bid = auction['currentHighBid']
     bid_amount = current_high_bid + random.randint(1, 10)
     
+    alice_token = await get_access_token_for(client, 'alice')
+    if not alice_token:
+        return
+
     headers_for_bid = {
         "Authorization": f"Bearer {alice_token}",
         "Content-Type": "application/json"
@@ -185,7 +197,7 @@ def place_bid():
     
     # Construct the URL and make the POST request
     url = f"{GATEWAY_API_URL}/bids?auctionId={auction['id']}&amount={bid_amount}"
-    response = requests.post(url, headers=headers_for_bid)
+    response = await client.post(url, headers=headers_for_bid)
     
     # Print the response
     if response.status_code == 200:
@@ -194,27 +206,48 @@ def place_bid():
 
     else:
         print(f"Failed to place bid. Status code: {response.status_code}. Response: {response.text}")
-        if(response.status_code == 401 ) : get_access_token_for('alice')
+        if response.status_code == 401:
+            await get_access_token_for(client, 'alice', refresh=True)
 
     
-# schedule the functions
-random_time_for_place_bid = random.randint(10, 24)
-schedule.every(random_time_for_place_bid).seconds.do(place_bid)
-
-schedule.every(600).seconds.do(create_auction)
-
-schedule.every(3).minutes.do(fetch_auctions_and_store)
+# Each job runs on its own coroutine, so a slow /auctions fetch no longer holds up bids or auction creation
+async def run_every(seconds, job, client, initial_delay):
+    await asyncio.sleep(initial_delay)
+    while True:
+        try:
+            await job(client)
+        except Exception as exc:
+            print(f"{job.__name__} failed: {exc}")
+        await asyncio.sleep(seconds)
+
+async def run_jobs():
+    started = time.perf_counter()
+    import httpx
+    startup_report["httpxImportMs"] = round((time.perf_counter() - started) * 1000, 1)
+
+    random_time_for_place_bid = random.randint(10, 24)
+    limits = httpx.Limits(max_connections=10, max_keepalive_connections=5)
+    async with httpx.AsyncClient(timeout=30, limits=limits) as client:
+        await asyncio.gather(
+            run_every(30, fetch_auctions_and_store, client, initial_delay=0),
+            run_every(random_time_for_place_bid, place_bid, client, initial_delay=random_time_for_place_bid),
+            run_every(600, create_auction, client, initial_delay=600),
+        )
 
 def run_schedule():
-    while True:
-        schedule.run_pending()
-        time.sleep(1)
+    asyncio.run(run_jobs())
         
 if __name__ == "__main__":
-    t = Thread(target=run_schedule)
+    # Bind before starting the jobs so /logs answers while they import and warm up
+    server = make_server('0.0.0.0', 5000, app, threaded=True)
+    startup_phase("listen")
+    startup_report["totalMs"] = round(
+        startup_report["phasesMs"]["imports"] + (time.perf_counter() - STARTED) * 1000, 1
+    )
+    phases = ", ".join(f"{name} {ms} ms" for name, ms in startup_report["phasesMs"].items())
+    print(f"Startup in {startup_report['totalMs']} ms ({phases}); catalog {catalog_status}, {len(catalog)} entries")
+
+    t = Thread(target=run_schedule, daemon=True)
     t.start()
-    
-    app.run( host='0.0.0.0', port=5000)
-
-    
 
+    server.serve_forever()
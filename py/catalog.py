@@ -0,0 +1,59 @@
+import json
+import os
+
+# Bump when the cached entry layout changes so old cache files are rebuilt
+CATALOG_VERSION = 1
+
+
+# "https://.../v1694424069/CUPRA-LEON-BLUE_jrdpnr.jpg" -> ("CUPRA-LEON-BLUE", make, model, colour)
+def parse_link(link):
+    parts = link.split("/")[-1].split("_")[0].split("-")
+    key = "-".join(parts)
+    colour = parts[-1]
+    make = parts[0]
+    model = ' '.join(parts[1:-1])
+    return key, make.lower().capitalize(), model.lower().capitalize(), colour.lower().capitalize()
+
+
+# One [make, model, colour, image url] entry per make-model-colour, formatted for auction bodies.
+# A repeated key keeps its first position and its last link.
+def parse_catalog(lines):
+    entries = {}
+    for line in lines:
+        # strip() to remove whitespace and newlines, replace() to remove quotes and commas
+        link = line.strip().replace('"', '').replace(',', '')
+        if not link:
+            continue
+        key, make, model, colour = parse_link(link)
+        entries[key] = [make, model, colour, link]
+    return list(entries.values())
+
+
+def _source_stamp(source_path):
+    stat = os.stat(source_path)
+    return {"size": stat.st_size, "mtimeNs": stat.st_mtime_ns}
+
+
+# Parsed catalog, read from cache_path while the source file is unchanged (same size and mtime,
+# the check .pyc files use) and rebuilt otherwise. Returns (entries, "cached" | "rebuilt").
+# An unwritable cache location only costs the re-parse on the next start.
+def load_catalog(source_path, cache_path):
+    stamp = _source_stamp(source_path)
+    try:
+        with open(cache_path, 'r') as file:
+            cached = json.load(file)
+        if cached.get("version") == CATALOG_VERSION and cached.get("source") == stamp:
+            return cached["entries"], "cached"
+    except (OSError, ValueError):
+        pass
+
+    with open(source_path, 'r') as file:
+        entries = parse_catalog(file)
+    tmp_path = cache_path + ".tmp"
+    try:
+        with open(tmp_path, 'w') as file:
+            json.dump({"version": CATALOG_VERSION, "source": stamp, "entries": entries}, file, separators=(',', ':'))
+        os.replace(tmp_path, cache_path)
+    except OSError as exc:
+        print(f"Could not write catalog cache {cache_path}: {exc}")
+    return entries, "rebuilt"
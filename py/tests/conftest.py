@@ -0,0 +1,5 @@
+import os
+import sys
+
+# bot.py imports its helpers as top-level modules, as when run from py/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,50 @@
+import random
+from collections import Counter
+
+import pytest
+
+from auction_store import AuctionStore, _SellerCounts
+
+NOW = 1_700_000_000
+END = "2030-01-01T00:00:00.1234567Z"
+
+
+def _store(per_seller):
+    store = AuctionStore()
+    for seller, count in per_seller.items():
+        for i in range(count):
+            store.upsert({"id": f"{seller}-{i}", "seller": seller, "auctionEnd": END}, NOW)
+    return store
+
+
+def test_seller_counts_find_matches_a_linear_scan():
+    rng = random.Random(7)
+    counts = [rng.randrange(4) for _ in range(37)]
+    tree = _SellerCounts()
+    for slot, count in enumerate(counts):
+        tree.grow()
+        tree.add(slot, count)
+    expected = [(slot, offset) for slot, count in enumerate(counts) for offset in range(count)]
+    assert [tree.find(rank) for rank in range(sum(counts))] == expected
+
+
+def test_sample_is_uniform_over_auctions_of_other_sellers():
+    random.seed(11)
+    store = _store({"alice": 1, "bob": 6, "carol": 3, "dave": 10})
+    draws = 40000
+    seen = Counter(store.sample("bob", NOW)["id"] for _ in range(draws))
+    assert not any(auction_id.startswith("bob-") for auction_id in seen)
+    assert len(seen) == 14
+    for count in seen.values():
+        assert count / draws == pytest.approx(1 / 14, abs=0.01)
+
+
+def test_sample_skips_removed_and_ended_auctions():
+    random.seed(3)
+    store = _store({"alice": 2, "bob": 2})
+    store.remove("alice-0")
+    store.upsert({"id": "bob-1", "seller": "bob", "auctionEnd": "2023-11-14T22:13:30Z"}, NOW)
+    store.upsert({"id": "bob-0", "seller": "bob", "status": "Finished"}, NOW)
+    assert {store.sample(None, NOW + 20)["id"] for _ in range(200)} == {"alice-1"}
+    assert store.sample("alice", NOW + 20) is None
+    assert len(store) == 1
@@ -25,6 +25,7 @@ namespace AuctionService
             }
 
             auction.Status = auction.SoldAmount > auction.ReservePrice ? Status.Finished : Status.ReserveNotMet;
+            auction.UpdatedAt = DateTime.UtcNow;
 
             await _dbContext.SaveChangesAsync();
         }
@@ -24,6 +24,8 @@ namespace AuctionService.Consumers
             && context.Message.Amount > auction.CurrentHighBid)
             {
                 auction.CurrentHighBid = context.Message.Amount;
+                // GET /api/auctions?date= returns auctions by UpdatedAt, so pollers see the new high bid
+                auction.UpdatedAt = DateTime.UtcNow;
                 await _dbContext.SaveChangesAsync();
             }
         }
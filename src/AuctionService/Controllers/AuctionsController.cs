@@ -94,6 +94,7 @@ public class AuctionsController : ControllerBase
         auction.Item.Colorway = updateAuctionDto.Colorway ?? auction.Item.Colorway;
         auction.Item.ReleaseYear = updateAuctionDto.ReleaseYear ?? auction.Item.ReleaseYear;
         auction.Item.Specs = updateAuctionDto.Specs ?? auction.Item.Specs;
+        auction.UpdatedAt = DateTime.UtcNow;
         
         await _publishEndpoint.Publish(_mapper.Map<AuctionUpdated>(auction));
 